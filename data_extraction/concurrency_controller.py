@@ -0,0 +1,152 @@
+# concurrency_controller.py
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Callable, Optional
+
+import psutil
+
+from metrics.metrics import CONSUMER_CONCURRENCY_LIMIT, CONSUMER_CONCURRENCY_ADJUSTMENTS, CONSUMER_SCRAPE_P95
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveLimiter:
+    """
+    A semaphore whose limit can be changed while it is in use.
+
+    Lowering the limit never interrupts holders; new acquirers simply wait until enough
+    permits have been released to get back under the new limit.
+    """
+
+    def __init__(self, limit: int, minimum: int = 1, maximum: Optional[int] = None):
+        self.minimum = max(minimum, 1)
+        self.maximum = max(maximum or limit, self.minimum)
+        self._limit = self._clamp(limit)
+        self.active = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    async def acquire(self):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.active < self._limit)
+            self.active += 1
+
+    async def release(self):
+        async with self._changed:
+            self.active -= 1
+            self._changed.notify()
+
+    async def resize(self, limit: int) -> int:
+        async with self._changed:
+            self._limit = self._clamp(limit)
+            self._changed.notify_all()
+        return self._limit
+
+    def _clamp(self, limit: int) -> int:
+        return min(max(int(limit), self.minimum), self.maximum)
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+
+class AIMDController:
+    """
+    Resizes an AdaptiveLimiter with additive-increase / multiplicative-decrease.
+
+    Every `interval` seconds it looks at the scrapes recorded since the last decision (the same
+    durations observed into SCRAPE_DURATION) and:
+      - cuts the limit by `decrease_factor` if host memory is above `memory_ceiling_percent`,
+        the failure rate is above `max_failure_rate`, or p95 latency is above `target_p95`;
+      - otherwise adds `increase_step` if the pipeline actually used the whole limit.
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, busy: Callable[[], int], target_p95: float = 30.0,
+                 max_failure_rate: float = 0.2, memory_ceiling_percent: float = 85.0,
+                 increase_step: int = 1, decrease_factor: float = 0.7, interval: float = 15.0,
+                 min_samples: int = 10):
+        self.limiter = limiter
+        self.busy = busy
+        self.target_p95 = target_p95
+        self.max_failure_rate = max_failure_rate
+        self.memory_ceiling_percent = memory_ceiling_percent
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.interval = interval
+        self.min_samples = min_samples
+        self._samples = deque()  # (duration, success) since the last decision
+        self._saturated = False
+        self._task: Optional[asyncio.Task] = None
+        CONSUMER_CONCURRENCY_LIMIT.set(limiter.limit)
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    def record(self, duration: float, success: bool):
+        """Called by a worker when it finishes a message."""
+        self._samples.append((duration, success))
+        if self.busy() >= self.limiter.limit:
+            self._saturated = True
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.adjust()
+            except Exception as e:
+                logger.exception(f"Concurrency adjustment failed: {e}")
+
+    async def adjust(self):
+        """Makes one AIMD decision from the samples gathered since the previous one."""
+        memory_percent = psutil.virtual_memory().percent
+        if memory_percent > self.memory_ceiling_percent:
+            # Memory pressure does not wait for enough samples
+            await self._decrease("memory", f"memory {memory_percent:.0f}% > {self.memory_ceiling_percent:.0f}%")
+            return
+
+        if len(self._samples) < self.min_samples:
+            return
+
+        durations = sorted(duration for duration, _ in self._samples)
+        p95 = durations[min(math.ceil(len(durations) * 0.95), len(durations)) - 1]
+        failure_rate = sum(1 for _, success in self._samples if not success) / len(self._samples)
+        CONSUMER_SCRAPE_P95.set(p95)
+
+        if failure_rate > self.max_failure_rate:
+            await self._decrease("failure_rate", f"failure rate {failure_rate:.0%} > {self.max_failure_rate:.0%}")
+        elif p95 > self.target_p95:
+            await self._decrease("latency", f"p95 {p95:.1f}s > {self.target_p95:.1f}s")
+        elif self._saturated:
+            await self._apply(self.limiter.limit + self.increase_step, "healthy",
+                              f"p95 {p95:.1f}s, failure rate {failure_rate:.0%}")
+        self._reset_window()
+
+    async def _decrease(self, reason: str, detail: str):
+        await self._apply(math.floor(self.limiter.limit * self.decrease_factor), reason, detail)
+        self._reset_window()
+
+    async def _apply(self, target: int, reason: str, detail: str):
+        previous = self.limiter.limit
+        limit = await self.limiter.resize(target)
+        if limit != previous:
+            CONSUMER_CONCURRENCY_LIMIT.set(limit)
+            CONSUMER_CONCURRENCY_ADJUSTMENTS.labels(reason=reason).inc()
+            logger.info(f"Concurrency limit {previous} -> {limit} ({reason}: {detail})")
+
+    def _reset_window(self):
+        self._samples.clear()
+        self._saturated = False
@@ -7,6 +7,7 @@ SCRAPER_CONFIG = {
     'PROPERTIES_TO_SCRAPE_LIMIT': 10000,
     'MAX_CONCURRENT_PAGES': 10,
     'HEADLESS_MODE': True,
+    'EXTRACTION_MODE': 'evaluate',  # 'evaluate' = one page.evaluate per page, 'locator' = one call per field
     'LOG_FILE_PATH': 'DataExtraction.log',
     'TIMEOUTS': {
         'MAIN_PAGE': 30000,
@@ -17,6 +18,44 @@ SCRAPER_CONFIG = {
         'BETWEEN_CLICKS': 1000,
         'AFTER_SCRAPE_MIN': 1,
         'AFTER_SCRAPE_MAX': 3,
+    },
+    # Request interception for detail pages: DataExtractor only needs the DOM, so skip heavy assets
+    # and third-party scripts. Stylesheets are kept because innerText depends on computed visibility.
+    'PAGE_PROFILE': {
+        'BLOCK_REQUESTS': True,
+        'BLOCKED_RESOURCE_TYPES': ['image', 'media', 'font', 'imageset', 'object', 'beacon', 'ping'],
+        'BLOCKED_DOMAINS': [
+            'google-analytics.com', 'googletagmanager.com', 'googlesyndication.com', 'doubleclick.net',
+            'googleadservices.com', 'facebook.net', 'facebook.com', 'hotjar.com', 'newrelic.com',
+            'nr-data.net', 'segment.io', 'optimizely.com', 'criteo.com', 'adsrvr.org', 'bing.com',
+            'youtube.com', 'ytimg.com', 'vimeo.com', 'tiktok.com', 'pinterest.com', 'quantserve.com',
+        ],
+        'WAIT_UNTIL': 'domcontentloaded',  # then wait for the title selector only
+        'READY_TIMEOUT': 15000,
+    },
+    'CONTEXT_POOL': {
+        'SIZE': 3,  # contexts, each with its own user agent, cache and cookies
+        'MAX_PAGES_PER_CONTEXT': 200,  # retire and rebuild after this many pages
+        'BROWSER_MEMORY_LIMIT_MB': 2048,  # retire the busiest context above this
+        'MEMORY_CHECK_INTERVAL': 10,  # seconds
+    },
+    'RATE_LIMIT': {  # per-host token bucket applied to every page navigation
+        'BACKEND': 'sqlite',  # 'sqlite' (shared by processes on this node), 'redis', or 'memory'
+        'SQLITE_PATH': '/tmp/scraper_rate_limit.sqlite3',
+        'REDIS_URL': 'redis://localhost:6379/0',
+        'REQUESTS_PER_SECOND': 1.0,  # starting rate per host
+        'BURST': 3,
+        'MIN_RPS': 0.1,
+        'MAX_RPS': 5.0,
+        'INCREASE_STEP': 0.05,  # added per successful navigation
+        'DECREASE_FACTOR': 0.5,  # applied on a throttling response
+        'THROTTLE_STATUSES': [429, 503],
+    },
+    'PAGINATION': {
+        'PROPERTY_LINK_SELECTOR': 'a.property-link',
+        'NEXT_PAGE_SELECTOR': 'a.next',
+        'PAGE_RANGE_SELECTOR': '.pageRange',  # e.g. "Page 1 of 28"
+        'MAX_PAGES': None,  # optional cap on result pages crawled; None follows every page like scrape_all_pages
     }
 }
 
@@ -3,6 +3,7 @@ import logging
 import os
 import signal
 import time
+from enum import Enum
 
 import aiobotocore.session
 from dotenv import load_dotenv
@@ -14,9 +15,13 @@ from data_extraction.scraper import ApartmentScraper
 from config import SCRAPER_CONFIG, PROMETHEUS_PORT
 from metrics.metrics import (
     SCRAPER_SUCCESS, SCRAPER_FAILURES, LISTINGS_SCRAPED,
-    SCRAPE_DURATION, MEMORY_USAGE, CPU_USAGE
+    SCRAPE_DURATION, MEMORY_USAGE, CPU_USAGE,
+    CONSUMER_IN_FLIGHT, CONSUMER_PREFETCHED, CONSUMER_IDLE_SLOTS, FRESHNESS_SKIPS
 )
-from database_ops.db_ops import save_scraped_data_to_db
+from data_extraction.concurrency_controller import AdaptiveLimiter, AIMDController
+from database_ops.freshness import FreshnessCache
+from data_extraction.visibility_heartbeat import VisibilityHeartbeat
+from data_extraction.write_buffer import WriteBuffer
 from logging_config import setup_logging
 
 # ----------------------------------------------------
@@ -34,10 +39,22 @@ if not AWS_REGION:
 
 # Tuning knobs (env overrideable)
 BATCH_SIZE = int(os.getenv("CONSUMER_BATCH_SIZE", "10"))  # Max 10 for SQS
-CONCURRENCY = int(os.getenv("CONSUMER_CONCURRENCY", "10"))
+CONCURRENCY = int(os.getenv("CONSUMER_CONCURRENCY", "10"))  # starting point for the adaptive limit
+MIN_CONCURRENCY = int(os.getenv("CONSUMER_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = int(os.getenv("CONSUMER_MAX_CONCURRENCY", str(CONCURRENCY * 2)))
+TARGET_P95 = float(os.getenv("CONSUMER_TARGET_P95_SECONDS", "30"))  # back off when p95 scrape time exceeds this
+MAX_FAILURE_RATE = float(os.getenv("CONSUMER_MAX_FAILURE_RATE", "0.2"))  # ...or failure rate exceeds this
+MEMORY_CEILING = float(os.getenv("CONSUMER_MEMORY_CEILING_PERCENT", "85"))  # ...or host memory exceeds this
+ADJUST_INTERVAL = float(os.getenv("CONSUMER_ADJUST_INTERVAL", "15"))  # seconds between limit adjustments
+PREFETCH = int(os.getenv("CONSUMER_PREFETCH", "5"))  # messages held ready beyond the concurrency limit
 LONG_POLL_SECONDS = int(os.getenv("SQS_LONG_POLL_SECONDS", "5"))  # up to 20
 POLL_IDLE_SLEEP = float(os.getenv("POLL_IDLE_SLEEP", "0.5"))  # seconds when queue empty
 ERROR_BACKOFF = float(os.getenv("ERROR_BACKOFF", "1"))  # seconds on unexpected error
+WRITE_BUFFER_MAX_RECORDS = int(os.getenv("WRITE_BUFFER_MAX_RECORDS", "50"))  # flush at this many records
+WRITE_BUFFER_MAX_DELAY = float(os.getenv("WRITE_BUFFER_MAX_DELAY", "2"))  # ...or this many seconds
+VISIBILITY_TIMEOUT = int(os.getenv("SQS_VISIBILITY_TIMEOUT", "60"))  # requested on receive, renewed by heartbeat
+VISIBILITY_EXTEND_MARGIN = float(os.getenv("SQS_VISIBILITY_EXTEND_MARGIN", "15"))  # extend when this close to expiry
+VISIBILITY_MAX_HOLD = float(os.getenv("SQS_VISIBILITY_MAX_HOLD", "900"))  # give up extending after this long
 
 SQS_QUEUE_URL = None  # cached after first lookup
 
@@ -57,17 +74,49 @@ async def get_queue_url_async(session: aiobotocore.session.AioSession) -> str:
         return SQS_QUEUE_URL
 
 
+async def release_messages(sqs_client, messages: list):
+    """Makes messages visible again immediately (visibility timeout 0) so another consumer can take them."""
+    for i in range(0, len(messages), 10):
+        chunk = messages[i:i + 10]
+        try:
+            await sqs_client.change_message_visibility_batch(
+                QueueUrl=SQS_QUEUE_URL,
+                Entries=[
+                    {"Id": str(n), "ReceiptHandle": m["ReceiptHandle"], "VisibilityTimeout": 0}
+                    for n, m in enumerate(chunk)
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"Could not release {len(chunk)} messages; they will reappear after their timeout: {e}")
+
+
 # ----------------------------------------------------
 # Core processing
 # ----------------------------------------------------
-async def process_message(sqs_client, message: dict, scraper: ApartmentScraper):
-    """Process a single SQS message: scrape, validate, persist, delete or leave for DLQ."""
+class MessageOutcome(Enum):
+    BUFFERED = "buffered"  # scraped and handed to the write buffer
+    SKIPPED = "skipped"    # stored within the freshness TTL; acked without opening a page
+    FAILED = "failed"      # left on the queue for SQS to retry / DLQ
+
+
+async def process_message(message: dict, scraper: ApartmentScraper, write_buffer: WriteBuffer,
+                          freshness: FreshnessCache = None) -> MessageOutcome:
+    """
+    Process a single SQS message: scrape, validate, hand to the write buffer or leave for DLQ.
+    Listings stored within the freshness TTL are acknowledged without opening a page.
+    """
     url = message.get("Body")
     receipt_handle = message.get("ReceiptHandle")
 
     if not url or not receipt_handle:
         logger.error("Malformed SQS message — missing Body or ReceiptHandle; leaving for DLQ.")
-        return
+        return MessageOutcome.FAILED
+
+    if freshness and await freshness.is_fresh(url):
+        FRESHNESS_SKIPS.labels(stage="consume").inc()
+        logger.info(f"Skipping {url} — stored within the freshness TTL")
+        await write_buffer.ack(receipt_handle)
+        return MessageOutcome.SKIPPED
 
     start_time = time.time()
 
@@ -83,13 +132,10 @@ async def process_message(sqs_client, message: dict, scraper: ApartmentScraper):
             SCRAPER_SUCCESS.labels(source=SCRAPER_CONFIG["MAIN_URL"]).inc()
             LISTINGS_SCRAPED.labels(source=SCRAPER_CONFIG["MAIN_URL"]).inc()
 
-            logger.info(f"Scrape OK: {url} — persisting to DB")
-            await save_scraped_data_to_db([scraped_data])
-            logger.info("Persisted.")
-
-            # Delete message on success
-            await sqs_client.delete_message(QueueUrl=SQS_QUEUE_URL, ReceiptHandle=receipt_handle)
-            logger.info(f"Deleted message for {url}")
+            # The buffer persists it and deletes the message once the row has committed
+            logger.info(f"Scrape OK: {url} — buffering for DB write")
+            await write_buffer.add(receipt_handle, scraped_data)
+            return MessageOutcome.BUFFERED
         else:
             # Validation failed — don't delete. Let SQS retry / DLQ
             SCRAPER_FAILURES.labels(source=SCRAPER_CONFIG["MAIN_URL"]).inc()
@@ -97,10 +143,12 @@ async def process_message(sqs_client, message: dict, scraper: ApartmentScraper):
                 "Validation failed — not deleting. url=%s reason=%s",
                 url, scraped_data.get("validation_status")
             )
+            return MessageOutcome.FAILED
 
     except Exception as e:
         #SCRAPER_FAILURES.labels(source=SCRAPER_CONFIG["MAIN_URL"]).inc()
         logger.exception(f"Critical error processing url={url}: {e}")
+        return MessageOutcome.FAILED
 
     finally:
         duration = time.time() - start_time
@@ -109,8 +157,139 @@ async def process_message(sqs_client, message: dict, scraper: ApartmentScraper):
         CPU_USAGE.set(psutil.cpu_percent())
 
 
+class MessagePipeline:
+    """
+    Continuously-fed processing pipeline.
+
+    One receiver task keeps an in-process prefetch queue topped up so that in-flight plus
+    prefetched messages never exceed the concurrency limit + PREFETCH, and worker tasks pull
+    from it independently, so a slow page only ever occupies its own slot.
+
+    The limit is adaptive: MAX_CONCURRENCY workers are started, but only `limiter.limit` of them
+    may hold a message at once, and an AIMD controller moves that limit between MIN_CONCURRENCY
+    and MAX_CONCURRENCY based on scrape latency, failure rate and host memory.
+    """
+
+    def __init__(self, sqs_client, scraper: ApartmentScraper, write_buffer: WriteBuffer,
+                 heartbeat: VisibilityHeartbeat, stop_event: asyncio.Event,
+                 concurrency: int = CONCURRENCY, prefetch: int = PREFETCH,
+                 min_concurrency: int = MIN_CONCURRENCY, max_concurrency: int = MAX_CONCURRENCY,
+                 freshness: FreshnessCache = None):
+        self.sqs_client = sqs_client
+        self.scraper = scraper
+        self.write_buffer = write_buffer
+        self.heartbeat = heartbeat
+        self.freshness = freshness
+        self.stop_event = stop_event
+        self.limiter = AdaptiveLimiter(concurrency, min_concurrency, max(max_concurrency, concurrency))
+        self.controller = AIMDController(
+            self.limiter, busy=lambda: self.in_flight, target_p95=TARGET_P95,
+            max_failure_rate=MAX_FAILURE_RATE, memory_ceiling_percent=MEMORY_CEILING,
+            interval=ADJUST_INTERVAL,
+        )
+        self.prefetch = max(prefetch, 0)
+        self.prefetch_queue: asyncio.Queue = asyncio.Queue()
+        self.in_flight = 0
+        self._slot_freed = asyncio.Event()
+
+    @property
+    def capacity(self) -> int:
+        return self.limiter.limit + self.prefetch
+
+    async def run(self):
+        """Runs until the stop event is set, then drains in-flight work and releases prefetched messages."""
+        workers = [asyncio.create_task(self._worker_loop()) for _ in range(self.limiter.maximum)]
+        try:
+            async with self.controller:
+                await self._receive_loop()
+        finally:
+            await self._release_prefetched()
+            await self.prefetch_queue.join()  # wait for in-flight scrapes to finish
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self._update_gauges()
+
+    async def _receive_loop(self):
+        while not self.stop_event.is_set():
+            room = self.capacity - self.in_flight - self.prefetch_queue.qsize()
+            if room <= 0:
+                # Pipeline is full — wait for a worker to free a slot (or re-check the stop flag)
+                self._slot_freed.clear()
+                try:
+                    await asyncio.wait_for(self._slot_freed.wait(), timeout=POLL_IDLE_SLEEP)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                response = await self.sqs_client.receive_message(
+                    QueueUrl=SQS_QUEUE_URL,
+                    MaxNumberOfMessages=min(room, max(BATCH_SIZE, 1), 10),
+                    WaitTimeSeconds=min(max(LONG_POLL_SECONDS, 0), 20),
+                    VisibilityTimeout=VISIBILITY_TIMEOUT,
+                )
+            except Exception as e:
+                logger.exception(f"Polling error: {e}. Backing off {ERROR_BACKOFF}s")
+                await asyncio.sleep(ERROR_BACKOFF)
+                continue
+
+            messages = response.get("Messages", [])
+            if not messages:
+                # small idle sleep to avoid busy loop when queue is empty
+                await asyncio.sleep(POLL_IDLE_SLEEP)
+                continue
+
+            for message in messages:
+                if message.get("ReceiptHandle"):
+                    self.heartbeat.track(message["ReceiptHandle"])
+                self.prefetch_queue.put_nowait(message)
+            self._update_gauges()
+
+    async def _worker_loop(self):
+        while True:
+            async with self.limiter:
+                message = await self.prefetch_queue.get()
+                self.in_flight += 1
+                self._update_gauges()
+                outcome = MessageOutcome.FAILED
+                start_time = time.monotonic()
+                try:
+                    outcome = await process_message(message, self.scraper, self.write_buffer, self.freshness)
+                except Exception as e:
+                    logger.exception(f"Unhandled error in worker: {e}")
+                finally:
+                    if outcome is not MessageOutcome.SKIPPED:
+                        # A skip never opened a page; it says nothing about scrape latency or errors
+                        self.controller.record(time.monotonic() - start_time, outcome is MessageOutcome.BUFFERED)
+                    if outcome is MessageOutcome.FAILED and message.get("ReceiptHandle"):
+                        # Abandoned — let it reappear on its current timeout instead of extending it
+                        self.heartbeat.untrack(message["ReceiptHandle"])
+                    self.in_flight -= 1
+                    self._slot_freed.set()
+                    self._update_gauges()
+                    self.prefetch_queue.task_done()
+
+    async def _release_prefetched(self):
+        """Hands messages that were prefetched but never started straight back to SQS."""
+        released = []
+        while not self.prefetch_queue.empty():
+            released.append(self.prefetch_queue.get_nowait())
+            self.prefetch_queue.task_done()
+        if released:
+            logger.info(f"Releasing {len(released)} prefetched messages back to the queue.")
+            for message in released:
+                self.heartbeat.untrack(message["ReceiptHandle"])
+            await release_messages(self.sqs_client, released)
+
+    def _update_gauges(self):
+        CONSUMER_IN_FLIGHT.set(self.in_flight)
+        CONSUMER_PREFETCHED.set(self.prefetch_queue.qsize())
+        CONSUMER_IDLE_SLOTS.set(max(self.limiter.limit - self.in_flight, 0))
+
+
 async def poll_sqs_for_messages(scraper: ApartmentScraper, stop_event: asyncio.Event):
-    """Continuously poll SQS and process messages in batches with limited concurrency."""
+    """Continuously poll SQS and keep every concurrency slot fed from a bounded prefetch queue."""
     session = aiobotocore.session.get_session()
 
     try:
@@ -119,46 +298,26 @@ async def poll_sqs_for_messages(scraper: ApartmentScraper, stop_event: asyncio.E
         logger.exception(f"Failed to get SQS queue URL: {e}")
         return
 
-    semaphore = asyncio.Semaphore(CONCURRENCY)
-
-    async with session.create_client("sqs", region_name=AWS_REGION) as sqs_client:
+    freshness = FreshnessCache()
+    async with session.create_client("sqs", region_name=AWS_REGION) as sqs_client, \
+            VisibilityHeartbeat(sqs_client, SQS_QUEUE_URL, VISIBILITY_TIMEOUT,
+                                VISIBILITY_EXTEND_MARGIN, max_hold=VISIBILITY_MAX_HOLD) as heartbeat, \
+            WriteBuffer(sqs_client, SQS_QUEUE_URL, WRITE_BUFFER_MAX_RECORDS, WRITE_BUFFER_MAX_DELAY,
+                        heartbeat=heartbeat, freshness=freshness) as write_buffer:
         logger.info(
-            f"SQS consumer started — batch_size={BATCH_SIZE} concurrency={CONCURRENCY} long_poll={LONG_POLL_SECONDS}s"
+            f"SQS consumer started — batch_size={BATCH_SIZE} concurrency={CONCURRENCY} "
+            f"(adaptive {MIN_CONCURRENCY}-{MAX_CONCURRENCY}) prefetch={PREFETCH} "
+            f"long_poll={LONG_POLL_SECONDS}s visibility={VISIBILITY_TIMEOUT}s "
+            f"write_buffer={WRITE_BUFFER_MAX_RECORDS} records/{WRITE_BUFFER_MAX_DELAY}s"
         )
 
-        while not stop_event.is_set():
-            try:
-                response = await sqs_client.receive_message(
-                    QueueUrl=SQS_QUEUE_URL,
-                    MaxNumberOfMessages=min(max(BATCH_SIZE, 1), 10),
-                    WaitTimeSeconds=min(max(LONG_POLL_SECONDS, 0), 20),
-                )
-
-                messages = response.get("Messages", [])
-                if not messages:
-                    # small idle sleep to avoid busy loop when queue is empty
-                    await asyncio.sleep(POLL_IDLE_SLEEP)
-                    continue
-
-                # Launch tasks up to concurrency
-                tasks = []
-                for m in messages:
-                    async def _run(msg=m):
-                        async with semaphore:
-                            await process_message(sqs_client, msg, scraper)
-                    tasks.append(asyncio.create_task(_run()))
-
-                # Wait for this batch to settle before next poll (simple model)
-                await asyncio.gather(*tasks, return_exceptions=False)
-
-            except asyncio.CancelledError:
-                logger.info("Polling cancelled — shutting down cleanly...")
-                break
-            except Exception as e:
-                logger.exception(f"Polling error: {e}. Backing off {ERROR_BACKOFF}s")
-                await asyncio.sleep(ERROR_BACKOFF)
+        try:
+            await MessagePipeline(sqs_client, scraper, write_buffer, heartbeat, stop_event,
+                                  freshness=freshness).run()
+        except asyncio.CancelledError:
+            logger.info("Polling cancelled — shutting down cleanly...")
 
-        logger.info("Stop signal received — exiting polling loop.")
+        logger.info("Stop signal received — exiting polling loop and draining write buffer.")
 
 
 # ----------------------------------------------------
@@ -167,9 +326,11 @@ async def poll_sqs_for_messages(scraper: ApartmentScraper, stop_event: asyncio.E
 
 
 async def main():
-    # Prometheus endpoint
-    start_http_server(PROMETHEUS_PORT)
-    logger.info(f"Prometheus HTTP server started on port {PROMETHEUS_PORT}")
+    # Prometheus endpoint (under the supervisor, metrics are written to PROMETHEUS_MULTIPROC_DIR
+    # and served by the supervisor instead)
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        start_http_server(PROMETHEUS_PORT)
+        logger.info(f"Prometheus HTTP server started on port {PROMETHEUS_PORT}")
 
     stop_event = asyncio.Event()
 
@@ -177,12 +338,13 @@ async def main():
         logger.info(f"Received {signame} — initiating shutdown...")
         stop_event.set()
 
-    # Register signal handlers
+    # Register signal handlers on the running loop so the stop event wakes it up immediately
+    loop = asyncio.get_running_loop()
     for s in (signal.SIGINT, signal.SIGTERM):
         try:
-            signal.signal(s, lambda *_: _handle_signal(s.name))
-        except Exception:
-            pass
+            loop.add_signal_handler(s, _handle_signal, s.name)
+        except (NotImplementedError, RuntimeError):
+            signal.signal(s, lambda *_, name=s.name: _handle_signal(name))
 
     # CORRECT ARCHITECTURE: Launch the browser and scraper once
     # The entire polling loop runs within this context
@@ -0,0 +1,151 @@
+# context_pool.py
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, List, Optional
+
+import psutil
+from playwright.async_api import Browser, BrowserContext, Page
+
+from metrics.metrics import CONTEXT_ACTIVE_PAGES, CONTEXT_PAGES_SERVED, CONTEXT_RECYCLES
+
+logger = logging.getLogger(__name__)
+
+
+class PooledContext:
+    """One browser context in the pool plus its usage counters."""
+
+    def __init__(self, slot: int, context: BrowserContext, user_agent: str):
+        self.slot = slot
+        self.context = context
+        self.user_agent = user_agent
+        self.active_pages = 0
+        self.pages_served = 0
+        self.retiring = False
+        self.closing = False
+
+
+class BrowserContextPool:
+    """
+    A fixed number of browser contexts, each with its own user agent, cache and cookies.
+
+    Pages are leased from the least-loaded context. A context is retired after
+    `max_pages_per_context` pages, or when the browser's memory crosses `memory_limit_mb`
+    (the busiest context goes first). A retired context is closed and rebuilt with the next
+    user agent as soon as its last page is returned.
+    """
+
+    def __init__(self, browser: Browser, user_agents: List[str], size: int = 3,
+                 max_pages_per_context: int = 200, memory_limit_mb: Optional[float] = None,
+                 memory_check_interval: float = 10.0,
+                 setup_context: Optional[Callable[[BrowserContext], Awaitable[None]]] = None):
+        self.browser = browser
+        self.size = max(size, 1)
+        self.max_pages_per_context = max_pages_per_context
+        self.memory_limit_mb = memory_limit_mb
+        self.memory_check_interval = memory_check_interval
+        self.setup_context = setup_context
+        self._user_agents = itertools.cycle(user_agents)
+        self._slots: List[PooledContext] = []
+        self._last_memory_check = 0.0
+
+    async def start(self):
+        self._slots = [await self._create_context(slot) for slot in range(self.size)]
+        return self
+
+    async def close(self):
+        for pooled in self._slots:
+            await self._close_context(pooled)
+        self._slots = []
+
+    @asynccontextmanager
+    async def page(self):
+        """Leases a new page from the least-loaded context and closes it when done."""
+        await self._check_browser_memory()
+        pooled = self._least_loaded()
+        while pooled is None:  # every context is being rebuilt
+            await asyncio.sleep(0.05)
+            pooled = self._least_loaded()
+        pooled.active_pages += 1
+        pooled.pages_served += 1
+        self._export(pooled)
+        if pooled.pages_served >= self.max_pages_per_context and not pooled.retiring:
+            self._retire(pooled, reason="page_limit")
+
+        page: Optional[Page] = None
+        try:
+            page = await pooled.context.new_page()
+            yield page
+        finally:
+            if page is not None and not page.is_closed():
+                await page.close()
+            pooled.active_pages -= 1
+            self._export(pooled)
+            if pooled.retiring and pooled.active_pages == 0:
+                await self._recycle(pooled)
+
+    def _least_loaded(self) -> Optional[PooledContext]:
+        candidates = ([pooled for pooled in self._slots if not pooled.retiring]
+                      or [pooled for pooled in self._slots if not pooled.closing])
+        if not candidates:
+            return None
+        return min(candidates, key=lambda pooled: (pooled.active_pages, pooled.pages_served))
+
+    def _retire(self, pooled: PooledContext, reason: str):
+        pooled.retiring = True
+        CONTEXT_RECYCLES.labels(reason=reason).inc()
+        logger.info(f"Retiring browser context {pooled.slot} after {pooled.pages_served} pages ({reason}).")
+
+    async def _check_browser_memory(self):
+        if not self.memory_limit_mb:
+            return
+        now = time.monotonic()
+        if now - self._last_memory_check < self.memory_check_interval:
+            return
+        self._last_memory_check = now
+
+        try:
+            # Browser processes are descendants of this process (via the Playwright driver)
+            used_mb = sum(child.memory_info().rss for child in psutil.Process().children(recursive=True)) / 1024 / 1024
+        except psutil.Error as e:
+            logger.debug(f"Could not read browser memory: {e}")
+            return
+
+        if used_mb > self.memory_limit_mb:
+            active = [pooled for pooled in self._slots if not pooled.retiring]
+            if len(active) > 1:
+                busiest = max(active, key=lambda pooled: pooled.pages_served)
+                logger.warning(f"Browser memory {used_mb:.0f} MB > {self.memory_limit_mb} MB.")
+                self._retire(busiest, reason="memory")
+                if busiest.active_pages == 0:
+                    # No lease will return to it, so nothing else would recycle it
+                    await self._recycle(busiest)
+
+    async def _recycle(self, pooled: PooledContext):
+        # Swap in the replacement first so new leases never land on the closing context
+        pooled.closing = True
+        replacement = await self._create_context(pooled.slot)
+        self._slots[self._slots.index(pooled)] = replacement
+        await self._close_context(pooled)
+
+    async def _create_context(self, slot: int) -> PooledContext:
+        user_agent = next(self._user_agents)
+        context = await self.browser.new_context(user_agent=user_agent)
+        if self.setup_context:
+            await self.setup_context(context)
+        pooled = PooledContext(slot, context, user_agent)
+        self._export(pooled)
+        return pooled
+
+    async def _close_context(self, pooled: PooledContext):
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser context {pooled.slot}: {e}")
+
+    @staticmethod
+    def _export(pooled: PooledContext):
+        CONTEXT_ACTIVE_PAGES.labels(context=str(pooled.slot)).set(pooled.active_pages)
+        CONTEXT_PAGES_SERVED.labels(context=str(pooled.slot)).set(pooled.pages_served)
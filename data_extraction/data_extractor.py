@@ -3,6 +3,7 @@ import logging
 from playwright.async_api import Page
 from typing import Dict, List
 from selectors_utils import APARTMENT_SELECTORS
+from config import SCRAPER_CONFIG
 
 logger = logging.getLogger(__name__)
 
@@ -28,13 +29,118 @@ async def safe_get_attribute(locator, attribute: str) -> str:
     return "N/A"
 
 
+# Runs inside the page and returns every raw field the locator path would read, in one IPC round trip.
+# Supports the Playwright-only `:has-text("...")` pseudo-class used in APARTMENT_SELECTORS.
+# Single-value fields go through `single`, which mirrors Playwright's strict mode: a locator that
+# matches several elements raises and safe_inner_text records 'N/A', so more than one match is 'N/A' here too.
+EXTRACTION_SCRIPT = """
+({ sel, maxUnits }) => {
+    const NA = 'N/A';
+    const queryAll = (root, selector) => {
+        selector = selector.trim();
+        if (selector.startsWith('>')) selector = ':scope ' + selector;
+        const m = selector.match(/:has-text\\((["'])(.*?)\\1\\)/);
+        if (!m) return Array.from(root.querySelectorAll(selector));
+        const needle = m[2].toLowerCase();
+        const matched = Array.from(root.querySelectorAll(selector.slice(0, m.index) || '*'))
+            .filter(el => (el.textContent || '').toLowerCase().includes(needle));
+        const rest = selector.slice(m.index + m[0].length);
+        if (!rest.trim()) return matched;
+        return [...new Set(matched.flatMap(el => queryAll(el, rest)))];
+    };
+    const single = (root, selector) => {
+        const matched = queryAll(root, selector);
+        return matched.length === 1 ? matched[0] : null;
+    };
+    const text = el => {
+        const value = el ? (el.innerText || '').trim() : '';
+        return value || NA;
+    };
+    const attr = (el, name) => {
+        const value = el ? el.getAttribute(name) : null;
+        return value ? value.trim() : NA;
+    };
+
+    if (!queryAll(document, sel.title).length) return null;
+
+    const stateZipSpans = queryAll(document, sel.state_zip_container)
+        .flatMap(el => Array.from(el.querySelectorAll('span')));
+    const leaseOptions = queryAll(document, sel.lease_options_container)
+        .flatMap(el => queryAll(el, '.component-list .column'))
+        .map(text)
+        .filter(value => value !== NA);
+
+    const units = queryAll(document, sel.unit_cards).slice(0, maxUnits).map(card => ({
+        apartment_name: text(single(card, sel.apartment_name)),
+        rent_price_range: text(single(card, sel.rent_price_range)),
+        bedrooms: attr(card, sel.bedrooms_attr),
+        bathrooms: attr(card, sel.bathrooms_attr),
+        sqft: text(single(card, sel.sqft_col)),
+        sqft_details: queryAll(card, sel.details_sqft_text).map(text),
+        unit: text(single(card, sel.unit)),
+        base_rent: text(single(card, sel.base_rent)),
+        availability: text(single(card, sel.availability)),
+        details_link: attr(card, sel.details_link_attr),
+    }));
+
+    return {
+        title: text(single(document, sel.title)),
+        street: text(single(document, sel.street_address)),
+        state: text(stateZipSpans[0]),
+        zip_code: text(stateZipSpans[1]),
+        city: text(single(document, sel.city_span)),
+        property_reviews: text(single(document, sel.property_reviews)),
+        listing_verification: text(single(document, sel.listing_verification)),
+        lease_options: leaseOptions.length ? leaseOptions : [NA],
+        year_built_text: text(single(document, sel.year_built_container)),
+        units,
+    };
+}
+"""
+
+MAX_UNIT_CARDS = 30
+
+
+def parse_year_built(year_built_text: str) -> str:
+    """Extracts the year from a 'Built in YYYY' label."""
+    if "Built in" in year_built_text:
+        try:
+            return year_built_text.split('Built in ')[-1].split(' ')[0].strip()
+        except IndexError:
+            logger.warning(f"Could not parse year built from '{year_built_text}'")
+    return 'N/A'
+
+
+def pick_sqft(sqft_val: str, details_texts: List[str]) -> str:
+    """Falls back to the 'NNN Sq Ft' text in the unit details when the sqft column is empty."""
+    if sqft_val == "N/A":
+        for text in details_texts:
+            if "Sq Ft" in text:
+                return text.replace("Sq Ft", "").strip()
+    return sqft_val
+
+
+def clean_availability(availability_raw: str) -> str:
+    """Keeps the last line of the availability cell (drops screen-reader prefixes)."""
+    cleaned = availability_raw.split('\n')[-1]
+    return cleaned.strip() if cleaned else 'N/A'
+
+
 class DataExtractor:
-    def __init__(self, page: Page):
+    """
+    Extracts a property dict from a loaded detail page.
+
+    mode='evaluate' (default) reads everything with one page.evaluate call; mode='locator' uses
+    one Playwright locator call per field. Both return the same schema and values: a single-value
+    selector that matches several elements is 'N/A' in both, as Playwright's strict mode makes it.
+    """
+
+    def __init__(self, page: Page, mode: str = SCRAPER_CONFIG.get('EXTRACTION_MODE', 'evaluate')):
         self.page = page
+        self.mode = mode
 
-    async def extract_data(self) -> Dict:
-        """Extracts all apartment details from a single page."""
-        data = {
+    def _empty_data(self) -> Dict:
+        return {
             'property_link': self.page.url,
             'title': 'N/A', 'address': 'N/A', 'street': 'N/A',
             'city': 'N/A', 'state': 'N/A', 'zip_code': 'N/A',
@@ -44,6 +150,50 @@ class DataExtractor:
             'pricing_and_floor_plans': []
         }
 
+    @staticmethod
+    def _join_address(data: Dict) -> str:
+        return ", ".join(
+            filter(lambda x: x != 'N/A', [data['street'], data['city'], data['state'], data['zip_code']])).strip()
+
+    async def extract_data(self) -> Dict:
+        """Extracts all apartment details from a single page."""
+        if self.mode == 'locator':
+            return await self.extract_data_with_locators()
+        return await self.extract_data_with_evaluate()
+
+    async def extract_data_with_evaluate(self) -> Dict:
+        """Single-round-trip extraction: one page.evaluate returns the property and all unit cards."""
+        data = self._empty_data()
+        raw = await self.page.evaluate(EXTRACTION_SCRIPT, {'sel': APARTMENT_SELECTORS, 'maxUnits': MAX_UNIT_CARDS})
+        if raw is None:
+            logger.warning("Standard title not found. Skipping detailed extraction.")
+            return data
+
+        for field in ('title', 'street', 'state', 'zip_code', 'city',
+                      'property_reviews', 'listing_verification', 'lease_options'):
+            data[field] = raw[field]
+        data['address'] = self._join_address(data)
+        data['year_built'] = parse_year_built(raw['year_built_text'])
+        data['pricing_and_floor_plans'] = [
+            {
+                'apartment_name': unit['apartment_name'],
+                'rent_price_range': unit['rent_price_range'],
+                'bedrooms': unit['bedrooms'],
+                'bathrooms': unit['bathrooms'],
+                'sqft': pick_sqft(unit['sqft'], unit['sqft_details']),
+                'unit': unit['unit'],
+                'base_rent': unit['base_rent'],
+                'availability': clean_availability(unit['availability']),
+                'details_link': unit['details_link'],
+            }
+            for unit in raw['units']
+        ]
+        return data
+
+    async def extract_data_with_locators(self) -> Dict:
+        """Per-locator extraction: one Playwright round trip per field."""
+        data = self._empty_data()
+
         # Check if it's a standard page before proceeding
         if not await self.page.locator(APARTMENT_SELECTORS['title']).count():
             logger.warning("Standard title not found. Skipping detailed extraction.")
@@ -59,8 +209,7 @@ class DataExtractor:
         data['zip_code'] = await safe_inner_text(state_zip_locator.locator('span').nth(1))
         data['city'] = await safe_inner_text(self.page.locator(APARTMENT_SELECTORS['city_span']))
 
-        data['address'] = ", ".join(
-            filter(lambda x: x != 'N/A', [data['street'], data['city'], data['state'], data['zip_code']])).strip()
+        data['address'] = self._join_address(data)
 
         data['property_reviews'] = await safe_inner_text(self.page.locator(APARTMENT_SELECTORS['property_reviews']))
         data['listing_verification'] = await safe_inner_text(
@@ -89,20 +238,14 @@ class DataExtractor:
 
     async def _extract_year_built(self, selector: str) -> str:
         """Extracts the year built using a specific pattern."""
-        year_built_text = await safe_inner_text(self.page.locator(selector))
-        if "Built in" in year_built_text:
-            try:
-                return year_built_text.split('Built in ')[-1].split(' ')[0].strip()
-            except IndexError:
-                logger.warning(f"Could not parse year built from '{year_built_text}'")
-        return 'N/A'
+        return parse_year_built(await safe_inner_text(self.page.locator(selector)))
 
     async def _extract_floor_plans(self) -> List[Dict]:
         """Extracts floor plan details from all unit cards."""
         all_units_data = []
         unit_cards_locators = self.page.locator(APARTMENT_SELECTORS['unit_cards'])
         unit_cards_count = await unit_cards_locators.count()
-        limit = min(unit_cards_count, 30)
+        limit = min(unit_cards_count, MAX_UNIT_CARDS)
 
         for i in range(limit):
             unit_card = unit_cards_locators.nth(i)
@@ -133,6 +276,4 @@ class DataExtractor:
 
     async def _extract_availability(self, unit_card) -> str:
         """Extracts and cleans availability data."""
-        availability_raw = await safe_inner_text(unit_card.locator(APARTMENT_SELECTORS['availability']))
-        cleaned = availability_raw.split('\n')[-1]
-        return cleaned.strip() if cleaned else 'N/A'
\ No newline at end of file
+        return clean_availability(await safe_inner_text(unit_card.locator(APARTMENT_SELECTORS['availability'])))
@@ -0,0 +1,55 @@
+# extraction_benchmark.py
+# Compares per-locator and single-evaluate DataExtractor latency on live property pages.
+# Usage: python extraction_benchmark.py <property_url> [<property_url> ...] [--runs N]
+import argparse
+import asyncio
+import statistics
+import time
+
+from playwright.async_api import async_playwright
+
+from config import SCRAPER_CONFIG
+from data_extractor import DataExtractor
+from scraper import goto_with_retry
+
+
+def _schema(data: dict) -> tuple:
+    """Field names of a property and of its floor plans, used to check both modes agree."""
+    floor_plan_keys = tuple(sorted(data['pricing_and_floor_plans'][0])) if data['pricing_and_floor_plans'] else ()
+    return tuple(sorted(data)), floor_plan_keys
+
+
+async def benchmark(urls, runs: int):
+    async with async_playwright() as p:
+        browser = await p.firefox.launch(headless=SCRAPER_CONFIG['HEADLESS_MODE'])
+        page = await browser.new_page()
+        try:
+            for url in urls:
+                await goto_with_retry(page, url)
+                timings = {'locator': [], 'evaluate': []}
+                results = {}
+                for _ in range(runs):
+                    for mode in timings:
+                        start = time.perf_counter()
+                        results[mode] = await DataExtractor(page, mode=mode).extract_data()
+                        timings[mode].append(time.perf_counter() - start)
+
+                units = len(results['evaluate']['pricing_and_floor_plans'])
+                print(f"\n{url} ({units} unit cards, {runs} runs)")
+                for mode, samples in timings.items():
+                    print(f"  {mode:<9} median {statistics.median(samples) * 1000:8.1f} ms"
+                          f"   mean {statistics.mean(samples) * 1000:8.1f} ms")
+                speedup = statistics.median(timings['locator']) / statistics.median(timings['evaluate'])
+                print(f"  speedup   {speedup:.1f}x")
+                print(f"  schema match: {_schema(results['locator']) == _schema(results['evaluate'])}"
+                      f"   identical output: {results['locator'] == results['evaluate']}")
+        finally:
+            await browser.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark DataExtractor extraction modes.')
+    parser.add_argument('urls', nargs='+')
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args.urls, args.runs))
@@ -10,7 +10,7 @@ from metrics.metrics import (
     SCRAPER_SUCCESS, SCRAPER_FAILURES, LISTINGS_SCRAPED,
     SCRAPE_DURATION, MEMORY_USAGE, CPU_USAGE
 )
-from database_ops.db_ops import save_scraped_data_to_db
+from database_ops.copy_loader import copy_scraped_data_to_db
 from prometheus_client import start_http_server
 
 # Configure logging to be consistent across modules
@@ -72,7 +72,7 @@ async def run_scraper():
         if scraped_final_data:
             with open("apartments_data.json", "w", encoding="utf-8") as f:
                 json.dump(scraped_final_data, f, ensure_ascii=False, indent=4)
-            await save_scraped_data_to_db(scraped_final_data)
+            await copy_scraped_data_to_db(scraped_final_data)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,239 @@
+# rate_limiter.py
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+from config import SCRAPER_CONFIG
+from metrics.metrics import RATE_LIMIT_WAIT, RATE_LIMIT_RPS, RATE_LIMIT_PENALTIES
+
+logger = logging.getLogger(__name__)
+
+
+def _take_token(tokens: float, updated: float, rate: float, burst: float, now: float) -> Tuple[float, float]:
+    """
+    Refills a bucket up to `burst` and reserves one token, letting the balance go negative.
+    Returns the new balance and how long the caller must wait for its reserved token.
+    """
+    tokens = min(burst, tokens + max(now - updated, 0.0) * rate) - 1
+    return tokens, (-tokens / rate if tokens < 0 else 0.0)
+
+
+def _clamp(value: float, low: float, high: float) -> float:
+    return min(max(value, low), high)
+
+
+class MemoryBucketStore:
+    """Buckets held in this process only."""
+
+    def __init__(self):
+        self._buckets: Dict[str, list] = {}  # host -> [tokens, updated, rate]
+
+    async def reserve(self, host: str, default_rate: float, burst: float) -> Tuple[float, float]:
+        now = time.time()
+        bucket = self._buckets.setdefault(host, [burst, now, default_rate])
+        bucket[0], delay = _take_token(bucket[0], bucket[1], bucket[2], burst, now)
+        bucket[1] = now
+        return delay, bucket[2]
+
+    async def adjust_rate(self, host: str, default_rate: float, factor: float, step: float,
+                          min_rate: float, max_rate: float) -> float:
+        bucket = self._buckets.setdefault(host, [0.0, time.time(), default_rate])
+        bucket[2] = _clamp(bucket[2] * factor + step, min_rate, max_rate)
+        return bucket[2]
+
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file, shared by every process on the node that points at the same path."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets "
+            "(host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, rate REAL NOT NULL)"
+        )
+
+    async def reserve(self, host: str, default_rate: float, burst: float) -> Tuple[float, float]:
+        return await asyncio.to_thread(self._reserve, host, default_rate, burst)
+
+    async def adjust_rate(self, host: str, default_rate: float, factor: float, step: float,
+                          min_rate: float, max_rate: float) -> float:
+        return await asyncio.to_thread(self._adjust_rate, host, default_rate, factor, step, min_rate, max_rate)
+
+    def _reserve(self, host, default_rate, burst):
+        with self._transaction() as cursor:
+            now = time.time()
+            tokens, updated, rate = self._load(cursor, host, (burst, now, default_rate))
+            tokens, delay = _take_token(tokens, updated, rate, burst, now)
+            self._store(cursor, host, tokens, now, rate)
+        return delay, rate
+
+    def _adjust_rate(self, host, default_rate, factor, step, min_rate, max_rate):
+        with self._transaction() as cursor:
+            tokens, updated, rate = self._load(cursor, host, (0.0, time.time(), default_rate))
+            rate = _clamp(rate * factor + step, min_rate, max_rate)
+            self._store(cursor, host, tokens, updated, rate)
+        return rate
+
+    @contextmanager
+    def _transaction(self):
+        with self._lock:
+            cursor = self._conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")  # takes the write lock across processes
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                raise
+            cursor.execute("COMMIT")
+
+    @staticmethod
+    def _load(cursor, host, default):
+        row = cursor.execute("SELECT tokens, updated, rate FROM buckets WHERE host = ?", (host,)).fetchone()
+        return row or default
+
+    @staticmethod
+    def _store(cursor, host, tokens, updated, rate):
+        cursor.execute(
+            "INSERT INTO buckets (host, tokens, updated, rate) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(host) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, rate = excluded.rate",
+            (host, tokens, updated, rate),
+        )
+
+
+class RedisBucketStore:
+    """Buckets in Redis (or any server speaking its protocol and Lua), for a budget shared beyond one node."""
+
+    RESERVE_SCRIPT = """
+        local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated', 'rate')
+        local now, burst = tonumber(ARGV[1]), tonumber(ARGV[3])
+        local rate = tonumber(state[3]) or tonumber(ARGV[2])
+        local tokens = tonumber(state[1]) or burst
+        local updated = tonumber(state[2]) or now
+        tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate) - 1
+        redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now), 'rate', tostring(rate))
+        redis.call('EXPIRE', KEYS[1], 3600)
+        local delay = 0
+        if tokens < 0 then delay = -tokens / rate end
+        return {tostring(delay), tostring(rate)}
+    """
+
+    ADJUST_SCRIPT = """
+        local rate = tonumber(redis.call('HGET', KEYS[1], 'rate')) or tonumber(ARGV[1])
+        rate = math.min(math.max(rate * tonumber(ARGV[2]) + tonumber(ARGV[3]), tonumber(ARGV[4])), tonumber(ARGV[5]))
+        redis.call('HSET', KEYS[1], 'rate', tostring(rate))
+        return tostring(rate)
+    """
+
+    def __init__(self, url: str, prefix: str = "scraper:rate:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis rate limit backend needs the 'redis' package installed") from e
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+        self._reserve = self._client.register_script(self.RESERVE_SCRIPT)
+        self._adjust = self._client.register_script(self.ADJUST_SCRIPT)
+
+    async def reserve(self, host: str, default_rate: float, burst: float) -> Tuple[float, float]:
+        delay, rate = await self._reserve(keys=[self.prefix + host], args=[time.time(), default_rate, burst])
+        return float(delay), float(rate)
+
+    async def adjust_rate(self, host: str, default_rate: float, factor: float, step: float,
+                          min_rate: float, max_rate: float) -> float:
+        rate = await self._adjust(keys=[self.prefix + host], args=[default_rate, factor, step, min_rate, max_rate])
+        return float(rate)
+
+
+class HostRateLimiter:
+    """
+    Per-host token bucket for page navigations.
+
+    Each host starts at `requests_per_second` with room for `burst` back-to-back requests.
+    Callers reserve a token and sleep until it is due, so waiters are served in order without
+    polling. The rate is adaptive: every successful navigation adds `increase_step` (up to
+    `max_rps`), and a response that looks like throttling multiplies it by `decrease_factor`
+    (down to `min_rps`), so the limiter settles just under the rate the host tolerates.
+    """
+
+    def __init__(self, store, requests_per_second: float = 1.0, burst: float = 3,
+                 min_rps: float = 0.1, max_rps: float = 5.0, increase_step: float = 0.05,
+                 decrease_factor: float = 0.5):
+        self.store = store
+        self.requests_per_second = requests_per_second
+        self.burst = burst
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+
+    async def acquire(self, url: str) -> float:
+        """Waits for this URL's host to allow another request. Returns the time waited."""
+        host = urlparse(url).hostname or ''
+        try:
+            delay, rate = await self.store.reserve(host, self.requests_per_second, self.burst)
+        except Exception as e:
+            # Never let the limiter's own storage take the scraper down
+            logger.warning(f"Rate limiter unavailable for {host}, not throttling: {e}")
+            return 0.0
+        RATE_LIMIT_RPS.labels(host=host).set(rate)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        RATE_LIMIT_WAIT.labels(host=host).observe(delay)
+        return delay
+
+    async def reward(self, url: str):
+        await self._adjust(url, 1.0, self.increase_step)
+
+    async def penalize(self, url: str, reason: str):
+        host = urlparse(url).hostname or ''
+        RATE_LIMIT_PENALTIES.labels(host=host).inc()
+        rate = await self._adjust(url, self.decrease_factor, 0.0)
+        logger.warning(f"Throttling signal from {host} ({reason}); rate now {rate:.2f} req/s")
+
+    async def _adjust(self, url: str, factor: float, step: float) -> float:
+        host = urlparse(url).hostname or ''
+        try:
+            rate = await self.store.adjust_rate(host, self.requests_per_second, factor, step,
+                                                self.min_rps, self.max_rps)
+        except Exception as e:
+            logger.warning(f"Could not adjust rate for {host}: {e}")
+            return self.requests_per_second
+        RATE_LIMIT_RPS.labels(host=host).set(rate)
+        return rate
+
+
+_limiter: Optional[HostRateLimiter] = None
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """The process-wide limiter, built from SCRAPER_CONFIG['RATE_LIMIT'] on first use."""
+    global _limiter
+    if _limiter is None:
+        config = SCRAPER_CONFIG['RATE_LIMIT']
+        backend = os.getenv("RATE_LIMIT_BACKEND", config['BACKEND'])
+        if backend == 'redis':
+            store = RedisBucketStore(os.getenv("RATE_LIMIT_REDIS_URL", config['REDIS_URL']))
+        elif backend == 'sqlite':
+            store = SQLiteBucketStore(os.getenv("RATE_LIMIT_SQLITE_PATH", config['SQLITE_PATH']))
+        else:
+            store = MemoryBucketStore()
+        _limiter = HostRateLimiter(
+            store,
+            requests_per_second=config['REQUESTS_PER_SECOND'],
+            burst=config['BURST'],
+            min_rps=config['MIN_RPS'],
+            max_rps=config['MAX_RPS'],
+            increase_step=config['INCREASE_STEP'],
+            decrease_factor=config['DECREASE_FACTOR'],
+        )
+        logger.info(f"Per-host rate limiter using the {backend} backend at {config['REQUESTS_PER_SECOND']} req/s")
+    return _limiter
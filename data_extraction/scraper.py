@@ -2,13 +2,19 @@
 
 import asyncio
 import random
+import re
+import time
 import logging
+from urllib.parse import urljoin, urlparse
 from playwright.async_api import async_playwright, Page, Error as PlaywrightError
 from tenacity import retry, wait_fixed, stop_after_attempt, retry_if_exception_type
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 from config import SCRAPER_CONFIG, USER_AGENTS
 from data_extractor import DataExtractor
-from metrics.metrics import VALIDATION_FAILURES, VALIDATION_SUCCESS
+from context_pool import BrowserContextPool
+from rate_limiter import get_rate_limiter
+from selectors_utils import APARTMENT_SELECTORS
+from metrics.metrics import VALIDATION_FAILURES, VALIDATION_SUCCESS, PAGE_BYTES_TRANSFERRED, PAGE_LOAD_TIME
 import aiobotocore.session
 
 logger = logging.getLogger(__name__)
@@ -21,18 +27,49 @@ logger = logging.getLogger(__name__)
     retry=(retry_if_exception_type(PlaywrightError) | retry_if_exception_type(asyncio.TimeoutError)),
     reraise=True
 )
-async def goto_with_retry(page: Page, url: str, timeout: int = 60000):
-    """Attempts to navigate to a URL with robust retry logic."""
+async def goto_with_retry(page: Page, url: str, timeout: int = 60000, wait_until: str = "load"):
+    """Attempts to navigate to a URL with robust retry logic, paced by the per-host rate limiter."""
+    limiter = get_rate_limiter()
+    await limiter.acquire(url)
     logger.info(f"Attempting navigation to: {url}")
-    await page.goto(url, timeout=timeout, wait_until="load")
+    try:
+        response = await page.goto(url, timeout=timeout, wait_until=wait_until)
+    except PlaywrightError as e:
+        await limiter.penalize(url, type(e).__name__)
+        raise
+    if response is not None and response.status in SCRAPER_CONFIG['RATE_LIMIT']['THROTTLE_STATUSES']:
+        await limiter.penalize(url, f"HTTP {response.status}")
+    else:
+        await limiter.reward(url)
     logger.info(f"Successfully navigated to: {url}")
 
 
+def is_blocked_domain(url: str, blocked_domains: List[str]) -> bool:
+    """True if the URL's host is one of the blocked domains or a subdomain of one."""
+    host = urlparse(url).hostname or ''
+    return any(host == domain or host.endswith('.' + domain) for domain in blocked_domains)
+
+
+def track_transfer_sizes(page: Page) -> List[asyncio.Future]:
+    """Collects the transfer size of every finished request on a page (await them with gather)."""
+    size_futures = []
+    page.on("requestfinished", lambda request: size_futures.append(asyncio.ensure_future(request.sizes())))
+    return size_futures
+
+
+async def total_transferred_bytes(size_futures: List[asyncio.Future]) -> int:
+    total = 0
+    for sizes in await asyncio.gather(*size_futures, return_exceptions=True):
+        if isinstance(sizes, dict):
+            total += max(sizes.get('responseBodySize', 0), 0) + max(sizes.get('responseHeadersSize', 0), 0)
+    return total
+
+
 class ApartmentScraper:
     def __init__(self, playwright_instance):
         self.playwright = playwright_instance
         self.browser = None
-        self.context = None
+        self.context_pool = None
 
     async def __aenter__(self):
         """Context manager to manage browser lifecycle."""
@@ -40,88 +77,222 @@ class ApartmentScraper:
             headless=SCRAPER_CONFIG['HEADLESS_MODE'],
             args=["--disable-http2", "--disable-features=AutomationControlled", "--disable-web-security"]
         )
-        self.context = await self.browser.new_context(user_agent=random.choice(USER_AGENTS))
+        pool_config = SCRAPER_CONFIG['CONTEXT_POOL']
+        self.context_pool = await BrowserContextPool(
+            self.browser,
+            user_agents=random.sample(USER_AGENTS, len(USER_AGENTS)),
+            size=pool_config['SIZE'],
+            max_pages_per_context=pool_config['MAX_PAGES_PER_CONTEXT'],
+            memory_limit_mb=pool_config['BROWSER_MEMORY_LIMIT_MB'],
+            memory_check_interval=pool_config['MEMORY_CHECK_INTERVAL'],
+            setup_context=self._apply_page_profile,
+        ).start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Ensures the browser and context are closed."""
+        """Ensures the browser and its contexts are closed."""
+        if self.context_pool:
+            await self.context_pool.close()
         if self.browser:
             await self.browser.close()
 
+    @property
+    def profile_name(self) -> str:
+        return 'lightweight' if SCRAPER_CONFIG['PAGE_PROFILE']['BLOCK_REQUESTS'] else 'full'
+
+    async def _apply_page_profile(self, context):
+        """Installs request interception that aborts unneeded resource types and third-party domains."""
+        if SCRAPER_CONFIG['PAGE_PROFILE']['BLOCK_REQUESTS']:
+            await context.route("**/*", self._route_request)
+
+    async def _route_request(self, route):
+        profile = SCRAPER_CONFIG['PAGE_PROFILE']
+        request = route.request
+        if (request.resource_type in profile['BLOCKED_RESOURCE_TYPES']
+                or is_blocked_domain(request.url, profile['BLOCKED_DOMAINS'])):
+            await route.abort()
+        else:
+            await route.continue_()
+
     async def scrape_all_pages(self, main_url: str) -> List[str]:
         """Navigates pagination and collects all property URLs."""
 
         property_urls_set = []
         current_page_number = 1
-        page = await self.context.new_page()
-        try:
-            await goto_with_retry(page, main_url)
-            while True:
-                logger.info(f"Scraping page {current_page_number}...")
-                try:
-                    await page.wait_for_selector('a.property-link', timeout=SCRAPER_CONFIG['TIMEOUTS']['MAIN_PAGE'])
-                except PlaywrightError:
-                    logger.warning(f"No property links found on page {current_page_number}, ending pagination.")
-                    break
-                await page.wait_for_timeout(SCRAPER_CONFIG['DELAYS']['AFTER_PAGE_LOAD'])
-                property_links = page.locator('a.property-link')
-                count = await property_links.count()
-                for i in range(count):
-                    href = await property_links.nth(i).get_attribute('href')
-                    if href:
-                        if not href.startswith('http'):
-                            href = page.url.rstrip('/') + '/' + href.lstrip('/')
-                        property_urls_set.append(href)
-                next_page_button = page.locator('a.next')
-                if not await next_page_button.is_visible() or await next_page_button.is_disabled():
-                    logger.info("No more pages found. Ending pagination.")
-                    break
-                logger.info("Clicking the 'next' page button...")
-                await next_page_button.click()
-                await page.wait_for_selector('a.property-link', timeout=SCRAPER_CONFIG['TIMEOUTS']['NEXT_PAGE'])
-                current_page_number += 1
-                await page.wait_for_timeout(SCRAPER_CONFIG['DELAYS']['BETWEEN_CLICKS'])
-
-        except Exception as e:
-            logger.error(f"Error during multi-page scraping: {e}", exc_info=True)
-        finally:
-            if not page.is_closed():
-                await page.close()
+        async with self.context_pool.page() as page:
+            try:
+                await goto_with_retry(page, main_url)
+                while True:
+                    logger.info(f"Scraping page {current_page_number}...")
+                    try:
+                        await page.wait_for_selector('a.property-link', timeout=SCRAPER_CONFIG['TIMEOUTS']['MAIN_PAGE'])
+                    except PlaywrightError:
+                        logger.warning(f"No property links found on page {current_page_number}, ending pagination.")
+                        break
+                    await page.wait_for_timeout(SCRAPER_CONFIG['DELAYS']['AFTER_PAGE_LOAD'])
+                    property_links = page.locator('a.property-link')
+                    count = await property_links.count()
+                    for i in range(count):
+                        href = await property_links.nth(i).get_attribute('href')
+                        if href:
+                            if not href.startswith('http'):
+                                href = page.url.rstrip('/') + '/' + href.lstrip('/')
+                            property_urls_set.append(href)
+                    next_page_button = page.locator('a.next')
+                    if not await next_page_button.is_visible() or await next_page_button.is_disabled():
+                        logger.info("No more pages found. Ending pagination.")
+                        break
+                    logger.info("Clicking the 'next' page button...")
+                    await get_rate_limiter().acquire(page.url)
+                    await next_page_button.click()
+                    await page.wait_for_selector('a.property-link', timeout=SCRAPER_CONFIG['TIMEOUTS']['NEXT_PAGE'])
+                    current_page_number += 1
+                    await page.wait_for_timeout(SCRAPER_CONFIG['DELAYS']['BETWEEN_CLICKS'])
+
+            except Exception as e:
+                logger.error(f"Error during multi-page scraping: {e}", exc_info=True)
 
-        if not page.is_closed():
-            await page.close()
         logger.info(f"Scraping complete. Extracted {len(property_urls_set)} unique property URLs.")
         return list(property_urls_set)
 
 
+    async def discover_property_urls(self, main_url: str) -> AsyncIterator[str]:
+        """
+        Discovery mode: reads the page count and page URL pattern from the first results page,
+        then fetches the remaining pages concurrently over a pool of up to MAX_CONCURRENT_PAGES
+        pages. URLs are yielded as soon as each results page is parsed, so callers can start
+        enqueueing before discovery finishes. Falls back to scrape_all_pages when the
+        pagination cannot be worked out.
+        """
+        pagination = SCRAPER_CONFIG['PAGINATION']
+        async with self.context_pool.page() as page:
+            try:
+                await goto_with_retry(page, main_url)
+                await page.wait_for_selector(pagination['PROPERTY_LINK_SELECTOR'], timeout=SCRAPER_CONFIG['TIMEOUTS']['MAIN_PAGE'])
+                first_page_urls = await self._extract_property_links(page)
+                total_pages = await self._read_total_pages(page)
+                page_url_template = await self._read_page_url_template(page, main_url)
+            except Exception as e:
+                logger.error(f"Could not load the first results page: {e}", exc_info=True)
+                return
+
+        if total_pages is None or page_url_template is None:
+            logger.warning("Pagination pattern not found — falling back to serial pagination.")
+            for url in await self.scrape_all_pages(main_url):
+                yield url
+            return
+
+        for url in first_page_urls:
+            yield url
+
+        max_pages = pagination['MAX_PAGES']
+        if max_pages is not None and total_pages > max_pages:
+            logger.warning(f"Site reports {total_pages} result pages; crawling only the first {max_pages} (PAGINATION['MAX_PAGES']).")
+            total_pages = max_pages
+        logger.info(f"Discovered {total_pages} result pages — crawling the rest concurrently.")
+        if total_pages < 2:
+            return
+
+        page_numbers: asyncio.Queue = asyncio.Queue()
+        for page_number in range(2, total_pages + 1):
+            page_numbers.put_nowait(page_number)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def _crawl_pages():
+            try:
+                # Acquire the page inside the try: a worker that fails to get one must still post its sentinel
+                async with self.context_pool.page() as worker_page:
+                    while not page_numbers.empty():
+                        page_number = page_numbers.get_nowait()
+                        try:
+                            await goto_with_retry(worker_page, page_url_template.format(page=page_number))
+                            await worker_page.wait_for_selector(
+                                pagination['PROPERTY_LINK_SELECTOR'], timeout=SCRAPER_CONFIG['TIMEOUTS']['NEXT_PAGE'])
+                            await results.put(await self._extract_property_links(worker_page))
+                        except Exception as e:
+                            logger.error(f"Failed to crawl results page {page_number}: {e}")
+            finally:
+                await results.put(None)  # one sentinel per worker
+
+        worker_count = min(SCRAPER_CONFIG['MAX_CONCURRENT_PAGES'], total_pages - 1)
+        workers = [asyncio.create_task(_crawl_pages()) for _ in range(worker_count)]
+        try:
+            finished = 0
+            while finished < worker_count:
+                page_urls = await results.get()
+                if page_urls is None:
+                    finished += 1
+                    continue
+                for url in page_urls:
+                    yield url
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _extract_property_links(self, page: Page) -> List[str]:
+        """Pulls every property link on a results page in a single round trip."""
+        return await page.eval_on_selector_all(
+            SCRAPER_CONFIG['PAGINATION']['PROPERTY_LINK_SELECTOR'],
+            "links => links.map(a => a.href).filter(Boolean)"
+        )
+
+    async def _read_total_pages(self, page: Page) -> Optional[int]:
+        """Reads the page count from the 'Page 1 of N' label; None if it is missing."""
+        page_range = page.locator(SCRAPER_CONFIG['PAGINATION']['PAGE_RANGE_SELECTOR'])
+        if not await page_range.count():
+            return None
+        match = re.search(r'of\s+(\d+)', await page_range.first.inner_text())
+        return int(match.group(1)) if match else None
+
+    async def _read_page_url_template(self, page: Page, main_url: str) -> Optional[str]:
+        """Derives a '{page}' URL template from the 'next' link (e.g. .../boston-ma/2/)."""
+        next_link = page.locator(SCRAPER_CONFIG['PAGINATION']['NEXT_PAGE_SELECTOR'])
+        next_href = await next_link.first.get_attribute('href') if await next_link.count() else None
+        if next_href:
+            next_href = urljoin(page.url, next_href)
+            if re.search(r'/2/?(\?|$)', next_href):
+                return re.sub(r'/2(/?)(\?|$)', r'/{page}\1\2', next_href, count=1)
+            return None
+        return main_url.rstrip('/') + '/{page}/'
+
     async def scrape_single_property_page(self, url: str) -> Dict:
         """
         New method to scrape a single property page.
         This is the core, reusable consumer logic.
         """
-        page = await self.context.new_page()
-        try:
-            logger.info(f"Starting detail scrape for URL: {url}")
-            await goto_with_retry(page, url)
+        profile = SCRAPER_CONFIG['PAGE_PROFILE']
+        async with self.context_pool.page() as page:
+            size_futures = track_transfer_sizes(page)
+            try:
+                logger.info(f"Starting detail scrape for URL: {url}")
+                load_start = time.perf_counter()
+                if profile['BLOCK_REQUESTS']:
+                    await goto_with_retry(page, url, wait_until=profile['WAIT_UNTIL'])
+                    try:
+                        await page.wait_for_selector(APARTMENT_SELECTORS['title'], timeout=profile['READY_TIMEOUT'])
+                    except PlaywrightError:
+                        logger.warning(f"Title selector not found on {url}; extracting whatever loaded.")
+                else:
+                    await goto_with_retry(page, url)
+                PAGE_LOAD_TIME.labels(profile=self.profile_name).observe(time.perf_counter() - load_start)
 
-            extractor = DataExtractor(page)
-            scraped_data = await extractor.extract_data()
+                extractor = DataExtractor(page)
+                scraped_data = await extractor.extract_data()
 
-            if scraped_data.get('address') == 'N/A':
-                scraped_data['validation_status'] = 'Failed: Critical Data Missing'
-                VALIDATION_FAILURES.labels(source=SCRAPER_CONFIG['MAIN_URL']).inc()
-            else:
-                scraped_data['validation_status'] = 'Success'
-                VALIDATION_SUCCESS.labels(source=SCRAPER_CONFIG['MAIN_URL']).inc()
+                if scraped_data.get('address') == 'N/A':
+                    scraped_data['validation_status'] = 'Failed: Critical Data Missing'
+                    VALIDATION_FAILURES.labels(source=SCRAPER_CONFIG['MAIN_URL']).inc()
+                else:
+                    scraped_data['validation_status'] = 'Success'
+                    VALIDATION_SUCCESS.labels(source=SCRAPER_CONFIG['MAIN_URL']).inc()
 
-            logger.info(f"Finished detail scrape for URL: {url} with status: {scraped_data['validation_status']}")
+                logger.info(f"Finished detail scrape for URL: {url} with status: {scraped_data['validation_status']}")
 
-            return scraped_data
+                return scraped_data
 
-        except Exception as e:
-            logger.error(f"Error scraping URL {url}: {e}", exc_info=True)
-            return {'property_link': url, 'validation_status': 'Failed: Exception'}
-        finally:
-            if not page.is_closed():
-                await page.close()
-            # This sleep is now managed by the consumer polling loop
\ No newline at end of file
+            except Exception as e:
+                logger.error(f"Error scraping URL {url}: {e}", exc_info=True)
+                return {'property_link': url, 'validation_status': 'Failed: Exception'}
+            finally:
+                PAGE_BYTES_TRANSFERRED.labels(profile=self.profile_name).observe(await total_transferred_bytes(size_futures))
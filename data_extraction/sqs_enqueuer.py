@@ -0,0 +1,140 @@
+# sqs_enqueuer.py
+import asyncio
+import logging
+import os
+from typing import List, Optional, Set
+
+from metrics.metrics import PRODUCER_URLS_SENT, PRODUCER_URLS_FAILED, PRODUCER_URLS_DEDUPED, FRESHNESS_SKIPS
+
+logger = logging.getLogger(__name__)
+
+SQS_MAX_BATCH_ENTRIES = 10  # hard limit of send_message_batch
+
+
+class BatchedSQSEnqueuer:
+    """
+    Sends URLs to SQS with send_message_batch, 10 per call.
+
+    URLs are deduplicated before sending. At most `max_in_flight_batches` batches are in flight
+    at once; submit() waits when that limit is hit. Entries that come back in `Failed`, or whose
+    whole call raised, are retried with exponential backoff. Entries SQS flags as sender faults
+    are not retried.
+
+    With a `freshness` cache, each batch is checked against it as it is dispatched and listings
+    stored within their TTL are skipped rather than sent. With a `limit`, at most that many URLs
+    are sent; skipped URLs do not count towards it, and `full` tells the caller to stop submitting.
+    """
+
+    def __init__(self, sqs_client, queue_url: str, max_in_flight_batches: int = 5,
+                 max_retries: int = 3, retry_backoff: float = 1.0, freshness=None, limit: Optional[int] = None):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.freshness = freshness  # optional FreshnessCache
+        self.limit = limit
+        self.skipped = 0
+        self.queued = 0  # URLs handed to a send: sent, in flight, or given up on after retries
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._seen: Set[str] = set()
+        self._pending: List[str] = []
+        self._slots = asyncio.Semaphore(max(max_in_flight_batches, 1))
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @property
+    def submitted(self) -> int:
+        """Number of unique URLs accepted so far, including those later skipped as fresh."""
+        return len(self._seen)
+
+    @property
+    def full(self) -> bool:
+        """True once `limit` URLs have been queued for sending."""
+        return self.limit is not None and self.queued >= self.limit
+
+    async def submit(self, url: str):
+        """Queues a URL for sending, dropping it if it was already submitted."""
+        if url in self._seen:
+            PRODUCER_URLS_DEDUPED.inc()
+            return
+        self._seen.add(url)
+        self._pending.append(url)
+        if len(self._pending) >= SQS_MAX_BATCH_ENTRIES:
+            await self._dispatch()
+
+    async def close(self):
+        """Sends any partial batch and waits for every in-flight batch to settle."""
+        if self._pending:
+            await self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _dispatch(self):
+        batch, self._pending = self._pending, []
+        if self.freshness:
+            fresh = await self.freshness.fresh_links(batch)
+            if fresh:
+                self.skipped += len(fresh)
+                FRESHNESS_SKIPS.labels(stage="enqueue").inc(len(fresh))
+                batch = [url for url in batch if url not in fresh]
+        if self.limit is not None:
+            batch = batch[:max(self.limit - self.queued, 0)]
+        if not batch:
+            return
+        self.queued += len(batch)
+        await self._slots.acquire()  # backpressure: bounded number of batches in flight
+        task = asyncio.create_task(self._send_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._on_batch_done)
+
+    def _on_batch_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        self._slots.release()
+
+    async def _send_batch(self, batch: List[str]):
+        remaining = {str(i): url for i, url in enumerate(batch)}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            try:
+                resp = await self.sqs_client.send_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{"Id": entry_id, "MessageBody": url} for entry_id, url in remaining.items()],
+                )
+            except Exception as e:
+                logger.warning(f"send_message_batch failed for {len(remaining)} URLs (attempt {attempt + 1}): {e}")
+                continue
+
+            successful = resp.get("Successful", [])
+            PRODUCER_URLS_SENT.inc(len(successful))
+            for entry in successful:
+                remaining.pop(entry["Id"], None)
+
+            for failed in resp.get("Failed", []):
+                if failed.get("SenderFault"):
+                    url = remaining.pop(failed["Id"], None)
+                    PRODUCER_URLS_FAILED.inc()
+                    logger.error(f"SQS rejected {url} ({failed.get('Code')}): {failed.get('Message')}")
+
+            if not remaining:
+                return
+
+        PRODUCER_URLS_FAILED.inc(len(remaining))
+        logger.error(f"Giving up on {len(remaining)} URLs after {self.max_retries + 1} attempts: {list(remaining.values())}")
+
+
+def freshness_cache_from_env():
+    """
+    A FreshnessCache when the producer has DATABASE_URL, else None (every URL is enqueued).
+    Imported lazily: database_ops needs DATABASE_URL at import, and the producer runs without one.
+    """
+    if not os.getenv("DATABASE_URL"):
+        logger.info("DATABASE_URL is not set; enqueuing without the freshness check.")
+        return None
+    from database_ops.freshness import FreshnessCache
+    return FreshnessCache()
@@ -0,0 +1,171 @@
+# supervisor.py
+"""
+Runs N consumer processes, each with its own browser and ApartmentScraper, and serves their
+combined Prometheus metrics on PROMETHEUS_PORT.
+
+    python -m data_extraction.supervisor        # CONSUMER_WORKERS defaults to the CPU count
+"""
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import tempfile
+import time
+
+
+def reset_metrics_dir(path: str):
+    """Removes value files left behind by a previous run so counters start from zero."""
+    os.makedirs(path, exist_ok=True)
+    for name in os.listdir(path):
+        if name.endswith(".db"):
+            os.remove(os.path.join(path, name))
+
+
+# prometheus_client picks its storage backend at import time, so multiprocess mode has to be
+# switched on (and the directory emptied) before anything, including metrics.metrics, imports it.
+# Spawned workers inherit the variable and re-import this module, but must not clear the directory.
+OWNS_METRICS_DIR = "PROMETHEUS_MULTIPROC_DIR" not in os.environ
+if OWNS_METRICS_DIR:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="consumer-metrics-")
+elif multiprocessing.current_process().name == "MainProcess":
+    reset_metrics_dir(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+import asyncio
+
+from dotenv import load_dotenv
+from prometheus_client import CollectorRegistry, multiprocess, start_http_server
+
+from config import PROMETHEUS_PORT
+from metrics.metrics import CONSUMER_WORKER_RESTARTS
+from logging_config import setup_logging
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# Tuning knobs (env overrideable)
+WORKERS = int(os.getenv("CONSUMER_WORKERS", str(os.cpu_count() or 1)))
+RESTART_BACKOFF = float(os.getenv("CONSUMER_RESTART_BACKOFF", "1"))  # seconds, doubled per consecutive crash
+RESTART_BACKOFF_MAX = float(os.getenv("CONSUMER_RESTART_BACKOFF_MAX", "60"))
+STABLE_AFTER = float(os.getenv("CONSUMER_STABLE_AFTER", "60"))  # a worker alive this long resets its backoff
+SHUTDOWN_GRACE = float(os.getenv("CONSUMER_SHUTDOWN_GRACE", "120"))  # seconds to drain before SIGKILL
+MONITOR_INTERVAL = 0.5
+
+
+def run_worker(slot: int):
+    """Process entry point: one event loop, one browser, one SQS pipeline."""
+    from data_extraction import consumer
+
+    logger.info(f"Consumer worker {slot} starting (pid {os.getpid()}).")
+    asyncio.run(consumer.main())
+
+
+class ConsumerSupervisor:
+    """
+    Keeps `workers` consumer processes running.
+
+    A worker that exits while the supervisor is not stopping is restarted after an exponential
+    backoff (reset once a worker has stayed up for STABLE_AFTER seconds). SIGTERM/SIGINT are
+    forwarded to every worker as SIGTERM, which makes it stop receiving, finish in-flight pages
+    and flush its write buffer; workers still alive after SHUTDOWN_GRACE are killed.
+    """
+
+    def __init__(self, workers: int = WORKERS):
+        self.workers = max(workers, 1)
+        self.mp = multiprocessing.get_context("spawn")  # no forked Playwright/asyncio state
+        self.processes = {}
+        self.started_at = {}
+        self.failures = {slot: 0 for slot in range(self.workers)}
+        self.restart_at = {}
+        self.stopping = False
+
+    def run(self):
+        for s in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(s, lambda signum, _frame: self._request_stop(signal.Signals(signum).name))
+
+        for slot in range(self.workers):
+            self._start(slot)
+        logger.info(f"Supervisor started {self.workers} consumer workers.")
+
+        while not self.stopping:
+            self._reap_and_restart()
+            time.sleep(MONITOR_INTERVAL)
+
+        self._shutdown()
+
+    def _request_stop(self, signame: str):
+        if not self.stopping:
+            logger.info(f"Received {signame} — draining consumer workers...")
+        self.stopping = True
+
+    def _start(self, slot: int):
+        process = self.mp.Process(target=run_worker, args=(slot,), name=f"consumer-{slot}")
+        process.start()
+        self.processes[slot] = process
+        self.started_at[slot] = time.monotonic()
+        self.restart_at.pop(slot, None)
+
+    def _reap_and_restart(self):
+        now = time.monotonic()
+        for slot in range(self.workers):
+            process = self.processes.get(slot)
+            if process is not None and not process.is_alive():
+                process.join()
+                multiprocess.mark_process_dead(process.pid)
+                self.processes[slot] = None
+
+                if now - self.started_at[slot] >= STABLE_AFTER:
+                    self.failures[slot] = 0
+                delay = min(RESTART_BACKOFF * 2 ** self.failures[slot], RESTART_BACKOFF_MAX)
+                self.failures[slot] += 1
+                self.restart_at[slot] = now + delay
+                CONSUMER_WORKER_RESTARTS.labels(reason="crash" if process.exitcode else "exit").inc()
+                logger.warning(
+                    f"Consumer worker {slot} (pid {process.pid}) exited with code {process.exitcode}; "
+                    f"restarting in {delay:.1f}s."
+                )
+
+            if self.processes.get(slot) is None and now >= self.restart_at.get(slot, now):
+                self._start(slot)
+
+    def _shutdown(self):
+        alive = [p for p in self.processes.values() if p is not None and p.is_alive()]
+        for process in alive:
+            try:
+                os.kill(process.pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + SHUTDOWN_GRACE
+        for process in alive:
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"Worker {process.name} did not drain within {SHUTDOWN_GRACE}s — killing it.")
+                process.kill()
+                process.join()
+
+        for process in self.processes.values():
+            if process is not None:
+                multiprocess.mark_process_dead(process.pid)
+        logger.info("All consumer workers stopped.")
+
+
+def main():
+    setup_logging()  # workers get theirs from the consumer module
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+    # Workers only write their values to metrics_dir; this endpoint merges them
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    start_http_server(PROMETHEUS_PORT, registry=registry)
+    logger.info(f"Prometheus multiprocess endpoint started on port {PROMETHEUS_PORT} ({metrics_dir})")
+
+    try:
+        ConsumerSupervisor().run()
+    finally:
+        if OWNS_METRICS_DIR:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
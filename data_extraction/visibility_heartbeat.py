@@ -0,0 +1,96 @@
+# visibility_heartbeat.py
+import asyncio
+import logging
+import time
+from typing import Dict, Tuple
+
+from metrics.metrics import SQS_VISIBILITY_EXTENSIONS, SQS_VISIBILITY_TRACKED
+
+logger = logging.getLogger(__name__)
+
+SQS_MAX_BATCH_ENTRIES = 10  # hard limit of change_message_visibility_batch
+
+
+class VisibilityHeartbeat:
+    """
+    Keeps in-flight SQS messages invisible while they are still being worked on.
+
+    Every tracked receipt handle whose visibility is about to lapse (within `extend_margin`
+    seconds) is pushed out by another `visibility_timeout` seconds with
+    change_message_visibility_batch. Tracking stops when the message is deleted or abandoned,
+    or once it has been held for `max_hold` seconds so a stuck scrape still ends up in the DLQ.
+    """
+
+    def __init__(self, sqs_client, queue_url: str, visibility_timeout: int = 60,
+                 extend_margin: float = 15.0, check_interval: float = 5.0, max_hold: float = 900.0):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.visibility_timeout = visibility_timeout
+        self.extend_margin = extend_margin
+        self.check_interval = check_interval
+        self.max_hold = max_hold
+        self._tracked: Dict[str, Tuple[float, float]] = {}  # receipt -> (received_at, visible_at)
+        self._task = None
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._heartbeat_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._tracked.clear()
+        SQS_VISIBILITY_TRACKED.set(0)
+
+    def track(self, receipt_handle: str):
+        """Starts tracking a message received with `visibility_timeout`."""
+        now = time.monotonic()
+        self._tracked[receipt_handle] = (now, now + self.visibility_timeout)
+        SQS_VISIBILITY_TRACKED.set(len(self._tracked))
+
+    def untrack(self, receipt_handle: str):
+        """Stops extending a message (deleted, released or abandoned)."""
+        self._tracked.pop(receipt_handle, None)
+        SQS_VISIBILITY_TRACKED.set(len(self._tracked))
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self._extend_due()
+            except Exception as e:
+                logger.exception(f"Visibility heartbeat failed: {e}")
+
+    async def _extend_due(self):
+        now = time.monotonic()
+        due = []
+        for receipt, (received_at, visible_at) in list(self._tracked.items()):
+            if now - received_at >= self.max_hold:
+                logger.warning("Message held past max_hold — no longer extending its visibility.")
+                self.untrack(receipt)
+            elif visible_at - now <= self.extend_margin:
+                due.append(receipt)
+
+        for i in range(0, len(due), SQS_MAX_BATCH_ENTRIES):
+            chunk = due[i:i + SQS_MAX_BATCH_ENTRIES]
+            resp = await self.sqs_client.change_message_visibility_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {"Id": str(n), "ReceiptHandle": receipt, "VisibilityTimeout": self.visibility_timeout}
+                    for n, receipt in enumerate(chunk)
+                ],
+            )
+            extended_at = time.monotonic()
+            for ok in resp.get("Successful", []):
+                receipt = chunk[int(ok["Id"])]
+                if receipt in self._tracked:  # may have been deleted while the call was in flight
+                    self._tracked[receipt] = (self._tracked[receipt][0], extended_at + self.visibility_timeout)
+            for failed in resp.get("Failed", []):
+                logger.warning(f"Could not extend visibility ({failed.get('Code')}): {failed.get('Message')}")
+                self.untrack(chunk[int(failed["Id"])])
+            SQS_VISIBILITY_EXTENSIONS.inc(len(resp.get("Successful", [])))
@@ -0,0 +1,123 @@
+# write_buffer.py
+import asyncio
+import logging
+from typing import Dict, List, Tuple
+
+from database_ops.db_ops import save_scraped_data_to_db
+
+logger = logging.getLogger(__name__)
+
+SQS_MAX_BATCH_ENTRIES = 10  # hard limit of delete_message_batch
+
+
+class WriteBuffer:
+    """
+    Write-behind buffer for the SQS consumer.
+
+    Successful scrapes are held in memory and flushed when either `max_records` are pending or
+    `max_delay` seconds have passed since the first pending record. A flush writes the whole batch
+    in one DB transaction and then deletes exactly the SQS messages whose rows were committed.
+    Messages are never deleted before their rows commit, so anything lost in between is simply
+    redelivered by SQS (at-least-once).
+    """
+
+    def __init__(self, sqs_client, queue_url: str, max_records: int = 50, max_delay: float = 2.0,
+                 heartbeat=None, freshness=None):
+        self.sqs_client = sqs_client
+        self.queue_url = queue_url
+        self.heartbeat = heartbeat  # optional VisibilityHeartbeat; settled receipts are untracked
+        self.freshness = freshness  # optional FreshnessCache; told about every committed link
+        self.max_records = max(max_records, 1)
+        self.max_delay = max_delay
+        self._pending: List[Tuple[str, Dict]] = []  # (receipt_handle, scraped_data)
+        self._acks: List[str] = []  # receipts to delete with no DB write
+        self._has_pending = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._timer_task = None
+
+    async def __aenter__(self):
+        self._timer_task = asyncio.create_task(self._flush_on_timer())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def add(self, receipt_handle: str, scraped_data: Dict):
+        """Queues a scraped record; flushes immediately once the size threshold is reached."""
+        self._pending.append((receipt_handle, scraped_data))
+        self._has_pending.set()
+        if len(self._pending) >= self.max_records:
+            await self.flush()
+
+    async def ack(self, receipt_handle: str):
+        """Queues a message for deletion with the next flush, without writing anything."""
+        self._acks.append(receipt_handle)
+        self._has_pending.set()
+        if len(self._acks) >= SQS_MAX_BATCH_ENTRIES:
+            await self.flush()
+
+    async def flush(self):
+        """Persists everything pending in one transaction, then batch-deletes the committed messages."""
+        async with self._flush_lock:
+            batch, self._pending = self._pending, []
+            acks, self._acks = self._acks, []
+            self._has_pending.clear()
+            if acks:
+                await self._delete_messages(acks)
+                if self.heartbeat:
+                    for receipt in acks:
+                        self.heartbeat.untrack(receipt)
+            if not batch:
+                return
+
+            try:
+                committed_links = set(await save_scraped_data_to_db([data for _, data in batch]))
+            except Exception as e:
+                logger.exception(f"Flush of {len(batch)} records failed; leaving messages for redelivery: {e}")
+                committed_links = set()
+
+            if self.freshness:
+                self.freshness.mark_scraped(committed_links)
+
+            receipts = [receipt for receipt, data in batch if data.get("property_link") in committed_links]
+            logger.info(f"Flushed {len(batch)} records — {len(receipts)} committed, deleting their messages.")
+            await self._delete_messages(receipts)
+
+            # Deleted or abandoned either way — stop extending their visibility
+            if self.heartbeat:
+                for receipt, _ in batch:
+                    self.heartbeat.untrack(receipt)
+
+    async def close(self):
+        """Stops the timer and drains whatever is still buffered."""
+        if self._timer_task:
+            self._timer_task.cancel()
+            try:
+                await self._timer_task
+            except asyncio.CancelledError:
+                pass
+            self._timer_task = None
+        await self.flush()
+
+    async def _flush_on_timer(self):
+        while True:
+            await self._has_pending.wait()
+            await asyncio.sleep(self.max_delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.exception(f"Timed flush failed: {e}")
+
+    async def _delete_messages(self, receipts: List[str]):
+        for i in range(0, len(receipts), SQS_MAX_BATCH_ENTRIES):
+            chunk = receipts[i:i + SQS_MAX_BATCH_ENTRIES]
+            try:
+                resp = await self.sqs_client.delete_message_batch(
+                    QueueUrl=self.queue_url,
+                    Entries=[{"Id": str(n), "ReceiptHandle": receipt} for n, receipt in enumerate(chunk)],
+                )
+            except Exception as e:
+                logger.exception(f"delete_message_batch failed for {len(chunk)} messages; they will be redelivered: {e}")
+                continue
+            for failed in resp.get("Failed", []):
+                logger.warning(f"Could not delete message {failed.get('Id')}: {failed.get('Message')}")
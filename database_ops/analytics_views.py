@@ -0,0 +1,124 @@
+"""
+Keeps the materialized analytics views (migration 0003) up to date.
+
+Every ingestion batch that changes listings sends NOTIFY property_data_changed on commit; the
+refresher waits ANALYTICS_REFRESH_DEBOUNCE_SECONDS so a burst of batches is absorbed by a single
+refresh, then runs REFRESH MATERIALIZED VIEW CONCURRENTLY (readers are never blocked) and
+records the time in analytics_refresh_state.
+
+It runs inside every API worker (fastAPI_app/main.py) or standalone:
+
+    python -m database_ops.analytics_views
+
+Only the process holding a session advisory lock refreshes; the others stand by and take over
+if its connection goes away.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import asyncpg
+from dotenv import load_dotenv
+
+from database_ops.events import ANALYTICS_REFRESHED_CHANNEL, DATA_CHANGED_CHANNEL, listen_dsn
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+ANALYTICS_VIEWS = ('mv_property_rent_summary', 'mv_city_rent_percentiles', 'mv_daily_new_listings')
+
+# Tuning knobs (env overrideable)
+REFRESH_DEBOUNCE_SECONDS = float(os.getenv("ANALYTICS_REFRESH_DEBOUNCE_SECONDS", "10"))
+# How often the leader checks for changes it was not notified about (e.g. while it was disconnected),
+# and how often standbys try to become leader
+REFRESH_CHECK_SECONDS = float(os.getenv("ANALYTICS_REFRESH_CHECK_SECONDS", "60"))
+REFRESH_LEADER_LOCK_KEY = 727002
+
+# Data newer than the last refresh. `timestamp` moves whenever a listing's content (floor plans included) changes.
+STALE_SQL = """
+    SELECT coalesce((SELECT refreshed_at FROM analytics_refresh_state WHERE id = 1), '-infinity')
+         < coalesce((SELECT max(timestamp) FROM property), '-infinity')
+"""
+
+RECORD_REFRESH_SQL = """
+    INSERT INTO analytics_refresh_state (id, refreshed_at, duration_seconds)
+    VALUES (1, timezone('utc', now()), $1)
+    ON CONFLICT (id) DO UPDATE SET refreshed_at = excluded.refreshed_at, duration_seconds = excluded.duration_seconds
+"""
+
+
+class AnalyticsViewRefresher:
+    """Debounced, single-leader REFRESH MATERIALIZED VIEW CONCURRENTLY driven by data-change notifications."""
+
+    def __init__(self, database_url: str, debounce_seconds: float = REFRESH_DEBOUNCE_SECONDS,
+                 check_seconds: float = REFRESH_CHECK_SECONDS):
+        self.dsn = listen_dsn(database_url)
+        self.debounce_seconds = debounce_seconds
+        self.check_seconds = check_seconds
+        self._dirty = asyncio.Event()
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                await conn.add_listener(DATA_CHANGED_CHANNEL, lambda *_: self._dirty.set())
+                backoff = 1.0
+                while not await conn.fetchval("SELECT pg_try_advisory_lock($1)", REFRESH_LEADER_LOCK_KEY):
+                    self._dirty.clear()  # the leader is handling it
+                    await asyncio.sleep(self.check_seconds)
+                logger.info("Analytics view refresher is the leader.")
+                await self._lead(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Analytics view refresher lost its connection ({e}); retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()  # releases the leader lock
+
+    async def _lead(self, conn: asyncpg.Connection):
+        if await conn.fetchval(STALE_SQL):
+            self._dirty.set()  # changes committed while nobody was leading
+        while True:
+            try:
+                await asyncio.wait_for(self._dirty.wait(), timeout=self.check_seconds)
+            except asyncio.TimeoutError:
+                if not await conn.fetchval(STALE_SQL):
+                    continue
+            await asyncio.sleep(self.debounce_seconds)  # let the rest of a burst of batches land
+            self._dirty.clear()
+            await self.refresh(conn)
+
+    async def refresh(self, conn: asyncpg.Connection):
+        """Refreshes every view in one transaction and announces it on ANALYTICS_REFRESHED_CHANNEL."""
+        start = time.perf_counter()
+        try:
+            async with conn.transaction():
+                for view in ANALYTICS_VIEWS:
+                    await conn.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}")
+                elapsed = time.perf_counter() - start
+                await conn.execute(RECORD_REFRESH_SQL, elapsed)
+                await conn.execute(f"SELECT pg_notify('{ANALYTICS_REFRESHED_CHANNEL}', '')")
+        except (asyncpg.PostgresConnectionError, ConnectionError):
+            raise
+        except Exception as e:
+            logger.error(f"Refreshing the analytics views failed: {e}", exc_info=True)
+            return
+        logger.info(f"Refreshed {len(ANALYTICS_VIEWS)} analytics views in {elapsed:.2f}s.")
+
+
+async def main():
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set. Please set it to your PostgreSQL database URL.")
+    await AnalyticsViewRefresher(database_url).run()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    asyncio.run(main())
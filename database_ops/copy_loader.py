@@ -0,0 +1,181 @@
+import logging
+import time
+from typing import List, Dict, Any
+
+from database_ops.db_ops import engine, prepare_batch, save_scraped_data_to_db, PROPERTY_UPSERT_COLUMNS
+from database_ops.events import notify_data_changed_sql
+from metrics.metrics import DB_ROWS_INGESTED, DB_INGEST_ROWS_PER_SECOND, DB_INSERT_FAILURES, DB_UNCHANGED_ROWS
+
+'''--- COPY-based ingestion for large scrape batches ---'''
+
+PROPERTY_STAGING_TABLE = "property_staging"
+FLOOR_PLAN_STAGING_TABLE = "pricing_and_floor_plans_staging"
+
+PROPERTY_COLUMNS = ('property_link',) + PROPERTY_UPSERT_COLUMNS
+FLOOR_PLAN_COLUMNS = (
+    'property_link', 'apartment_name', 'rent_price_range', 'bedrooms', 'bathrooms',
+    'sqft', 'unit', 'base_rent', 'availability', 'details_link',
+)
+
+# UNLOGGED: staging rows are throwaway, so skip WAL for them.
+CREATE_STAGING_TABLES_SQL = (
+    f"""
+    CREATE UNLOGGED TABLE IF NOT EXISTS {PROPERTY_STAGING_TABLE} (
+        property_link TEXT NOT NULL,
+        title TEXT,
+        address TEXT,
+        street TEXT,
+        city TEXT,
+        state TEXT,
+        zip_code TEXT,
+        property_reviews DOUBLE PRECISION,
+        listing_verification TEXT,
+        lease_option TEXT,
+        year_built INTEGER,
+        validation_status TEXT,
+        property_type TEXT,
+        timestamp TIMESTAMP WITHOUT TIME ZONE,
+        content_hash TEXT,
+        last_seen TIMESTAMP WITHOUT TIME ZONE
+    )
+    """,
+    # Staging tables created before content hashing existed
+    f"ALTER TABLE {PROPERTY_STAGING_TABLE} ADD COLUMN IF NOT EXISTS content_hash TEXT, "
+    "ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP WITHOUT TIME ZONE",
+    f"""
+    CREATE UNLOGGED TABLE IF NOT EXISTS {FLOOR_PLAN_STAGING_TABLE} (
+        property_link TEXT NOT NULL,
+        apartment_name TEXT,
+        rent_price_range TEXT,
+        bedrooms INTEGER,
+        bathrooms DOUBLE PRECISION,
+        sqft INTEGER,
+        unit TEXT,
+        base_rent DOUBLE PRECISION,
+        availability TEXT,
+        details_link TEXT
+    )
+    """,
+)
+
+# Unchanged listings (same content hash) only get last_seen bumped.
+TOUCH_UNCHANGED_PROPERTIES_SQL = f"""
+    UPDATE property p SET last_seen = s.last_seen
+    FROM {PROPERTY_STAGING_TABLE} s
+    WHERE p.property_link = s.property_link AND p.content_hash = s.content_hash
+    RETURNING p.property_link
+"""
+
+# New or changed listings; rows whose hash still matches are skipped by the WHERE clause.
+MERGE_PROPERTIES_SQL = f"""
+    INSERT INTO property ({', '.join(PROPERTY_COLUMNS)})
+    SELECT {', '.join(PROPERTY_COLUMNS)} FROM {PROPERTY_STAGING_TABLE}
+    ON CONFLICT (property_link) DO UPDATE SET
+        {', '.join(f'{column} = EXCLUDED.{column}' for column in PROPERTY_UPSERT_COLUMNS)}
+    WHERE property.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    RETURNING property_link
+"""
+
+# Floor plans of the changed listings ($1) are diffed as multisets: the n-th copy of an
+# identical row on each side pairs up and is left alone; only unpaired rows are deleted/inserted.
+_FLOOR_PLAN_DIFF_CTES = f"""
+    WITH changed AS (
+        SELECT id AS property_id, property_link FROM property WHERE property_link = ANY($1::text[])
+    ),
+    incoming AS (
+        SELECT c.property_id, {', '.join(f'f.{column}' for column in FLOOR_PLAN_COLUMNS[1:])},
+               row_number() OVER (PARTITION BY c.property_id, {', '.join(f'f.{column}' for column in FLOOR_PLAN_COLUMNS[1:])}) AS n
+        FROM {FLOOR_PLAN_STAGING_TABLE} f JOIN changed c ON c.property_link = f.property_link
+    ),
+    stored AS (
+        SELECT fp.id, fp.property_id, {', '.join(f'fp.{column}' for column in FLOOR_PLAN_COLUMNS[1:])},
+               row_number() OVER (PARTITION BY fp.property_id, {', '.join(f'fp.{column}' for column in FLOOR_PLAN_COLUMNS[1:])} ORDER BY fp.id) AS n
+        FROM pricing_and_floor_plans fp JOIN changed c ON c.property_id = fp.property_id
+    )
+"""
+_FLOOR_PLANS_PAIRED = " AND ".join(
+    ["i.property_id = s.property_id", "i.n = s.n"]
+    + [f"i.{column} IS NOT DISTINCT FROM s.{column}" for column in FLOOR_PLAN_COLUMNS[1:]]
+)
+
+DELETE_FLOOR_PLANS_SQL = _FLOOR_PLAN_DIFF_CTES + f"""
+    DELETE FROM pricing_and_floor_plans WHERE id IN (
+        SELECT s.id FROM stored s WHERE NOT EXISTS (SELECT 1 FROM incoming i WHERE {_FLOOR_PLANS_PAIRED})
+    )
+"""
+
+INSERT_FLOOR_PLANS_SQL = _FLOOR_PLAN_DIFF_CTES + f"""
+    INSERT INTO pricing_and_floor_plans (property_id, {', '.join(FLOOR_PLAN_COLUMNS[1:])})
+    SELECT i.property_id, {', '.join(f'i.{column}' for column in FLOOR_PLAN_COLUMNS[1:])}
+    FROM incoming i
+    WHERE NOT EXISTS (SELECT 1 FROM stored s WHERE {_FLOOR_PLANS_PAIRED})
+"""
+
+
+async def copy_scraped_data_to_db(scraped_data: List[Dict[str, Any]]) -> List[str]:
+    """
+    Streams a large batch into the unlogged staging tables with COPY and merges it into
+    `property` and `pricing_and_floor_plans` with set-based SQL in a single transaction.
+    Listings whose content hash is unchanged only get `last_seen` bumped, and floor plans of
+    changed listings are diffed so identical rows are not rewritten.
+    The staging tables are truncated inside the transaction, so concurrent loads serialize.
+    Falls back to save_scraped_data_to_db if the COPY path fails.
+    Returns the property_links whose rows were committed.
+    """
+    prepared = prepare_batch(scraped_data)
+    if not prepared:
+        return []
+
+    property_records = [tuple(row[column] for column in PROPERTY_COLUMNS) for row, _ in prepared]
+    floor_plan_records = [
+        (row['property_link'],) + tuple(fp_row[column] for column in FLOOR_PLAN_COLUMNS[1:])
+        for row, fp_rows in prepared
+        for fp_row in fp_rows
+    ]
+    logging.info(
+        f"COPY-loading {len(property_records)} properties and {len(floor_plan_records)} floor plans..."
+    )
+
+    start_time = time.perf_counter()
+    try:
+        async with engine.connect() as conn:
+            raw_conn = await conn.get_raw_connection()
+            pg_conn = raw_conn.driver_connection  # asyncpg.Connection
+
+            async with pg_conn.transaction():
+                for ddl in CREATE_STAGING_TABLES_SQL:
+                    await pg_conn.execute(ddl)
+                await pg_conn.execute(f"TRUNCATE {PROPERTY_STAGING_TABLE}, {FLOOR_PLAN_STAGING_TABLE}")
+
+                await pg_conn.copy_records_to_table(
+                    PROPERTY_STAGING_TABLE, records=property_records, columns=PROPERTY_COLUMNS
+                )
+                await pg_conn.copy_records_to_table(
+                    FLOOR_PLAN_STAGING_TABLE, records=floor_plan_records, columns=FLOOR_PLAN_COLUMNS
+                )
+
+                unchanged_links = [
+                    record['property_link'] for record in await pg_conn.fetch(TOUCH_UNCHANGED_PROPERTIES_SQL)
+                ]
+                changed_links = [record['property_link'] for record in await pg_conn.fetch(MERGE_PROPERTIES_SQL)]
+                await pg_conn.execute(DELETE_FLOOR_PLANS_SQL, changed_links)
+                await pg_conn.execute(INSERT_FLOOR_PLANS_SQL, changed_links)
+                if changed_links:
+                    await pg_conn.execute(notify_data_changed_sql(len(changed_links)))  # delivered on commit
+                committed_links = unchanged_links + changed_links
+    except Exception as e:
+        DB_INSERT_FAILURES.labels(table='property').inc()
+        logging.error(f"COPY ingestion failed ({e}); falling back to batched upserts.", exc_info=True)
+        return await save_scraped_data_to_db(scraped_data)
+
+    elapsed = max(time.perf_counter() - start_time, 1e-9)
+    DB_UNCHANGED_ROWS.labels(table='property').inc(len(unchanged_links))
+    for table, rows in (('property', len(property_records)), ('pricing_and_floor_plans', len(floor_plan_records))):
+        DB_ROWS_INGESTED.labels(table=table).inc(rows)
+        DB_INGEST_ROWS_PER_SECOND.labels(table=table).set(rows / elapsed)
+
+    logging.info(
+        f"COPY ingestion committed {len(committed_links)} properties in {elapsed:.2f}s "
+        f"({(len(property_records) + len(floor_plan_records)) / elapsed:.0f} rows/sec)."
+    )
+    return committed_links
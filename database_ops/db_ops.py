@@ -1,18 +1,25 @@
+import hashlib
 import json
 import logging
 from datetime import datetime, timezone
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Tuple
 import os
 import asyncio
 from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import insert, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
-from sqlmodel import SQLModel, create_engine, select
+from sqlmodel import create_engine, select, delete
 from dotenv import load_dotenv
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 
 '''---import your SQLModel models here for the tables---'''
 from database_ops.dbmodels import Property, Pricing_and_floor_plans
+from database_ops.events import notify_data_changed_sql
+from database_ops.migrate import upgrade_database
+from database_ops.normalization import frame_records, normalize_listings
+from metrics.metrics import DB_INSERT_FAILURES, DB_UNCHANGED_ROWS
 
 # Configure logging for database operations
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -43,151 +50,305 @@ async def get_session() -> AsyncSession:
 # --- Database Initialization ---
 async def create_db_and_tables():
     """
-    Asynchronously creates all tables defined in SQLModel.
+    Brings the schema up to date by applying pending Alembic migrations (database_ops/migrations).
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(SQLModel.metadata.create_all)
+    await upgrade_database(engine)
 
 
-# --- Helper Function for Parsing Scraped Numeric Values ---
-def parse_numeric_value(text: Any) -> Optional[float]:
-    """
-    Attempts to extract a numeric (float or int) value from a string.
-    Note: This is not an async function, as it is CPU-bound, not I/O-bound.
-    """
-    if text is None:
-        return None
-    if not isinstance(text, str):
-        try:
-            return float(text)
-        except (ValueError, TypeError):
-            return None
+# --- Row Preparation ---
+# Property columns refreshed when an existing listing is scraped again.
+PROPERTY_UPSERT_COLUMNS = (
+    'title', 'address', 'street', 'city', 'state', 'zip_code', 'property_reviews',
+    'listing_verification', 'lease_option', 'year_built', 'validation_status',
+    'property_type', 'timestamp', 'content_hash', 'last_seen',
+)
 
-    # Clean the string
-    clean_text = text.replace('Sq Ft', '').replace('Bed', '').replace('Bath', '').replace('+', '').strip()
-    clean_text = clean_text.replace('$', '').replace(',', '').replace('–', '-').strip()
+# Floor plan value columns, and the fields that identify "the same" floor plan across scrapes.
+FLOOR_PLAN_COLUMNS = (
+    'apartment_name', 'rent_price_range', 'bedrooms', 'bathrooms', 'sqft',
+    'unit', 'base_rent', 'availability', 'details_link',
+)
+FLOOR_PLAN_KEY = ('apartment_name', 'unit', 'details_link')
 
-    try:
-        if '-' in clean_text:
-            parts = clean_text.split('-')
-            if parts[0].strip().isdigit():
-                return float(parts[0].strip())
-        return float(clean_text)
-    except ValueError:
-        return None
+# Property columns that are bookkeeping rather than scraped content; left out of the fingerprint.
+UNHASHED_PROPERTY_COLUMNS = ('timestamp', 'last_seen', 'content_hash')
+
+# Rows per INSERT ... ON CONFLICT statement; keeps bind parameters well under the asyncpg limit.
+BULK_UPSERT_CHUNK_SIZE = int(os.getenv("BULK_UPSERT_CHUNK_SIZE", "1000"))
 
 
-# --- Data Saving Function ---
-async def save_scraped_data_to_db(scraped_data: List[Dict[str, Any]]):
+def compute_content_hash(property_row: Dict[str, Any], fp_rows: List[Dict[str, Any]]) -> str:
     """
-    Asynchronously saves a list of scraped property data to the database,
-    handling upsert logic.
+    Stable SHA-256 fingerprint of a listing's normalized content (parsed property columns plus
+    its floor plans in a canonical order), so an unchanged page hashes the same on every scrape.
     """
-    logging.info(f"Starting to save {len(scraped_data)} properties to the database...")
-    successful_writes=0
+    content = {
+        'property': {k: v for k, v in property_row.items() if k not in UNHASHED_PROPERTY_COLUMNS},
+        'floor_plans': sorted(json.dumps(fp_row, sort_keys=True, default=str) for fp_row in fp_rows),
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
 
-    async for session in get_session():
-        for prop_data in scraped_data:
-            property_link = prop_data.get('property_link')
-            if not property_link:
-                logging.warning(f"Skipping property due to missing property_link: {prop_data.get('title', 'N/A')}")
-                continue
 
-            # **CRITICAL CHANGE**: Convert the datetime to timezone-naive.
-            # We're getting the current time in UTC and then stripping the timezone info.
-            now_utc_naive = datetime.utcnow()
-
-            try:
+def diff_floor_plans(stored: List[Dict[str, Any]], incoming: List[Dict[str, Any]]
+                     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[int]]:
+    """
+    Matches freshly scraped floor plans to the stored ones (dicts with an `id`) by FLOOR_PLAN_KEY.
+    Returns (rows to insert, {'id', ...} rows to update in place, ids to delete); stored rows whose
+    values are identical appear in none of them.
+    """
+    by_key: Dict[tuple, List[Dict[str, Any]]] = {}
+    for row in stored:
+        by_key.setdefault(tuple(row[column] for column in FLOOR_PLAN_KEY), []).append(row)
+
+    inserts, updates = [], []
+    for fp_row in incoming:
+        candidates = by_key.get(tuple(fp_row[column] for column in FLOOR_PLAN_KEY))
+        if not candidates:
+            inserts.append(fp_row)
+            continue
+        # Prefer an identical stored row, so duplicates under one key don't cause needless updates
+        match = next(
+            (row for row in candidates if all(row[column] == fp_row[column] for column in FLOOR_PLAN_COLUMNS)),
+            candidates[0],
+        )
+        candidates.remove(match)
+        if any(match[column] != fp_row[column] for column in FLOOR_PLAN_COLUMNS):
+            updates.append({'id': match['id'], **fp_row})
+
+    delete_ids = [row['id'] for rows in by_key.values() for row in rows]
+    return inserts, updates, delete_ids
+
+
+def prepare_batch(scraped_data: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+    """
+    Parses a batch of scraped properties into (property_row, floor_plan_rows) pairs.
+    Runs before any transaction is opened. Listings without a property_link are dropped and
+    duplicate links keep their last occurrence, since ON CONFLICT cannot touch a row twice.
+    Numeric fields are parsed column-wise for the whole batch by normalize_listings.
+    """
+    listings = {}
+    for prop_data in scraped_data:
+        property_link = prop_data.get('property_link')
+        if not property_link:
+            logging.warning(f"Skipping property due to missing property_link: {prop_data.get('title', 'N/A')}")
+            continue
+        listings[property_link] = prop_data
+    if not listings:
+        return []
+
+    properties, floor_plans = normalize_listings(list(listings.values()))
+
+    # **CRITICAL CHANGE**: Convert the datetime to timezone-naive.
+    # We're getting the current time in UTC and then stripping the timezone info.
+    now_utc_naive = datetime.utcnow()
+    fp_rows_by_link: Dict[str, List[Dict[str, Any]]] = {}
+    for fp_row in frame_records(floor_plans[['property_link', *FLOOR_PLAN_COLUMNS]]):
+        fp_rows_by_link.setdefault(fp_row.pop('property_link'), []).append(fp_row)
+
+    prepared = []
+    property_columns = ['property_link', *(c for c in PROPERTY_UPSERT_COLUMNS if c not in UNHASHED_PROPERTY_COLUMNS)]
+    for property_row in frame_records(properties[property_columns]):
+        property_row['timestamp'] = now_utc_naive
+        property_row['last_seen'] = now_utc_naive
+        fp_rows = fp_rows_by_link.get(property_row['property_link'], [])
+        property_row['content_hash'] = compute_content_hash(property_row, fp_rows)
+        prepared.append((property_row, fp_rows))
+    return prepared
+
+
+def _chunks(items: List[Any], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# --- Data Saving Functions ---
+async def _bulk_upsert(session: AsyncSession, prepared: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> List[str]:
+    """
+    Set-based write path, per chunk and all inside a single transaction:
+    properties whose content hash is unchanged only get `last_seen` bumped; the rest go through
+    one INSERT ... ON CONFLICT (property_link) DO UPDATE ... RETURNING id, and their floor plans
+    are diffed against what is stored so only added, changed or removed rows are written.
+    Any failure aborts the whole batch.
+    """
+    committed_links = []
+    changed_properties = 0
+    for chunk in _chunks(prepared, BULK_UPSERT_CHUNK_SIZE):
+        stored_hashes = {
+            link: (property_id, content_hash)
+            for property_id, link, content_hash in (await session.exec(
+                select(Property.id, Property.property_link, Property.content_hash)
+                .where(Property.property_link.in_([property_row['property_link'] for property_row, _ in chunk]))
+            )).all()
+        }
+        unchanged, changed = [], []
+        for property_row, fp_rows in chunk:
+            stored = stored_hashes.get(property_row['property_link'])
+            if stored is not None and stored[1] == property_row['content_hash']:
+                unchanged.append((stored[0], property_row))
+            else:
+                changed.append((property_row, fp_rows))
+
+        if unchanged:
+            await session.exec(
+                update(Property)
+                .where(Property.id.in_([property_id for property_id, _ in unchanged]))
+                .values(last_seen=unchanged[0][1]['last_seen'])
+            )
+            DB_UNCHANGED_ROWS.labels(table='property').inc(len(unchanged))
+            committed_links.extend(property_row['property_link'] for _, property_row in unchanged)
+
+        if not changed:
+            continue
+
+        insert_stmt = pg_insert(Property).values([property_row for property_row, _ in changed])
+        upsert_stmt = insert_stmt.on_conflict_do_update(
+            index_elements=[Property.property_link],
+            set_={column: insert_stmt.excluded[column] for column in PROPERTY_UPSERT_COLUMNS},
+        ).returning(Property.id, Property.property_link)
+        link_to_id = {link: property_id for property_id, link in (await session.exec(upsert_stmt)).all()}
+
+        # Includes rows another writer may have inserted since the hash lookup above
+        stored_plans = await _load_floor_plans(session, list(link_to_id.values()))
+        inserts, updates, delete_ids = [], [], []
+        for property_row, fp_rows in changed:
+            property_id = link_to_id[property_row['property_link']]
+            to_insert, to_update, to_delete = diff_floor_plans(stored_plans.get(property_id, []), fp_rows)
+            inserts.extend({**fp_row, 'property_id': property_id} for fp_row in to_insert)
+            updates.extend(to_update)
+            delete_ids.extend(to_delete)
+
+        if delete_ids:
+            await session.exec(delete(Pricing_and_floor_plans).where(Pricing_and_floor_plans.id.in_(delete_ids)))
+        if updates:
+            await session.exec(update(Pricing_and_floor_plans), params=updates)  # bulk UPDATE by primary key
+        if inserts:
+            await session.exec(insert(Pricing_and_floor_plans), params=inserts)
+        unchanged_plans = sum(len(fp_rows) for _, fp_rows in changed) - len(inserts) - len(updates)
+        DB_UNCHANGED_ROWS.labels(table='pricing_and_floor_plans').inc(unchanged_plans)
+        committed_links.extend(link_to_id.keys())
+        changed_properties += len(link_to_id)
+
+    if changed_properties:
+        await session.exec(text(notify_data_changed_sql(changed_properties)))  # delivered on commit
+    await session.commit()
+    return committed_links
+
+
+async def _load_floor_plans(session: AsyncSession, property_ids: List[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Stored floor plans (id plus FLOOR_PLAN_COLUMNS) of the given properties, grouped by property_id."""
+    plans: Dict[int, List[Dict[str, Any]]] = {}
+    if not property_ids:
+        return plans
+    columns = [Pricing_and_floor_plans.id, Pricing_and_floor_plans.property_id] + [
+        getattr(Pricing_and_floor_plans, column) for column in FLOOR_PLAN_COLUMNS
+    ]
+    rows = await session.exec(select(*columns).where(Pricing_and_floor_plans.property_id.in_(property_ids)))
+    for row in rows.all():
+        row = dict(row._mapping)
+        plans.setdefault(row.pop('property_id'), []).append(row)
+    return plans
+
+
+async def _row_by_row_upsert(session: AsyncSession, prepared: List[Tuple[Dict[str, Any], List[Dict[str, Any]]]]) -> List[str]:
+    """
+    Fallback write path: each property is written inside its own SAVEPOINT so a bad row is
+    rolled back on its own, and the surviving rows are committed once at the end.
+    Uses the same content-hash and floor plan diff rules as the bulk path.
+    """
+    committed_links = []
+    changed_properties = 0
+    for property_row, fp_rows in prepared:
+        property_link = property_row['property_link']
+        try:
+            async with session.begin_nested():
                 existing_property = (await session.exec(
                     select(Property).where(Property.property_link == property_link))).first()
 
-                lease_options_str = json.dumps(prop_data['lease_options']) if isinstance(prop_data.get('lease_options'),
-                                                                                         list) else None
-                parsed_property_reviews = parse_numeric_value(prop_data.get('property_reviews'))
-                parsed_year_built = parse_numeric_value(prop_data.get('year_built'))
+                if existing_property and existing_property.content_hash == property_row['content_hash']:
+                    logging.info(f"Unchanged property, refreshing last_seen: {property_row.get('title', 'N/A')}")
+                    existing_property.last_seen = property_row['last_seen']
+                    session.add(existing_property)
+                    await session.flush()
+                    DB_UNCHANGED_ROWS.labels(table='property').inc()
+                    committed_links.append(property_link)
+                    continue
 
                 if existing_property:
-                    logging.info(f"Updating existing property: {prop_data.get('title', 'N/A')}")
-                    existing_property.title = prop_data.get('title')
-                    existing_property.address = prop_data.get('address')
-                    existing_property.street = prop_data.get('street')
-                    existing_property.city = prop_data.get('city')
-                    existing_property.state = prop_data.get('state')
-                    existing_property.zip_code = prop_data.get('zip_code')
-                    existing_property.property_reviews = parsed_property_reviews
-                    existing_property.listing_verification = prop_data.get('listing_verification')
-                    existing_property.lease_option = lease_options_str
-                    existing_property.year_built = parsed_year_built
-                    existing_property.validation_status = prop_data.get('validation_status', 'pending')
-                    existing_property.property_type = prop_data.get('property_type', 'apartment')
-
-                    # Update the timestamp with the new naive datetime
-                    existing_property.timestamp = now_utc_naive
-
+                    logging.info(f"Updating existing property: {property_row.get('title', 'N/A')}")
+                    for column in PROPERTY_UPSERT_COLUMNS:
+                        setattr(existing_property, column, property_row[column])
                     session.add(existing_property)
-                    from sqlmodel import delete
-                    delete_stmt=delete(Pricing_and_floor_plans).where(Pricing_and_floor_plans.property_id==existing_property.id)
-
-                    await session.exec(delete_stmt)
-                    await session.flush()
+                    stored_plans = (await session.exec(
+                        select(Pricing_and_floor_plans).where(Pricing_and_floor_plans.property_id == existing_property.id)
+                    )).all()
                 else:
-                    logging.info(f"Inserting new property: {prop_data.get('title', 'N/A')}")
-                    new_property = Property(
-                        property_link=property_link,
-                        title=prop_data.get('title'),
-                        address=prop_data.get('address'),
-                        street=prop_data.get('street'),
-                        city=prop_data.get('city'),
-                        state=prop_data.get('state'),
-                        zip_code=prop_data.get('zip_code'),
-                        property_reviews=parsed_property_reviews,
-                        listing_verification=prop_data.get('listing_verification'),
-                        lease_options=lease_options_str,
-                        year_built=parsed_year_built,
-                        validation_status=prop_data.get('validation_status', 'pending'),
-                        property_type=prop_data.get('property_type', 'apartment'),
-
-                        # Use the new naive datetime for the new property
-                        timestamp=now_utc_naive
-                    )
-                    session.add(new_property)
-                    await session.flush()
-                    existing_property = new_property
-
-                for fp_data in prop_data.get('pricing_and_floor_plans', []):
-                    parsed_bedrooms = parse_numeric_value(fp_data.get('bedrooms'))
-                    parsed_bathrooms = parse_numeric_value(fp_data.get('bathrooms'))
-                    parsed_sqft = parse_numeric_value(fp_data.get('sqft'))
-                    parsed_base_rent = parse_numeric_value(fp_data.get('base_rent'))
-
-                    new_floor_plan = Pricing_and_floor_plans(
-                        property=existing_property,
-                        apartment_name=fp_data.get('apartment_name'),
-                        rent_price_range=fp_data.get('rent_price_range'),
-                        bedrooms=parsed_bedrooms,
-                        bathrooms=parsed_bathrooms,
-                        sqft=parsed_sqft,
-                        unit=fp_data.get('unit'),
-                        base_rent=parsed_base_rent,
-                        availability=fp_data.get('availability'),
-                        details_link=fp_data.get('details_link'),
-
-                        # Use the new naive datetime for the floor plan
-                        timestamp=now_utc_naive
-                    )
-                    session.add(new_floor_plan)
-
-                await session.commit()
-                successful_writes+=1
-                logging.info(f"Successfully processed and committed property: {property_link}")
-
-
-            except IntegrityError as ie:
-                await session.rollback()
-                logging.error(f"Integrity Error for {property_link}: {ie}")
-            except Exception as e:
-                await session.rollback()
-                logging.error(f"Error saving property {property_link} to database: {e}", exc_info=True)
+                    logging.info(f"Inserting new property: {property_row.get('title', 'N/A')}")
+                    existing_property = Property(**property_row)
+                    session.add(existing_property)
+                    stored_plans = []
+                await session.flush()
+
+                plans_by_id = {plan.id: plan for plan in stored_plans}
+                to_insert, to_update, to_delete = diff_floor_plans(
+                    [{'id': plan.id, **{column: getattr(plan, column) for column in FLOOR_PLAN_COLUMNS}}
+                     for plan in stored_plans],
+                    fp_rows,
+                )
+                for plan_id in to_delete:
+                    await session.delete(plans_by_id[plan_id])
+                for values in to_update:
+                    plan = plans_by_id[values['id']]
+                    for column in FLOOR_PLAN_COLUMNS:
+                        setattr(plan, column, values[column])
+                    session.add(plan)
+                for fp_row in to_insert:
+                    session.add(Pricing_and_floor_plans(property_id=existing_property.id, **fp_row))
+                await session.flush()
+            committed_links.append(property_link)
+            changed_properties += 1
+
+        except IntegrityError as ie:
+            DB_INSERT_FAILURES.labels(table='property').inc()
+            logging.error(f"Integrity Error for {property_link}: {ie}")
+        except Exception as e:
+            DB_INSERT_FAILURES.labels(table='property').inc()
+            logging.error(f"Error saving property {property_link} to database: {e}", exc_info=True)
+
+    if changed_properties:
+        await session.exec(text(notify_data_changed_sql(changed_properties)))
+    await session.commit()
+    return committed_links
+
+
+async def save_scraped_data_to_db(scraped_data: List[Dict[str, Any]]) -> List[str]:
+    """
+    Asynchronously saves a list of scraped property data to the database, handling upsert logic.
+    The whole batch is written set-based in one transaction; if that fails, it is retried
+    row by row so a single bad listing cannot sink the rest.
+    Returns the property_links whose rows were committed.
+    """
+    logging.info(f"Starting to save {len(scraped_data)} properties to the database...")
+    prepared = prepare_batch(scraped_data)
+    if not prepared:
+        return []
+
+    async for session in get_session():
+        try:
+            committed_links = await _bulk_upsert(session, prepared)
+            logging.info(f"Bulk upsert committed {len(committed_links)} properties.")
+            return committed_links
+        except Exception as e:
+            await session.rollback()
+            logging.warning(f"Bulk upsert of {len(prepared)} properties failed ({e}); falling back to row-by-row writes.")
+
+        try:
+            committed_links = await _row_by_row_upsert(session, prepared)
+        except Exception as e:
+            await session.rollback()
+            logging.error(f"Row-by-row fallback failed to commit: {e}", exc_info=True)
+            return []
+        logging.info(f"Row-by-row fallback committed {len(committed_links)}/{len(prepared)} properties.")
+        return committed_links
 
 
 # Main execution block remains the same
@@ -0,0 +1,20 @@
+from sqlalchemy.engine import make_url
+
+'''--- Postgres NOTIFY channels announcing committed listing changes and analytics refreshes ---'''
+
+# The writers issue this inside their transaction, so listeners only hear about committed data;
+# the API drops its cached analytics responses when it fires (fastAPI_app/cache.py).
+DATA_CHANGED_CHANNEL = "property_data_changed"
+
+# Sent by database_ops/analytics_views.py after it refreshes the materialized analytics views
+ANALYTICS_REFRESHED_CHANNEL = "analytics_views_refreshed"
+
+
+def notify_data_changed_sql(changed_properties: int) -> str:
+    """SQL that queues a notification carrying the number of properties whose content changed."""
+    return f"SELECT pg_notify('{DATA_CHANGED_CHANNEL}', '{int(changed_properties)}')"
+
+
+def listen_dsn(database_url: str) -> str:
+    """Plain asyncpg DSN for a SQLAlchemy URL; LISTEN needs a dedicated connection outside the pool."""
+    return make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
@@ -0,0 +1,103 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlmodel import func, select
+
+from database_ops.db_ops import async_session_maker
+from database_ops.dbmodels import Property
+
+logger = logging.getLogger(__name__)
+
+'''--- Freshness checks: skip listings that were stored recently ---'''
+
+# Listings stored more recently than this are not scraped again; 0 disables the check
+FRESHNESS_TTL_SECONDS = float(os.getenv("FRESHNESS_TTL_SECONDS", str(24 * 3600)))
+FRESHNESS_CACHE_SECONDS = float(os.getenv("FRESHNESS_CACHE_SECONDS", "300"))  # how long a DB answer is reused
+FRESHNESS_CACHE_MAX_ENTRIES = int(os.getenv("FRESHNESS_CACHE_MAX_ENTRIES", "100000"))
+FRESHNESS_LOOKUP_CHUNK = 1000  # property_links per IN (...) query
+
+
+class FreshnessCache:
+    """
+    Answers "was this listing stored within the TTL?" for batches of property links.
+
+    Answers come from `property.last_seen` (or `timestamp` for rows written before it existed;
+    both naive UTC, as written by the ingest path) and are kept in a bounded in-memory LRU for
+    `cache_seconds`, so repeated checks for the same links cost one DB round trip per chunk of
+    misses. Links committed by this process are recorded directly with mark_scraped().
+    """
+
+    def __init__(self, ttl_seconds: float = FRESHNESS_TTL_SECONDS, cache_seconds: float = FRESHNESS_CACHE_SECONDS,
+                 max_entries: int = FRESHNESS_CACHE_MAX_ENTRIES):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.cache_seconds = cache_seconds
+        self.max_entries = max(max_entries, 1)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # link -> (stored_at or None, cached_at)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl.total_seconds() > 0
+
+    async def fresh_links(self, links: Iterable[str]) -> Set[str]:
+        """Returns the subset of `links` stored within the TTL."""
+        links = list(dict.fromkeys(links))
+        if not self.enabled or not links:
+            return set()
+
+        now = time.monotonic()
+        stored_at: Dict[str, Optional[datetime]] = {}
+        misses: List[str] = []
+        for link in links:
+            entry = self._entries.get(link)
+            if entry is not None and now - entry[1] < self.cache_seconds:
+                self._entries.move_to_end(link)
+                stored_at[link] = entry[0]
+            else:
+                misses.append(link)
+
+        if misses:
+            try:
+                found = await self._load(misses)
+            except Exception as e:
+                # Fail open: scraping something twice beats not scraping it
+                logger.warning(f"Freshness lookup failed for {len(misses)} links; treating them as stale: {e}")
+                found = None
+            if found is not None:
+                for link in misses:
+                    stored_at[link] = found.get(link)
+                    self._remember(link, found.get(link), now)
+
+        cutoff = datetime.utcnow() - self.ttl
+        return {link for link, ts in stored_at.items() if ts is not None and ts >= cutoff}
+
+    async def is_fresh(self, link: str) -> bool:
+        return link in await self.fresh_links([link])
+
+    def mark_scraped(self, links: Iterable[str], stored_at: Optional[datetime] = None):
+        """Records links this process has just committed, without asking the DB."""
+        stored_at = stored_at or datetime.utcnow()
+        now = time.monotonic()
+        for link in links:
+            self._remember(link, stored_at, now)
+
+    async def _load(self, links: List[str]) -> Dict[str, datetime]:
+        found: Dict[str, datetime] = {}
+        async with async_session_maker() as session:
+            for i in range(0, len(links), FRESHNESS_LOOKUP_CHUNK):
+                chunk = links[i:i + FRESHNESS_LOOKUP_CHUNK]
+                result = await session.exec(
+                    select(Property.property_link, func.coalesce(Property.last_seen, Property.timestamp))
+                    .where(Property.property_link.in_(chunk))
+                )
+                found.update({link: ts for link, ts in result.all()})
+        return found
+
+    def _remember(self, link: str, stored_at: Optional[datetime], now: float):
+        self._entries[link] = (stored_at, now)
+        self._entries.move_to_end(link)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,26 @@
+import logging
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+'''--- Schema migrations (Alembic), run on startup in place of SQLModel.metadata.create_all ---'''
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+
+def run_migrations(connection, revision: str = "head"):
+    """Upgrades the database behind an open (sync) connection to `revision`."""
+    config = Config(ALEMBIC_INI)
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+async def upgrade_database(engine: AsyncEngine, revision: str = "head"):
+    """Applies pending migrations through `engine`, in one transaction."""
+    async with engine.begin() as conn:
+        await conn.run_sync(run_migrations, revision)
+    logger.info(f"Database schema is at revision {revision}.")
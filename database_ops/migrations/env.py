@@ -0,0 +1,69 @@
+import asyncio
+import os
+
+from alembic import context
+from dotenv import load_dotenv
+from sqlalchemy import pool, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+
+'''--- Alembic environment: migrations for the tables in database_ops/dbmodels.py ---'''
+
+# The API keeps its own copy of the models (fastAPI_app/dbmodels.py) on the same SQLModel
+# metadata; importing the second copy into a process that already has one would redefine the tables.
+if 'property' not in SQLModel.metadata.tables:
+    import database_ops.dbmodels  # noqa: F401
+
+load_dotenv()
+target_metadata = SQLModel.metadata
+
+# Every API worker (gunicorn runs 4) upgrades on startup; this lock makes them take turns,
+# so the first one applies the migrations and the rest find the schema already at head.
+MIGRATION_LOCK_KEY = 727001
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    # Tables the models don't describe (the COPY loader's *_staging tables) are not managed here
+    return not (type_ == "table" and reflected and compare_to is None)
+
+
+def _configure(connection):
+    context.configure(connection=connection, target_metadata=target_metadata, compare_type=True,
+                      include_object=include_object)
+    with context.begin_transaction():
+        connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        context.run_migrations()
+
+
+async def run_async_migrations(url: str):
+    engine = create_async_engine(url, poolclass=pool.NullPool)
+    async with engine.connect() as connection:
+        await connection.run_sync(_configure)
+        await connection.commit()
+    await engine.dispose()
+
+
+def run_migrations_online():
+    # Called from database_ops.migrate with a connection the application already opened
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        _configure(connection)
+        return
+
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise ValueError("DATABASE_URL environment variable is not set. Please set it to your PostgreSQL database URL.")
+    asyncio.run(run_async_migrations(url))
+
+
+def run_migrations_offline():
+    # alembic upgrade head --sql: print the DDL instead of running it
+    context.configure(url=os.getenv("DATABASE_URL"), target_metadata=target_metadata, literal_binds=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
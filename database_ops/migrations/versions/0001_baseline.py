@@ -0,0 +1,95 @@
+"""Baseline: property and pricing_and_floor_plans as previously created by create_all
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created by SQLModel.metadata.create_all before migrations existed already have both
+tables; for those this revision adds the columns introduced since (content_hash, last_seen) and
+the unique constraint on property_link that the ingest upserts (ON CONFLICT (property_link))
+need. Tables created before property_link became unique may hold duplicate links, so those are
+merged first: the oldest row of each link is kept (its id is what API clients have seen), the floor
+plans of the others are moved to it, and the others are deleted. The kept row has no
+content_hash, so the next scrape of the listing rewrites it with current data.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('property'):
+        op.create_table(
+            'property',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('property_link', sa.String(length=500), nullable=False),
+            sa.Column('address', sa.String(length=500), nullable=False),
+            sa.Column('listing_verification', sa.String(length=100), nullable=False),
+            sa.Column('property_reviews', sa.Float(), nullable=True),
+            sa.Column('price', sa.Float(), nullable=True),
+            sa.Column('year_built', sa.Integer(), nullable=True),
+            sa.Column('street', sa.String(length=200), nullable=True),
+            sa.Column('city', sa.String(length=100), nullable=True),
+            sa.Column('state', sa.String(length=100), nullable=True),
+            sa.Column('zip_code', sa.String(), nullable=True),
+            sa.Column('validation_status', sa.String(length=50), nullable=True),
+            sa.Column('property_type', sa.String(length=100), nullable=True),
+            sa.Column('lease_option', sa.String(length=1000), nullable=True),
+            sa.Column('timestamp', sa.DateTime(), nullable=False),
+            sa.Column('content_hash', sa.String(length=64), nullable=True),
+            sa.Column('last_seen', sa.DateTime(), nullable=True),
+            # Same name Postgres gave the constraint under create_all
+            sa.UniqueConstraint('property_link', name='property_property_link_key'),
+        )
+    else:
+        op.execute("ALTER TABLE property ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+        op.execute("ALTER TABLE property ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP WITHOUT TIME ZONE")
+        unique_constraints = {c['name'] for c in inspector.get_unique_constraints('property')}
+        if 'property_property_link_key' not in unique_constraints:
+            _merge_duplicate_property_links(inspector.has_table('pricing_and_floor_plans'))
+            op.create_unique_constraint('property_property_link_key', 'property', ['property_link'])
+
+    if not inspector.has_table('pricing_and_floor_plans'):
+        op.create_table(
+            'pricing_and_floor_plans',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('property_id', sa.Integer(), sa.ForeignKey('property.id'), nullable=False),
+            sa.Column('apartment_name', sa.String(length=200), nullable=False),
+            sa.Column('rent_price_range', sa.String(length=100), nullable=False),
+            sa.Column('bedrooms', sa.Integer(), nullable=True),
+            sa.Column('bathrooms', sa.Float(), nullable=True),
+            sa.Column('sqft', sa.Integer(), nullable=True),
+            sa.Column('unit', sa.String(length=50), nullable=True),
+            sa.Column('base_rent', sa.Float(), nullable=True),
+            sa.Column('availability', sa.String(length=50), nullable=False),
+            sa.Column('details_link', sa.String(length=500), nullable=False),
+        )
+
+
+def _merge_duplicate_property_links(has_floor_plans: bool):
+    op.execute("""
+        CREATE TEMPORARY TABLE property_link_duplicates ON COMMIT DROP AS
+        SELECT id, min(id) OVER (PARTITION BY property_link) AS keep_id
+        FROM property
+    """)
+    op.execute("DELETE FROM property_link_duplicates WHERE id = keep_id")
+    if has_floor_plans:
+        op.execute("""
+            UPDATE pricing_and_floor_plans f SET property_id = d.keep_id
+            FROM property_link_duplicates d
+            WHERE f.property_id = d.id
+        """)
+    op.execute("DELETE FROM property p USING property_link_duplicates d WHERE p.id = d.id")
+    op.execute("DROP TABLE property_link_duplicates")
+
+
+def downgrade():
+    op.drop_table('pricing_and_floor_plans')
+    op.drop_table('property')
@@ -0,0 +1,50 @@
+"""Indexes for the ingest upsert and the API's hot queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+
+- property.property_link is already unique (property_property_link_key, ensured by 0001), which serves the upsert
+- pricing_and_floor_plans.property_id: /properties/{id}/floor-plans, the /search join, floor plan diffs
+- pricing_and_floor_plans.base_rent: ORDER BY ... LIMIT in /analytics/top/{x}/*
+- property.timestamp: the range scan in /analytics/this-weeks-listings
+- property.city (pg_trgm GIN): city ILIKE '%x%' in /analytics/search
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_pricing_and_floor_plans_property_id', 'pricing_and_floor_plans', ['property_id'],
+                    if_not_exists=True)
+    op.create_index('ix_pricing_and_floor_plans_base_rent', 'pricing_and_floor_plans', ['base_rent'],
+                    if_not_exists=True)
+    op.create_index('ix_property_timestamp', 'property', ['timestamp'], if_not_exists=True)
+
+    # pg_trgm ships with contrib (the postgres Docker images include it) and is a trusted extension
+    # (PG 13+), so the database owner can create it. Without it, city search keeps working unindexed.
+    available = op.get_bind().execute(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    ).first()
+    if available is None:
+        logger.warning("pg_trgm is not installed on this server; skipping ix_property_city_trgm")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_property_city_trgm', 'property', ['city'], if_not_exists=True,
+                    postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'})
+
+
+def downgrade():
+    op.drop_index('ix_property_city_trgm', table_name='property', if_exists=True)
+    op.drop_index('ix_property_timestamp', table_name='property')
+    op.drop_index('ix_pricing_and_floor_plans_base_rent', table_name='pricing_and_floor_plans')
+    op.drop_index('ix_pricing_and_floor_plans_property_id', table_name='pricing_and_floor_plans')
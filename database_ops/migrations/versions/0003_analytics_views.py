@@ -0,0 +1,82 @@
+"""Materialized analytics views, their refresh bookkeeping, and property.first_seen
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+
+- property.first_seen: when a listing was first stored (`timestamp` moves whenever its content
+  changes, so it cannot say when a listing was new). Backfilled from `timestamp`.
+- mv_property_rent_summary: per-property rent, bedroom and sqft ranges (one row per property)
+- mv_city_rent_percentiles: base_rent percentiles per (state, city)
+- mv_daily_new_listings: listings first seen per day
+- analytics_refresh_state: when the views were last refreshed (database_ops/analytics_views.py)
+
+Each view has a unique index, which REFRESH MATERIALIZED VIEW CONCURRENTLY requires.
+"""
+from alembic import op
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("ALTER TABLE property ADD COLUMN IF NOT EXISTS first_seen TIMESTAMP WITHOUT TIME ZONE")
+    op.execute("UPDATE property SET first_seen = timestamp WHERE first_seen IS NULL")
+    op.execute("ALTER TABLE property ALTER COLUMN first_seen SET DEFAULT timezone('utc', now())")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_property_rent_summary AS
+        SELECT p.id AS property_id, p.title, p.city, p.state, p.year_built, p.timestamp,
+               min(f.base_rent) AS min_rent, max(f.base_rent) AS max_rent,
+               min(f.bedrooms) AS min_bedrooms, max(f.bedrooms) AS max_bedrooms,
+               min(f.sqft) AS min_sqft, max(f.sqft) AS max_sqft,
+               count(f.id) AS floor_plans
+        FROM property p
+        LEFT JOIN pricing_and_floor_plans f ON f.property_id = p.id
+        GROUP BY p.id
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_mv_property_rent_summary ON mv_property_rent_summary (property_id)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_city_rent_percentiles AS
+        SELECT coalesce(p.state, '') AS state, p.city,
+               count(DISTINCT p.id) AS properties, count(*) AS floor_plans,
+               percentile_cont(0.25) WITHIN GROUP (ORDER BY f.base_rent) AS p25,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY f.base_rent) AS median,
+               percentile_cont(0.75) WITHIN GROUP (ORDER BY f.base_rent) AS p75,
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY f.base_rent) AS p90
+        FROM property p
+        JOIN pricing_and_floor_plans f ON f.property_id = p.id
+        WHERE f.base_rent IS NOT NULL AND p.city IS NOT NULL
+        GROUP BY coalesce(p.state, ''), p.city
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_mv_city_rent_percentiles ON mv_city_rent_percentiles (state, city)")
+
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_daily_new_listings AS
+        SELECT first_seen::date AS day, count(*) AS new_listings
+        FROM property
+        WHERE first_seen IS NOT NULL
+        GROUP BY first_seen::date
+    """)
+    op.execute("CREATE UNIQUE INDEX ux_mv_daily_new_listings ON mv_daily_new_listings (day)")
+
+    op.execute("""
+        CREATE TABLE analytics_refresh_state (
+            id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            refreshed_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            duration_seconds DOUBLE PRECISION
+        )
+    """)
+    # The views were just populated by CREATE
+    op.execute("INSERT INTO analytics_refresh_state (id, refreshed_at) VALUES (1, timezone('utc', now()))")
+
+
+def downgrade():
+    op.execute("DROP TABLE analytics_refresh_state")
+    op.execute("DROP MATERIALIZED VIEW mv_daily_new_listings")
+    op.execute("DROP MATERIALIZED VIEW mv_city_rent_percentiles")
+    op.execute("DROP MATERIALIZED VIEW mv_property_rent_summary")
+    op.execute("ALTER TABLE property DROP COLUMN first_seen")
@@ -0,0 +1,23 @@
+"""Index property.first_seen for /analytics/this-weeks-listings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+- property.first_seen: the range scan in /analytics/this-weeks-listings, which lists listings first
+  stored in the last 7 days (`timestamp` moves whenever a listing's content changes)
+"""
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_property_first_seen', 'property', ['first_seen'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_property_first_seen', table_name='property')
@@ -0,0 +1,122 @@
+import itertools
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+'''--- Columnar normalization of scraped listings, shared by the DB writer and the ML loader ---'''
+
+PROPERTY_TEXT_COLUMNS = (
+    'property_link', 'title', 'address', 'street', 'city', 'state', 'zip_code', 'listing_verification',
+)
+FLOOR_PLAN_TEXT_COLUMNS = ('apartment_name', 'rent_price_range', 'unit', 'availability', 'details_link')
+
+# Numeric columns and the dtype they are stored as (nullable ints for INTEGER columns)
+PROPERTY_NUMERIC_COLUMNS = {'property_reviews': 'float64', 'year_built': 'Int64'}
+FLOOR_PLAN_NUMERIC_COLUMNS = {'bedrooms': 'Int64', 'bathrooms': 'float64', 'sqft': 'Int64', 'base_rent': 'float64'}
+
+# First number in a value, once thousands separators are gone: "$1,500 - $1,800" -> 1500,
+# "1.5 Baths" -> 1.5, "650 Sq Ft" -> 650, "Built in 1998" -> 1998, "-5" -> -5. The exponent keeps
+# floats that stringify in scientific notation intact: 1e-05 -> "1e-05" -> 1e-05, not 1.0
+_FIRST_NUMBER = r'(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)'
+
+
+def parse_numeric_value(text: Any) -> Optional[float]:
+    """
+    Attempts to extract a numeric (float or int) value from a string.
+    Note: This is not an async function, as it is CPU-bound, not I/O-bound.
+    Scalar reference implementation; batch code should use parse_numeric_series.
+    """
+    if text is None:
+        return None
+    if not isinstance(text, str):
+        try:
+            return float(text)
+        except (ValueError, TypeError):
+            return None
+
+    # Clean the string
+    clean_text = text.replace('Sq Ft', '').replace('Bed', '').replace('Bath', '').replace('+', '').strip()
+    clean_text = clean_text.replace('$', '').replace(',', '').replace('–', '-').strip()
+
+    try:
+        if '-' in clean_text:
+            parts = clean_text.split('-')
+            if parts[0].strip().isdigit():
+                return float(parts[0].strip())
+        return float(clean_text)
+    except ValueError:
+        return None
+
+
+def parse_numeric_series(values: pd.Series, studio_as_zero: bool = False) -> pd.Series:
+    """
+    Vectorized numeric parsing: numbers pass through, strings yield their first number
+    (the lower bound of a range), anything else becomes NaN.
+    With `studio_as_zero`, "Studio" parses as 0 (bedroom counts).
+
+    Scraped columns repeat a small set of values ("1 Bed", "1 Bath", "$1,850"), so the column is
+    dictionary-encoded first and only its distinct values go through the string operations.
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    text = pd.Series(uniques, dtype=object).astype(str).str.replace(',', '', regex=False)
+    parsed = text.str.extract(_FIRST_NUMBER, expand=False).astype('float64')
+    if studio_as_zero:
+        parsed = parsed.mask(parsed.isna() & text.str.contains('studio', case=False, regex=False), 0.0)
+    parsed = np.append(parsed.to_numpy(), np.nan)  # code -1 (missing) picks up the trailing NaN
+    return pd.Series(parsed[codes], index=values.index, dtype='float64')
+
+
+def _numeric(frame: pd.DataFrame, column: str, dtype: str) -> pd.Series:
+    parsed = parse_numeric_series(frame[column], studio_as_zero=(column == 'bedrooms'))
+    if dtype == 'Int64':
+        parsed = np.floor(parsed).astype('Int64')
+    return parsed
+
+
+def normalize_listings(listings: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Turns a batch of scraped property dicts into two typed frames: one row per property and one
+    row per floor plan (keyed by property_link). Numeric fields are parsed column-wise.
+    """
+    properties = pd.DataFrame.from_records(
+        listings, columns=list(PROPERTY_TEXT_COLUMNS) + list(PROPERTY_NUMERIC_COLUMNS)
+        + ['lease_options', 'validation_status', 'property_type']
+    )
+    for column, dtype in PROPERTY_NUMERIC_COLUMNS.items():
+        properties[column] = _numeric(properties, column, dtype)
+    properties['lease_option'] = properties.pop('lease_options').map(
+        lambda options: json.dumps(options) if isinstance(options, list) else None
+    )
+    properties['validation_status'] = properties['validation_status'].fillna('pending')
+    properties['property_type'] = properties['property_type'].fillna('apartment')
+
+    plan_lists = [listing.get('pricing_and_floor_plans') or [] for listing in listings]
+    floor_plans = pd.DataFrame.from_records(
+        list(itertools.chain.from_iterable(plan_lists)),
+        columns=list(FLOOR_PLAN_TEXT_COLUMNS) + list(FLOOR_PLAN_NUMERIC_COLUMNS),
+    )
+    floor_plans.insert(0, 'property_link', np.repeat(
+        properties['property_link'].to_numpy(dtype=object), [len(plans) for plans in plan_lists]
+    ))
+    for column, dtype in FLOOR_PLAN_NUMERIC_COLUMNS.items():
+        floor_plans[column] = _numeric(floor_plans, column, dtype)
+
+    return properties, floor_plans
+
+
+def coerce_numeric_columns(frame: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Parses the given columns in place with the same rules as the ingest path."""
+    for column in columns:
+        frame[column] = parse_numeric_series(frame[column], studio_as_zero=(column == 'bedrooms'))
+    return frame
+
+
+def frame_records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Rows as plain-Python dicts (None for missing, int/float rather than NumPy scalars) for the DB driver."""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
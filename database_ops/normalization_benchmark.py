@@ -0,0 +1,61 @@
+# normalization_benchmark.py
+# Times the scalar parse_numeric_value path against normalize_listings on synthetic listings.
+# Usage: python -m database_ops.normalization_benchmark
+import time
+
+from database_ops.normalization import FLOOR_PLAN_NUMERIC_COLUMNS, normalize_listings, parse_numeric_value
+
+
+def benchmark(listings: int = 5000, floor_plans_per_listing: int = 8, repeat: int = 3):
+    """Best of `repeat` runs of each path over the same batch."""
+    batch = [
+        {
+            'property_link': f'https://example.com/listing-{i}',
+            'title': f'Listing {i}',
+            'address': f'{i} Main St, Boston, MA 02110',
+            'property_reviews': f'{3 + i % 20 / 10}',
+            'year_built': str(1950 + i % 70),
+            'listing_verification': 'Verified',
+            'lease_options': ['12 months'],
+            'pricing_and_floor_plans': [
+                {
+                    'apartment_name': f'Plan {j}',
+                    'rent_price_range': f'${1200 + (i * 37 + j * 100) % 3000:,} - ${1500 + (i * 37 + j * 100) % 3000:,}',
+                    'bedrooms': 'Studio' if j == 0 else f'{j % 4} Bed',
+                    'bathrooms': f'{1 + j % 2} Bath',
+                    'sqft': f'{400 + (i * 13 + j * 75) % 1200:,} Sq Ft',
+                    'unit': f'{j:03d}',
+                    'base_rent': f'${1200 + (i * 37 + j * 100) % 3000:,}',
+                    'availability': 'Now',
+                    'details_link': f'key-{i}-{j}',
+                }
+                for j in range(floor_plans_per_listing)
+            ],
+        }
+        for i in range(listings)
+    ]
+
+    def scalar():
+        # What prepare_batch did before: one dict per row, parse_numeric_value per field
+        for listing in batch:
+            {**listing, 'property_reviews': parse_numeric_value(listing['property_reviews']),
+             'year_built': parse_numeric_value(listing['year_built'])}
+            [{**fp_data, **{column: parse_numeric_value(fp_data[column]) for column in FLOOR_PLAN_NUMERIC_COLUMNS}}
+             for fp_data in listing['pricing_and_floor_plans']]
+
+    def vectorized():
+        normalize_listings(batch)
+
+    for name, fn in (('scalar parse_numeric_value', scalar), ('vectorized normalize_listings', vectorized)):
+        best = min(_timed(fn) for _ in range(repeat))
+        print(f"{name:32s} {best * 1000:8.1f} ms  ({listings} listings, {listings * floor_plans_per_listing} floor plans)")
+
+
+def _timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    benchmark()
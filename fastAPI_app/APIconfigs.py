@@ -1,7 +1,7 @@
 # config.py
 import os
 from dotenv import load_dotenv
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 load_dotenv()
 
@@ -21,10 +21,68 @@ API_TOKEN = os.getenv("API_TOKEN")
 if not API_TOKEN:
     raise ValueError("API_TOKEN environment variable is not set.")
 
+# Keyset pagination for the property list endpoints (?limit=...&cursor=...)
+PAGINATION = {
+    "DEFAULT_LIMIT": int(os.getenv("API_PAGE_DEFAULT_LIMIT", "100")),
+    "MAX_LIMIT": int(os.getenv("API_PAGE_MAX_LIMIT", "1000")),
+}
+
+# Bulk export (/properties/export): rows fetched per server-side cursor round trip
+EXPORT_CONFIG = {
+    "YIELD_PER": int(os.getenv("API_EXPORT_YIELD_PER", "1000")),
+}
+
+# Analytics response cache: per-worker LRU, optionally shared through Redis; invalidated by the
+# writers' NOTIFY, with the TTL as a backstop. API_CACHE_TTL_SECONDS=0 disables it.
+RESPONSE_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("API_CACHE_MAX_ENTRIES", "512")),
+    "TTL_SECONDS": float(os.getenv("API_CACHE_TTL_SECONDS", "300")),
+    "REDIS_URL": os.getenv("API_CACHE_REDIS_URL"),  # unset: each worker keeps its own cache only
+    "LISTEN_HEALTHCHECK_SECONDS": 30,
+}
+
+# Materialized analytics views (migration 0003, refreshed by database_ops/analytics_views.py).
+# Reads fall back to live queries once data newer than the last refresh has waited longer than
+# MAX_STALENESS_SECONDS; REFRESH_IN_API=0 when the refresher runs as its own process instead.
+ANALYTICS_VIEWS = {
+    "MAX_STALENESS_SECONDS": float(os.getenv("ANALYTICS_MAX_STALENESS_SECONDS", "60")),
+    "REFRESH_IN_API": os.getenv("ANALYTICS_REFRESH_IN_API", "1") == "1",
+}
+
+# Rent predictions: concurrent /predict/rent calls in a worker are scored together if they arrive
+# within WINDOW_MS of each other (0 disables); MAX_ROWS caps a /predict/rent/batch request
+PREDICTION_BATCH = {
+    "WINDOW_MS": float(os.getenv("API_PREDICT_BATCH_WINDOW_MS", "2")),
+    "MAX_BATCH": int(os.getenv("API_PREDICT_MAX_BATCH", "256")),
+    "MAX_ROWS": int(os.getenv("API_PREDICT_BATCH_MAX_ROWS", "10000")),
+}
+
+# /predict/rent result cache, keyed on the model inputs and the model version; API_PREDICT_CACHE_TTL_SECONDS=0 disables it
+PREDICTION_CACHE = {
+    "MAX_ENTRIES": int(os.getenv("API_PREDICT_CACHE_MAX_ENTRIES", "4096")),
+    "TTL_SECONDS": float(os.getenv("API_PREDICT_CACHE_TTL_SECONDS", "3600")),
+}
+
 # Metrics
 PROMETHEUS_METRICS = {
     "REQUEST_COUNT": Counter("api_request_total", "Total API Request", ["endpoint"]),
-    "REQUEST_LATENCY": Histogram("api_request_latency_seconds", "Request latency")
+    "REQUEST_LATENCY": Histogram("api_request_latency_seconds", "Request latency"),
+    "EXPORT_ROWS": Counter("api_export_rows_total", "Records streamed by /properties/export", ["format"]),
+    "CACHE_HITS": Counter("api_cache_hits_total", "Responses served from the response cache", ["endpoint", "tier"]),
+    "CACHE_MISSES": Counter("api_cache_misses_total", "Responses computed because they were not cached", ["endpoint"]),
+    "CACHE_EVICTIONS": Counter("api_cache_evictions_total", "Response cache entries dropped", ["reason"]),
+    "CACHE_NOT_MODIFIED": Counter("api_cache_not_modified_total", "304 responses to If-None-Match"),
+    "ANALYTICS_VIEW_READS": Counter("api_analytics_view_reads_total", "Analytics reads by source (materialized view or live fallback)", ["endpoint", "source"]),
+    "PREDICTION_BATCH_ROWS": Histogram("api_prediction_batch_rows", "Rows scored per model predict call", ["source"],
+                                       buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 10000)),
+    "PREDICTION_CACHE_HITS": Counter("api_prediction_cache_hits_total", "/predict/rent answers served from the prediction cache"),
+    "PREDICTION_CACHE_MISSES": Counter("api_prediction_cache_misses_total", "/predict/rent answers computed by the model"),
+    "PREDICTION_CACHE_HIT_RATIO": Gauge("api_prediction_cache_hit_ratio", "Prediction cache hit ratio since the current model was loaded"),
+    "PREDICTION_CACHE_SIZE": Gauge("api_prediction_cache_entries", "Entries in the prediction cache"),
+    "MODEL_INFO": Gauge("api_model_info", "The model version being served (value is always 1)", ["version", "sha256"]),
+    "MODEL_LOADED_AT": Gauge("api_model_loaded_timestamp_seconds", "When the served model was loaded"),
+    "MODEL_RELOADS": Counter("api_model_reloads_total", "Model registry reloads", ["outcome"]),
+    "ANALYTICS_VIEW_AGE": Gauge("api_analytics_view_age_seconds", "Seconds since the materialized analytics views were last refreshed"),
 }
 
 # Paths
@@ -35,3 +93,10 @@ import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "linear_regression_rent_model_pipeline.pkl")
+
+# Versioned model registry written by ml_pipeline/trainer.py (ml_pipeline/model_registry.py); each
+# worker polls its CURRENT pointer and swaps to a new version in the background
+MODEL_REGISTRY = {
+    "DIR": os.getenv("MODEL_REGISTRY_DIR", os.path.join(os.path.dirname(BASE_DIR), "model_registry")),
+    "POLL_SECONDS": float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "10")),
+}
@@ -0,0 +1,247 @@
+# cache.py
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Optional, Tuple
+
+import asyncpg
+from fastapi import Request
+from starlette.responses import Response
+
+from database_ops.events import ANALYTICS_REFRESHED_CHANNEL, DATA_CHANGED_CHANNEL, listen_dsn
+from fastAPI_app.APIconfigs import DATABASE_URL, PREDICTION_CACHE, PROMETHEUS_METRICS, RESPONSE_CACHE
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[bytes, str]  # (JSON body, ETag)
+
+
+class RedisResponseStore:
+    """Shared tier: cached bodies in Redis, so the gunicorn workers fill the cache for each other."""
+
+    def __init__(self, url: str, ttl_seconds: float, prefix: str = "api:cache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The redis response cache backend needs the 'redis' package installed") from e
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[Entry]:
+        body, etag = await self._client.hmget(self.prefix + key, "body", "etag")
+        return (body, etag.decode()) if body is not None and etag is not None else None
+
+    async def set(self, key: str, entry: Entry):
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.hset(self.prefix + key, mapping={"body": entry[0], "etag": entry[1]})
+            pipe.expire(self.prefix + key, max(int(self.ttl_seconds), 1))
+            await pipe.execute()
+
+    async def clear(self):
+        keys = [key async for key in self._client.scan_iter(match=self.prefix + "*", count=500)]
+        for i in range(0, len(keys), 500):
+            await self._client.unlink(*keys[i:i + 500])
+
+
+class ResponseCache:
+    """
+    Caches serialized JSON responses of read-only endpoints.
+
+    Entries live in a per-process LRU for `ttl_seconds` (bounded by `max_entries`), optionally
+    backed by a shared store. The writers announce committed changes on DATA_CHANGED_CHANNEL and
+    listen() drops everything when that fires; the TTL only bounds staleness if a notification is
+    missed. Every body carries an ETag, so clients sending If-None-Match get a 304 when it still matches.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 300.0, shared: Optional[RedisResponseStore] = None):
+        self.max_entries = max(max_entries, 1)
+        self.ttl_seconds = ttl_seconds
+        self.shared = shared
+        self._entries: "OrderedDict[str, Tuple[Entry, float]]" = OrderedDict()  # key -> (entry, expires_at)
+        self._generation = 0  # bumped on invalidation, so a response computed before it is not stored
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    async def respond(self, request: Request, produce: Callable[[], Awaitable[bytes]]) -> Response:
+        """Serves the request from cache, or calls `produce` for the JSON body and caches it."""
+        if not self.enabled:
+            return self._response(request, await produce(), None)
+
+        endpoint = request.scope["route"].path
+        key = f"{request.url.path}?{'&'.join(sorted(f'{k}={v}' for k, v in request.query_params.multi_items()))}"
+        entry = self._get_local(key)
+        if entry is not None:
+            PROMETHEUS_METRICS['CACHE_HITS'].labels(endpoint=endpoint, tier="local").inc()
+            return self._response(request, *entry)
+
+        if self.shared is not None:
+            try:
+                entry = await self.shared.get(key)
+            except Exception as e:
+                logger.warning(f"Shared response cache unavailable: {e}")
+            if entry is not None:
+                PROMETHEUS_METRICS['CACHE_HITS'].labels(endpoint=endpoint, tier="shared").inc()
+                self._set_local(key, entry)
+                return self._response(request, *entry)
+
+        PROMETHEUS_METRICS['CACHE_MISSES'].labels(endpoint=endpoint).inc()
+        generation = self._generation
+        body = await produce()
+        entry = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        if generation == self._generation:
+            self._set_local(key, entry)
+            if self.shared is not None:
+                try:
+                    await self.shared.set(key, entry)
+                except Exception as e:
+                    logger.warning(f"Could not store response in the shared cache: {e}")
+        return self._response(request, *entry)
+
+    async def invalidate(self, reason: str):
+        self._generation += 1
+        if self._entries:
+            PROMETHEUS_METRICS['CACHE_EVICTIONS'].labels(reason="invalidated").inc(len(self._entries))
+            self._entries.clear()
+        if self.shared is not None:
+            try:
+                await self.shared.clear()
+            except Exception as e:
+                logger.warning(f"Could not clear the shared response cache: {e}")
+        logger.info(f"Response cache invalidated ({reason}).")
+
+    async def listen(self):
+        """
+        Background task: LISTENs on DATA_CHANGED_CHANNEL and ANALYTICS_REFRESHED_CHANNEL on a
+        dedicated connection and invalidates on every notification. Reconnects with backoff; each (re)connect also invalidates, since
+        notifications sent while disconnected are lost.
+        """
+        dsn = listen_dsn(DATABASE_URL)
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(dsn)
+                await conn.add_listener(
+                    DATA_CHANGED_CHANNEL,
+                    lambda _conn, _pid, _channel, payload: asyncio.ensure_future(
+                        self.invalidate(f"{payload} properties changed")
+                    ),
+                )
+                await conn.add_listener(
+                    ANALYTICS_REFRESHED_CHANNEL,
+                    lambda *_: asyncio.ensure_future(self.invalidate("analytics views refreshed")),
+                )
+                await self.invalidate("listener connected")
+                backoff = 1.0
+                while not conn.is_closed():
+                    await asyncio.sleep(RESPONSE_CACHE['LISTEN_HEALTHCHECK_SECONDS'])
+                    await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener lost its connection ({e}); retrying in {backoff:.0f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 60.0)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+
+    def _get_local(self, key: str) -> Optional[Entry]:
+        item = self._entries.get(key)
+        if item is None:
+            return None
+        if item[1] <= time.monotonic():
+            del self._entries[key]
+            PROMETHEUS_METRICS['CACHE_EVICTIONS'].labels(reason="expired").inc()
+            return None
+        self._entries.move_to_end(key)
+        return item[0]
+
+    def _set_local(self, key: str, entry: Entry):
+        self._entries[key] = (entry, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            PROMETHEUS_METRICS['CACHE_EVICTIONS'].labels(reason="lru").inc()
+
+    @staticmethod
+    def _response(request: Request, body: bytes, etag: Optional[str]) -> Response:
+        headers = {"Cache-Control": "no-cache"}  # clients may keep it, but must revalidate
+        if etag is not None:
+            headers["ETag"] = etag
+            if_none_match = request.headers.get("if-none-match", "")
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            if etag in candidates or "*" in candidates:
+                PROMETHEUS_METRICS['CACHE_NOT_MODIFIED'].inc()
+                return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+class PredictionCache:
+    """
+    Per-process LRU/TTL memo of model predictions, keyed on the model's input tuple. Entries belong
+    to one model version (the artifact's checksum): the first lookup after a different model is
+    loaded drops them all, and a prediction computed by the previous model is never stored.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 3600.0):
+        self.max_entries = max(max_entries, 1)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()  # key -> (prediction, expires_at)
+        self._version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0
+
+    def get(self, version: Optional[str], key: Hashable) -> Optional[float]:
+        if version != self._version:
+            self._reset(version)
+        item = self._entries.get(key)
+        if item is not None and item[1] <= time.monotonic():
+            del self._entries[key]
+            item = None
+        if item is None:
+            self._misses += 1
+            PROMETHEUS_METRICS['PREDICTION_CACHE_MISSES'].inc()
+        else:
+            self._entries.move_to_end(key)
+            self._hits += 1
+            PROMETHEUS_METRICS['PREDICTION_CACHE_HITS'].inc()
+        PROMETHEUS_METRICS['PREDICTION_CACHE_HIT_RATIO'].set(self._hits / (self._hits + self._misses))
+        PROMETHEUS_METRICS['PREDICTION_CACHE_SIZE'].set(len(self._entries))
+        return item[0] if item is not None else None
+
+    def set(self, version: Optional[str], key: Hashable, prediction: float):
+        if version != self._version:
+            return  # computed by a model that has since been replaced
+        self._entries[key] = (prediction, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        PROMETHEUS_METRICS['PREDICTION_CACHE_SIZE'].set(len(self._entries))
+
+    def _reset(self, version: Optional[str]):
+        if self._version is not None:
+            logger.info(f"Prediction cache cleared: model version changed to {version}.")
+        self._entries.clear()
+        self._version = version
+        self._hits = self._misses = 0
+
+
+def _build_cache() -> ResponseCache:
+    shared = None
+    if RESPONSE_CACHE['REDIS_URL']:
+        shared = RedisResponseStore(RESPONSE_CACHE['REDIS_URL'], RESPONSE_CACHE['TTL_SECONDS'])
+    return ResponseCache(RESPONSE_CACHE['MAX_ENTRIES'], RESPONSE_CACHE['TTL_SECONDS'], shared)
+
+
+response_cache = _build_cache()
+prediction_cache = PredictionCache(PREDICTION_CACHE['MAX_ENTRIES'], PREDICTION_CACHE['TTL_SECONDS'])
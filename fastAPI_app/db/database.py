@@ -1,10 +1,17 @@
 
+import json
 import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+
+import numpy as np
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from sqlalchemy.orm import sessionmaker
-from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from fastAPI_app.APIconfigs import DATABASE_URL, MODEL_PATH
+from database_ops.migrate import upgrade_database
+from fastAPI_app.APIconfigs import DATABASE_URL, MODEL_PATH, PROMETHEUS_METRICS
+from ml_pipeline.compiled_model import BUNDLE_FORMAT_VERSION, bundle_path_for, file_sha256
 
 
 logger = logging.getLogger(__name__)
@@ -17,11 +24,10 @@ async_session_maker = sessionmaker(
 
 
 async def create_db_and_tables():
-    """Initializes the database and creates tables from models."""
+    """Initializes the database by applying pending migrations (database_ops/migrations)."""
     try:
-        async with engine.begin() as conn:
-            await conn.run_sync(SQLModel.metadata.create_all)
-        logger.info('Database tables created successfully.')
+        await upgrade_database(engine)
+        logger.info('Database schema is up to date.')
     except Exception as e:
         logger.critical(f"Failed to create database tables: {e}", exc_info=True)
         raise
@@ -33,19 +39,105 @@ async def get_session() -> AsyncSession:
         yield session
 
 
+class CompiledLinearModel:
+    """The rent pipeline compiled by ml_pipeline/compiled_model.py: a dot product plus per-category offsets."""
+
+    def __init__(self, bundle: Dict):
+        self.numeric_features = list(bundle['numeric_features'])
+        self.categorical_features = list(bundle['category_offsets'])
+        self.weights = np.asarray(bundle['weights'], dtype=np.float64)
+        self.intercept = float(bundle['intercept'])
+        self.category_offsets: Dict[str, Dict[str, float]] = bundle['category_offsets']
+
+    def predict(self, numeric: np.ndarray, categorical: Dict[str, Sequence[str]]) -> np.ndarray:
+        """`numeric`: rows x numeric_features; `categorical`: one sequence per categorical feature."""
+        if np.isnan(numeric).any():
+            raise ValueError("Input X contains NaN.")  # as the pipeline's LinearRegression does
+        predictions = numeric @ self.weights + self.intercept
+        for feature, offsets in self.category_offsets.items():
+            predictions += np.fromiter((offsets.get(value, 0.0) for value in categorical[feature]),
+                                       dtype=np.float64, count=len(predictions))
+        return predictions
+
+
+def load_compiled_model(model_path: str, artifact_sha256: str) -> Optional[CompiledLinearModel]:
+    """The coefficient bundle exported alongside `model_path`, if there is one compiled from this exact file."""
+    bundle_path = bundle_path_for(model_path)
+    if not os.path.exists(bundle_path):
+        logger.info(f"No coefficient bundle at {bundle_path}; predicting through the pipeline.")
+        return None
+    try:
+        with open(bundle_path) as f:
+            bundle = json.load(f)
+        if bundle.get('format_version') != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"unsupported format version {bundle.get('format_version')}")
+        if bundle.get('artifact_sha256') != artifact_sha256:
+            raise ValueError("it was compiled from a different model artifact")
+        return CompiledLinearModel(bundle)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring coefficient bundle {bundle_path}: {e}; predicting through the pipeline.")
+        return None
+
+
+class LoadedModel(NamedTuple):
+    pipeline: Any
+    compiled: Optional[CompiledLinearModel]  # NumPy fast path, when a matching bundle exists
+    version: str  # sha256 of the artifact; cached predictions are keyed by it
+    info: Dict[str, Any]  # what GET /predict/model reports
+
+
 # A global, mock model service to be loaded in the app lifespan
 class ModelService:
+    """
+    Holds the model being served. Everything about it lives in one LoadedModel that load_model
+    replaces in a single assignment, so a new version (fastAPI_app/model_reloader.py) is swapped in
+    while requests are running; a request that already read the old one finishes with it.
+    """
+
     def __init__(self):
-        self.model = None
+        self.active: Optional[LoadedModel] = None
+
+    @property
+    def model(self):
+        return self.active.pipeline if self.active is not None else None
 
-    def load_model(self, model_path: str):
+    @property
+    def compiled(self) -> Optional[CompiledLinearModel]:
+        return self.active.compiled if self.active is not None else None
+
+    @property
+    def version(self) -> Optional[str]:
+        return self.active.version if self.active is not None else None
+
+    def load_model(self, model_path: str, metadata: Optional[Dict[str, Any]] = None):
+        """Loads an artifact; `metadata` is its model registry entry (ml_pipeline/model_registry.py), if any."""
         import joblib
-        self.model = joblib.load(model_path)
+        sha256 = file_sha256(model_path)
+        if metadata is not None and metadata['artifact_sha256'] != sha256:
+            raise ValueError(f"{model_path} does not match the checksum in its registry metadata.")
+        pipeline = joblib.load(model_path)
+        compiled = load_compiled_model(model_path, sha256)
+        info = {
+            'version': metadata['version'] if metadata is not None else f"unversioned-{sha256[:8]}",
+            'artifact_sha256': sha256,
+            'created_at': metadata.get('created_at') if metadata is not None else None,
+            'metrics': metadata.get('metrics', {}) if metadata is not None else {},
+            'source': model_path,
+            'compiled': compiled is not None,
+            'loaded_at': datetime.now(timezone.utc).isoformat(),
+        }
+        self.active = LoadedModel(pipeline, compiled, sha256, info)
+
+        PROMETHEUS_METRICS['MODEL_INFO'].clear()
+        PROMETHEUS_METRICS['MODEL_INFO'].labels(version=info['version'], sha256=sha256[:12]).set(1)
+        PROMETHEUS_METRICS['MODEL_LOADED_AT'].set_to_current_time()
+        logger.info(f"Serving model {info['version']} from {model_path} ({'compiled' if compiled else 'pipeline'}).")
 
     def predict(self, data):
-        if self.model is None:
+        active = self.active
+        if active is None:
             raise RuntimeError("Model is not loaded.")
-        return self.model.predict(data)
+        return active.pipeline.predict(data)
 
 
-model = ModelService()
\ No newline at end of file
+model = ModelService()
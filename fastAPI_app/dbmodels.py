@@ -1,12 +1,18 @@
 from typing import Optional
 from datetime import datetime, timezone
 
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Relationship, Field
 
 class Property(SQLModel, table=True):
+    # Schema changes go through migrations in database_ops/migrations; keep these in step with them
+    __table_args__ = (
+        Index('ix_property_city_trgm', 'city', postgresql_using='gin', postgresql_ops={'city': 'gin_trgm_ops'}),
+    )
+
     id: int = Field(default=None, primary_key=True)
     title: str = Field(max_length=200)
-    property_link: str = Field(max_length=500)
+    property_link: str = Field(max_length=500, unique=True)
     address: str = Field(max_length=500)
     listing_verification: str = Field(max_length=100)
     property_reviews: Optional[float] = Field(default=0)
@@ -19,21 +25,26 @@ class Property(SQLModel, table=True):
     validation_status: Optional[str] = Field(max_length=50, default="pending")
     property_type: Optional[str] = Field(max_length=100, default="apartment")
     lease_option: Optional[str] = Field(max_length=1000, default=None)
-    timestamp: datetime = Field(default_factory=lambda :datetime.now(timezone.utc), nullable=False)
+    timestamp: datetime = Field(default_factory=lambda :datetime.now(timezone.utc), nullable=False, index=True)
+    content_hash: Optional[str] = Field(max_length=64, default=None)  # fingerprint of the scraped content
+    last_seen: Optional[datetime] = Field(default=None, nullable=True)  # last scrape, changed or not
+    first_seen: Optional[datetime] = Field(  # first stored; set by the database on insert
+        default=None, nullable=True, index=True, sa_column_kwargs={"server_default": text("timezone('utc', now())")}
+    )
 
     pricing_and_floor_plans: list["Pricing_and_floor_plans"] = Relationship(back_populates="property")
 
 
 class Pricing_and_floor_plans(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    property_id: int = Field(foreign_key="property.id", nullable=False)
+    property_id: int = Field(foreign_key="property.id", nullable=False, index=True)
     apartment_name: str = Field(max_length=200)
     rent_price_range: str = Field(max_length=100)
     bedrooms: Optional[int] = Field(default=None, nullable=True)
     bathrooms: Optional[float] = Field(default=None, nullable=True)
     sqft: Optional[int] = Field(default=None, nullable=True)
     unit: Optional[str] = Field(max_length=50, default=None, nullable=True)
-    base_rent: Optional[float] = Field(default=None, nullable=True)
+    base_rent: Optional[float] = Field(default=None, nullable=True, index=True)
     availability: str = Field(max_length=50, default=None)
     details_link: str = Field(max_length=500, default=None)
 
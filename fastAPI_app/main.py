@@ -1,12 +1,16 @@
 # main.py
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
 from prometheus_client import generate_latest
 from starlette.responses import Response
 
-from fastAPI_app.APIconfigs import API_CONFIG, PROMETHEUS_METRICS, MODEL_PATH
+from database_ops.analytics_views import AnalyticsViewRefresher
+from fastAPI_app.APIconfigs import API_CONFIG, ANALYTICS_VIEWS, DATABASE_URL, PROMETHEUS_METRICS, MODEL_PATH
+from fastAPI_app.cache import response_cache
 from fastAPI_app.db.database import create_db_and_tables, get_session, model
+from fastAPI_app.model_reloader import model_registry_watcher
 from fastAPI_app.routers import properties_router, analytics_router, prediction_router
 
 # Configure logging to be consistent across modules
@@ -18,18 +22,29 @@ logging.basicConfig(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events for the application."""
-    logging.info("Application Startup: Creating database tables if they don't exist.")
+    logging.info("Application Startup: Applying pending database migrations.")
     await create_db_and_tables()
     logging.info("Application Startup: Loading pre-trained model.")
     try:
-        model.load_model(MODEL_PATH)
+        # The registry's current version if the trainer has published one, else the bundled artifact
+        if not model_registry_watcher.load_current():
+            model.load_model(MODEL_PATH)
         logging.info("Model loaded successfully.")
     except FileNotFoundError:
         logging.critical("Model file not found. Prediction service will be unavailable.")
     except Exception as e:
         logging.critical(f"An error occurred while loading the model: {e}")
+    background_tasks = [asyncio.create_task(model_registry_watcher.run())]
+    if response_cache.enabled:
+        background_tasks.append(asyncio.create_task(response_cache.listen()))
+    if ANALYTICS_VIEWS['REFRESH_IN_API']:
+        # Every worker runs one; only the advisory-lock holder refreshes, the rest stand by
+        background_tasks.append(asyncio.create_task(AnalyticsViewRefresher(DATABASE_URL).run()))
     yield
     logging.info("Application Shutdown: Cleaning up process.")
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
 
 
 app = FastAPI(
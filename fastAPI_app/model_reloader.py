@@ -0,0 +1,60 @@
+# model_reloader.py
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from fastAPI_app.APIconfigs import MODEL_REGISTRY, PROMETHEUS_METRICS
+from fastAPI_app.db.database import ModelService, model
+from ml_pipeline.model_registry import MODEL_FILE, read_current, read_metadata, version_dir
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistryWatcher:
+    """
+    Serves the version the model registry's CURRENT points at. run() polls it and loads a new
+    version in a worker thread, then swaps it in (ModelService.load_model); requests keep using
+    the previous model until then, and keep it if the new version fails to load.
+    """
+
+    def __init__(self, service: ModelService, registry: str, poll_seconds: float):
+        self.service = service
+        self.registry = registry
+        self.poll_seconds = poll_seconds
+        self._failed_version: Optional[str] = None  # not retried until CURRENT moves on
+
+    def load_current(self) -> bool:
+        """Loads CURRENT synchronously (startup); False if nothing was published or it could not be loaded."""
+        version = read_current(self.registry)
+        return version is not None and self._load(version)
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                version = read_current(self.registry)
+            except OSError as e:
+                logger.warning(f"Could not read the model registry {self.registry}: {e}")
+                continue
+            active = self.service.active
+            if version is None or version == self._failed_version or (active is not None and active.info['version'] == version):
+                continue
+            logger.info(f"Model registry points at {version}; loading it.")
+            await asyncio.to_thread(self._load, version)
+
+    def _load(self, version: str) -> bool:
+        try:
+            metadata = read_metadata(self.registry, version)
+            self.service.load_model(os.path.join(version_dir(self.registry, version), MODEL_FILE), metadata)
+        except Exception as e:
+            self._failed_version = version
+            PROMETHEUS_METRICS['MODEL_RELOADS'].labels(outcome="failed").inc()
+            logger.error(f"Could not load model version {version}; still serving the previous model: {e}")
+            return False
+        self._failed_version = None
+        PROMETHEUS_METRICS['MODEL_RELOADS'].labels(outcome="loaded").inc()
+        return True
+
+
+model_registry_watcher = ModelRegistryWatcher(model, MODEL_REGISTRY['DIR'], MODEL_REGISTRY['POLL_SECONDS'])
@@ -0,0 +1,29 @@
+# models/prediction_models.py
+from typing import Dict, List, Optional
+from pydantic import BaseModel, Field
+
+from fastAPI_app.APIconfigs import PREDICTION_BATCH
+
+class RentFeatures(BaseModel):
+    bedrooms: int
+    bathrooms: float
+    property_reviews: float
+    sqft: int
+    year_built: Optional[int] = None
+    state: Optional[str] = None
+    listing_verification: Optional[str] = None
+
+class RentPredictionBatch(BaseModel):
+    rows: List[RentFeatures] = Field(min_length=1, max_length=PREDICTION_BATCH['MAX_ROWS'])
+
+class RentPredictionBatchResult(BaseModel):
+    predictions: List[float]  # in the order of the request rows
+
+class ModelVersionRead(BaseModel):
+    version: str  # registry version, or unversioned-<sha> for the bundled artifact
+    artifact_sha256: str
+    created_at: Optional[str]
+    metrics: Dict[str, float]
+    source: str
+    compiled: bool  # served by the NumPy fast path
+    loaded_at: str
@@ -1,6 +1,6 @@
 # models/read_models.py
-from typing import Optional
-from datetime import datetime
+from typing import List, Optional
+from datetime import date, datetime
 from pydantic import BaseModel
 from sqlmodel import SQLModel
 
@@ -14,6 +14,10 @@ class PropertyRead(BaseModel):
     class Config:
         from_attributes = True
 
+class PropertyPage(BaseModel):
+    items: List[PropertyRead]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page; null on the last page
+
 class FloorPlanRead(BaseModel):
     id: int
     property_id: int
@@ -21,4 +25,32 @@ class FloorPlanRead(BaseModel):
     base_rent: float
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class PropertyRentSummary(BaseModel):
+    property_id: int
+    title: str
+    city: Optional[str]
+    state: Optional[str]
+    year_built: Optional[int]
+    min_rent: Optional[float]
+    max_rent: Optional[float]
+    min_bedrooms: Optional[int]
+    max_bedrooms: Optional[int]
+    min_sqft: Optional[int]
+    max_sqft: Optional[int]
+    floor_plans: int
+
+class CityRentPercentiles(BaseModel):
+    state: str  # empty when the listings have no state
+    city: str
+    properties: int
+    floor_plans: int
+    p25: float
+    median: float
+    p75: float
+    p90: float
+
+class DailyNewListings(BaseModel):
+    day: date
+    new_listings: int
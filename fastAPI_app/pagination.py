@@ -0,0 +1,63 @@
+# pagination.py
+import base64
+import binascii
+import json
+from typing import Any, Dict, List, Optional
+
+from fastapi import HTTPException, Query
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from fastAPI_app.APIconfigs import PAGINATION
+from fastAPI_app.dbmodels import Property
+from fastAPI_app.models.read_models import PropertyRead
+
+# Only the columns PropertyRead returns, so list endpoints never load lease_option, address, ...
+PROPERTY_READ_COLUMNS = [getattr(Property, name) for name in PropertyRead.model_fields]
+
+
+def encode_cursor(last_id: int) -> str:
+    """Opaque cursor pointing just past the row with `last_id`."""
+    return base64.urlsafe_b64encode(json.dumps({"after_id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        after_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["after_id"]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if not isinstance(after_id, int):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return after_id
+
+
+class PageParams:
+    """Query parameters shared by the paginated endpoints: ?limit=...&cursor=..."""
+
+    def __init__(
+            self,
+            limit: int = Query(PAGINATION['DEFAULT_LIMIT'], ge=1, le=PAGINATION['MAX_LIMIT']),
+            cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    ):
+        self.limit = limit
+        self.after_id = decode_cursor(cursor)
+
+
+async def fetch_property_page(session: AsyncSession, statement, page: PageParams, key=Property.id) -> Dict[str, Any]:
+    """
+    Runs a select over PROPERTY_READ_COLUMNS one keyset page at a time: rows with id greater than
+    the cursor, in id order. One extra row is fetched to know whether another page exists.
+    `key` is the property id column of the select (e.g. a materialized view's property_id).
+    """
+    if page.after_id is not None:
+        statement = statement.where(key > page.after_id)
+    result = await session.exec(statement.order_by(key).limit(page.limit + 1))
+    rows: List[Dict[str, Any]] = [dict(row._mapping) for row in result.all()]
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_cursor(rows[-1]['id'])
+    return {"items": rows, "next_cursor": next_cursor}
@@ -0,0 +1,74 @@
+# prediction_benchmark.py
+# Throughput of one predict call per request, concurrent /predict/rent calls (micro-batched on the
+# pipeline path) and one /predict/rent/batch-sized call; through the sklearn pipeline and with the
+# compiled NumPy model. Uses ModelServices of its own, never the one the API serves from.
+# Usage: python -m fastAPI_app.prediction_benchmark [--requests N] [--concurrency N]
+# (needs DATABASE_URL and API_TOKEN set for fastAPI_app's config; no connection is made)
+import argparse
+import asyncio
+import random
+import time
+from typing import List
+
+from fastAPI_app.APIconfigs import MODEL_PATH, PREDICTION_BATCH
+from fastAPI_app.db.database import ModelService
+from fastAPI_app.models.prediction_models import RentFeatures
+from fastAPI_app.services.prediction_service import PredictionBatcher, predict_rows
+
+
+def _sample_rows(count: int) -> List[RentFeatures]:
+    rng = random.Random(0)
+    return [
+        RentFeatures(bedrooms=rng.randint(0, 4), bathrooms=rng.choice([1, 1.5, 2, 3]), property_reviews=rng.uniform(0, 5),
+                     sqft=rng.randint(400, 2500), year_built=rng.randint(1950, 2024),
+                     state=rng.choice(['IL', 'CA', 'TX', None]),
+                     listing_verification=rng.choice(['Verified', 'Not Verified', 'N/A', 'Verified Listing', 'Other', None]))
+        for _ in range(count)
+    ]
+
+
+def _services() -> List[tuple]:
+    """(mode, ModelService) for the pipeline path and, when a bundle matches the artifact, the compiled one."""
+    compiled = ModelService()
+    compiled.load_model(MODEL_PATH)
+    pipeline = ModelService()
+    pipeline.active = compiled.active._replace(compiled=None)
+    return [("pipeline", pipeline)] + ([("compiled", compiled)] if compiled.compiled is not None else [])
+
+
+def benchmark(requests: int, concurrency: int):
+    rows = _sample_rows(requests)
+
+    def timed(label, run):
+        start = time.perf_counter()
+        run()
+        print(f"  {label:<50}{requests / (time.perf_counter() - start):12.0f} rows/s")
+
+    print(f"{requests} predictions")
+    for mode, service in _services():
+        batcher = PredictionBatcher(PREDICTION_BATCH['WINDOW_MS'] / 1000.0, PREDICTION_BATCH['MAX_BATCH'], service)
+
+        def single():
+            for row in rows:
+                predict_rows([row], source="single", service=service)
+
+        async def coalesced():
+            queue = list(rows)
+
+            async def client():
+                while queue:
+                    await batcher.predict(queue.pop())
+
+            await asyncio.gather(*[client() for _ in range(concurrency)])
+
+        timed(f"one call per request ({mode}):", single)
+        timed(f"{concurrency} concurrent /predict/rent clients ({mode}):", lambda: asyncio.run(coalesced()))
+        timed(f"single batch call ({mode}):", lambda: predict_rows(rows, source="batch", service=service))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark rent prediction throughput.')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    args = parser.parse_args()
+    benchmark(args.requests, args.concurrency)
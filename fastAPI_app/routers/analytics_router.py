@@ -1,53 +1,81 @@
 # routers/analytics_router.py
 from typing import List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from fastAPI_app.auth import (Authorisation)
+from fastAPI_app.cache import response_cache
 from fastAPI_app.db.database import get_session
 from fastAPI_app.dbmodels import Property, Pricing_and_floor_plans
-from fastAPI_app.models.read_models import PropertyRead, FloorPlanRead
+from fastAPI_app.models.read_models import (PropertyPage, FloorPlanRead, PropertyRentSummary,
+                                           CityRentPercentiles, DailyNewListings)
+from fastAPI_app.pagination import PROPERTY_READ_COLUMNS, PageParams, fetch_property_page
+from fastAPI_app.services import analytics_service
 
 router = APIRouter()
 
+# Handlers return cached JSON bytes, so responses are validated and serialized here, once per cache fill
+FLOOR_PLAN_LIST = TypeAdapter(List[FloorPlanRead])
+PROPERTY_PAGE = TypeAdapter(PropertyPage)
+RENT_SUMMARY = TypeAdapter(PropertyRentSummary)
+CITY_PERCENTILES_LIST = TypeAdapter(List[CityRentPercentiles])
+DAILY_NEW_LISTINGS_LIST = TypeAdapter(List[DailyNewListings])
+
 
 @router.get("/top/{x}/most-affordable", response_model=List[FloorPlanRead], tags=["Analytics"])
 async def get_top_x_most_affordable_properties(
         x: int,
+        request: Request,
         session: AsyncSession = Depends(get_session),
         is_authorized: str = Depends(Authorisation())
 ):
-    result = await session.exec(
-        select(Pricing_and_floor_plans).order_by(Pricing_and_floor_plans.base_rent.asc()).limit(x)
-    )
-    return result.all()
+    async def produce():
+        result = await session.exec(
+            select(Pricing_and_floor_plans).order_by(Pricing_and_floor_plans.base_rent.asc()).limit(x)
+        )
+        return FLOOR_PLAN_LIST.dump_json(FLOOR_PLAN_LIST.validate_python(result.all(), from_attributes=True))
+
+    return await response_cache.respond(request, produce)
 
 
 @router.get("/top/{x}/most-expensive", response_model=List[FloorPlanRead], tags=["Analytics"])
 async def get_top_x_most_expensive_properties(
         x: int,
+        request: Request,
         session: AsyncSession = Depends(get_session),
         is_authorized: str = Depends(Authorisation())
 ):
-    result = await session.exec(
-        select(Pricing_and_floor_plans).order_by(Pricing_and_floor_plans.base_rent.desc()).limit(x)
-    )
-    return result.all()
+    async def produce():
+        result = await session.exec(
+            select(Pricing_and_floor_plans).order_by(Pricing_and_floor_plans.base_rent.desc()).limit(x)
+        )
+        return FLOOR_PLAN_LIST.dump_json(FLOOR_PLAN_LIST.validate_python(result.all(), from_attributes=True))
+
+    return await response_cache.respond(request, produce)
 
 
-@router.get("/this-weeks-listings", response_model=List[PropertyRead], tags=["Properties"])
+@router.get("/this-weeks-listings", response_model=PropertyPage, tags=["Properties"])
 async def get_this_weeks_listings(
+        request: Request,
+        page: PageParams = Depends(),
         session: AsyncSession = Depends(get_session),
         is_authorized: str = Depends(Authorisation())
 ):
-    one_week_ago = datetime.now() - timedelta(days=7)
-    result = await session.exec(select(Property).where(Property.timestamp >= one_week_ago))
-    return result.all()
+    async def produce():
+        # first_seen, not timestamp: timestamp also moves when an existing listing's content changes
+        one_week_ago = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=7)
+        statement = select(*PROPERTY_READ_COLUMNS).where(Property.first_seen >= one_week_ago)
+        return PROPERTY_PAGE.dump_json(PROPERTY_PAGE.validate_python(await fetch_property_page(session, statement, page)))
 
+    return await response_cache.respond(request, produce)
 
-@router.get("/search", response_model=List[PropertyRead], tags=["Properties"])
+
+@router.get("/search", response_model=PropertyPage, tags=["Properties"])
 async def search_properties(
+        request: Request,
+        page: PageParams = Depends(),
         session: AsyncSession = Depends(get_session),
         is_authorized: str = Depends(Authorisation()),
         city: Optional[str] = None,
@@ -55,17 +83,56 @@ async def search_properties(
         max_base_rent: Optional[float] = None,
         year_built: Optional[int] = None,
 ):
-    statement = select(Property).join(Pricing_and_floor_plans, isouter=True)
-
-    if city:
-        statement = statement.where(Property.city.ilike(f"%{city}%"))
-    if min_bedrooms is not None:
-        statement = statement.where(Pricing_and_floor_plans.bedrooms >= min_bedrooms)
-    if max_base_rent is not None:
-        statement = statement.where(Pricing_and_floor_plans.base_rent <= max_base_rent)
-    if year_built is not None:
-        statement = statement.where(Property.year_built == year_built)
-
-    statement = statement.group_by(Property.id)
-    result = await session.exec(statement)
-    return result.all()
\ No newline at end of file
+    async def produce():
+        # Served from mv_property_rent_summary while it is fresh, so no join over every floor plan
+        statement, key = await analytics_service.search_statement(session, city, min_bedrooms, max_base_rent, year_built)
+        page_data = await fetch_property_page(session, statement, page, key=key)
+        return PROPERTY_PAGE.dump_json(PROPERTY_PAGE.validate_python(page_data))
+
+    return await response_cache.respond(request, produce)
+
+
+@router.get("/properties/{property_id}/rent-summary", response_model=PropertyRentSummary, tags=["Analytics"])
+async def get_property_rent_summary(
+        property_id: int,
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+        is_authorized: str = Depends(Authorisation())
+):
+    async def produce():
+        summary = await analytics_service.property_rent_summary(session, property_id)
+        if summary is None:
+            raise HTTPException(status_code=404, detail="Property not found.")
+        return RENT_SUMMARY.dump_json(RENT_SUMMARY.validate_python(summary))
+
+    return await response_cache.respond(request, produce)
+
+
+@router.get("/cities/rent-percentiles", response_model=List[CityRentPercentiles], tags=["Analytics"])
+async def get_city_rent_percentiles(
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+        is_authorized: str = Depends(Authorisation()),
+        city: Optional[str] = None,
+        state: Optional[str] = None,
+        limit: int = Query(100, ge=1, le=1000),
+):
+    async def produce():
+        rows = await analytics_service.city_rent_percentiles(session, city, state, limit)
+        return CITY_PERCENTILES_LIST.dump_json(CITY_PERCENTILES_LIST.validate_python(rows))
+
+    return await response_cache.respond(request, produce)
+
+
+@router.get("/daily-new-listings", response_model=List[DailyNewListings], tags=["Analytics"])
+async def get_daily_new_listings(
+        request: Request,
+        session: AsyncSession = Depends(get_session),
+        is_authorized: str = Depends(Authorisation()),
+        days: int = Query(30, ge=1, le=366),
+):
+    async def produce():
+        rows = await analytics_service.daily_new_listings(session, days)
+        return DAILY_NEW_LISTINGS_LIST.dump_json(DAILY_NEW_LISTINGS_LIST.validate_python(rows))
+
+    return await response_cache.respond(request, produce)
@@ -3,7 +3,9 @@ import logging
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException
 from fastAPI_app.auth import Authorisation
-from fastAPI_app.services.prediction_service import predict_rent_service
+from fastAPI_app.db.database import model
+from fastAPI_app.models.prediction_models import ModelVersionRead, RentPredictionBatch, RentPredictionBatchResult
+from fastAPI_app.services.prediction_service import predict_rent_batch_service, predict_rent_service
 
 logger = logging.getLogger(__name__)
 
@@ -36,4 +38,29 @@ async def predict_rent(
         raise HTTPException(status_code=503, detail="Prediction service is temporarily unavailable. The model is not loaded.")
     except Exception as e:
         logger.error(f"Error during rent prediction: {e}")
-        raise HTTPException(status_code=500, detail="An internal server error occurred.")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+
+@router.post("/rent/batch", response_model=RentPredictionBatchResult, tags=["Prediction"])
+async def predict_rent_batch(
+    batch: RentPredictionBatch,
+    is_authorized: str = Depends(Authorisation())
+):
+    """Scores every row in one vectorized model call; predictions come back in row order."""
+    try:
+        return {"predictions": await predict_rent_batch_service(batch.rows)}
+    except RuntimeError as e:
+        logger.error(f"Prediction service unavailable: {e}")
+        raise HTTPException(status_code=503, detail="Prediction service is temporarily unavailable. The model is not loaded.")
+    except Exception as e:
+        logger.error(f"Error during batch rent prediction: {e}")
+        raise HTTPException(status_code=500, detail="An internal server error occurred.")
+
+
+@router.get("/model", response_model=ModelVersionRead, tags=["Prediction"])
+async def get_active_model(is_authorized: str = Depends(Authorisation())):
+    """The model version this worker is serving."""
+    active = model.active
+    if active is None:
+        raise HTTPException(status_code=503, detail="Prediction service is temporarily unavailable. The model is not loaded.")
+    return active.info
@@ -1,23 +1,45 @@
 # routers/properties_router.py
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 from fastAPI_app.auth import Authorisation
 from fastAPI_app.db.database import get_session
 from fastAPI_app.dbmodels import Property, Pricing_and_floor_plans
-from fastAPI_app.models.read_models import PropertyRead, FloorPlanRead
+from fastAPI_app.models.read_models import PropertyPage, FloorPlanRead
+from fastAPI_app.pagination import PROPERTY_READ_COLUMNS, PageParams, fetch_property_page
+from fastAPI_app.services.export_service import stream_csv, stream_ndjson
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[PropertyRead], tags=["Properties"])
+@router.get("/", response_model=PropertyPage, tags=["Properties"])
 async def get_all_properties(
+        page: PageParams = Depends(),
         session: AsyncSession = Depends(get_session),
         is_authorized: str = Depends(Authorisation())
 ):
-    result = await session.exec(select(Property))
-    return result.all()
+    return await fetch_property_page(session, select(*PROPERTY_READ_COLUMNS), page)
+
+
+@router.get("/export", tags=["Properties"])
+async def export_properties(
+        format: Literal["ndjson", "csv"] = "ndjson",
+        updated_since: Optional[datetime] = None,
+        is_authorized: str = Depends(Authorisation())
+):
+    """
+    Streams every property with its floor plans: NDJSON (one property per line, floor plans nested)
+    or CSV (one row per floor plan). `updated_since` limits it to listings whose content changed since then.
+    """
+    if updated_since is not None and updated_since.tzinfo is not None:
+        updated_since = updated_since.astimezone(timezone.utc).replace(tzinfo=None)  # stored as naive UTC
+    if format == "csv":
+        return StreamingResponse(stream_csv(updated_since), media_type="text/csv",
+                                 headers={"Content-Disposition": 'attachment; filename="properties.csv"'})
+    return StreamingResponse(stream_ndjson(updated_since), media_type="application/x-ndjson")
 
 
 @router.get("/{property_id}/floor-plans", response_model=List[FloorPlanRead], tags=["Floor Plans"])
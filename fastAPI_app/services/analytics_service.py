@@ -0,0 +1,176 @@
+# services/analytics_service.py
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, DateTime, Float, Integer, String, cast, column, distinct, func, table, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from fastAPI_app.APIconfigs import ANALYTICS_VIEWS, PROMETHEUS_METRICS
+from fastAPI_app.dbmodels import Property, Pricing_and_floor_plans
+from fastAPI_app.pagination import PROPERTY_READ_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# Materialized views created by migration 0003 and refreshed by database_ops/analytics_views.py
+mv_property_rent_summary = table(
+    'mv_property_rent_summary',
+    column('property_id', Integer), column('title', String), column('city', String), column('state', String),
+    column('year_built', Integer), column('timestamp', DateTime),
+    column('min_rent', Float), column('max_rent', Float), column('min_bedrooms', Integer), column('max_bedrooms', Integer),
+    column('min_sqft', Integer), column('max_sqft', Integer), column('floor_plans', Integer),
+)
+mv_city_rent_percentiles = table(
+    'mv_city_rent_percentiles',
+    column('state', String), column('city', String), column('properties', Integer), column('floor_plans', Integer),
+    column('p25', Float), column('median', Float), column('p75', Float), column('p90', Float),
+)
+mv_daily_new_listings = table('mv_daily_new_listings', column('day', Date), column('new_listings', Integer))
+
+# Seconds since the last refresh, and whether listings changed after it
+FRESHNESS_SQL = text("""
+    SELECT extract(epoch FROM timezone('utc', now()) - s.refreshed_at) AS age_seconds,
+           coalesce((SELECT max(timestamp) FROM property) > s.refreshed_at, false) AS behind
+    FROM analytics_refresh_state s
+    WHERE s.id = 1
+""")
+
+
+async def views_fresh(session: AsyncSession, endpoint: str) -> bool:
+    """
+    Whether `endpoint` may read the materialized views. They are used unless listings changed after
+    the last refresh and that refresh is older than ANALYTICS_VIEWS['MAX_STALENESS_SECONDS'] (the
+    refresher is behind or down); the endpoint then falls back to its live query.
+    """
+    try:
+        row = (await session.execute(FRESHNESS_SQL)).first()
+    except DBAPIError as e:
+        await session.rollback()
+        logger.warning(f"Analytics views unavailable, using live queries for {endpoint}: {e.orig}")
+        fresh = False
+    else:
+        if row is None:
+            fresh = False
+        else:
+            PROMETHEUS_METRICS['ANALYTICS_VIEW_AGE'].set(float(row.age_seconds))
+            fresh = not row.behind or row.age_seconds <= ANALYTICS_VIEWS['MAX_STALENESS_SECONDS']
+        if not fresh:
+            logger.warning(f"Analytics views are stale, using live queries for {endpoint}.")
+    PROMETHEUS_METRICS['ANALYTICS_VIEW_READS'].labels(endpoint=endpoint, source="view" if fresh else "live").inc()
+    return fresh
+
+
+async def search_statement(
+        session: AsyncSession,
+        city: Optional[str],
+        min_bedrooms: Optional[int],
+        max_base_rent: Optional[float],
+        year_built: Optional[int],
+) -> Tuple[Any, Any]:
+    """
+    The /search select over PROPERTY_READ_COLUMNS and its keyset column. The per-property ranges in
+    mv_property_rent_summary answer the bedroom and rent filters on their own, but not together:
+    "a floor plan with enough bedrooms *and* under the rent" needs the floor plan rows, so that
+    combination always runs live.
+    """
+    if not (min_bedrooms is not None and max_base_rent is not None) and await views_fresh(session, "search"):
+        mv = mv_property_rent_summary.c
+        statement = select(mv.property_id.label('id'), mv.title, mv.city, mv.year_built, mv.timestamp)
+        if city:
+            statement = statement.where(mv.city.ilike(f"%{city}%"))
+        if min_bedrooms is not None:
+            statement = statement.where(mv.max_bedrooms >= min_bedrooms)
+        if max_base_rent is not None:
+            statement = statement.where(mv.min_rent <= max_base_rent)
+        if year_built is not None:
+            statement = statement.where(mv.year_built == year_built)
+        return statement, mv.property_id
+
+    statement = select(*PROPERTY_READ_COLUMNS).join(Pricing_and_floor_plans, isouter=True)
+    if city:
+        statement = statement.where(Property.city.ilike(f"%{city}%"))
+    if min_bedrooms is not None:
+        statement = statement.where(Pricing_and_floor_plans.bedrooms >= min_bedrooms)
+    if max_base_rent is not None:
+        statement = statement.where(Pricing_and_floor_plans.base_rent <= max_base_rent)
+    if year_built is not None:
+        statement = statement.where(Property.year_built == year_built)
+    return statement.group_by(Property.id), Property.id
+
+
+async def property_rent_summary(session: AsyncSession, property_id: int) -> Optional[Dict[str, Any]]:
+    """Rent, bedroom and sqft ranges of one property's floor plans; None if the property does not exist."""
+    if await views_fresh(session, "rent-summary"):
+        mv = mv_property_rent_summary.c
+        statement = select(
+            mv.property_id, mv.title, mv.city, mv.state, mv.year_built, mv.min_rent, mv.max_rent,
+            mv.min_bedrooms, mv.max_bedrooms, mv.min_sqft, mv.max_sqft, mv.floor_plans,
+        ).where(mv.property_id == property_id)
+    else:
+        floor_plan = Pricing_and_floor_plans
+        statement = (
+            select(
+                Property.id.label('property_id'), Property.title, Property.city, Property.state, Property.year_built,
+                func.min(floor_plan.base_rent).label('min_rent'), func.max(floor_plan.base_rent).label('max_rent'),
+                func.min(floor_plan.bedrooms).label('min_bedrooms'), func.max(floor_plan.bedrooms).label('max_bedrooms'),
+                func.min(floor_plan.sqft).label('min_sqft'), func.max(floor_plan.sqft).label('max_sqft'),
+                func.count(floor_plan.id).label('floor_plans'),
+            )
+            .join(floor_plan, isouter=True)
+            .where(Property.id == property_id)
+            .group_by(Property.id)
+        )
+    row = (await session.exec(statement)).first()
+    return dict(row._mapping) if row is not None else None
+
+
+async def city_rent_percentiles(
+        session: AsyncSession, city: Optional[str], state: Optional[str], limit: int
+) -> List[Dict[str, Any]]:
+    """base_rent percentiles per (state, city), in state and city order."""
+    if await views_fresh(session, "rent-percentiles"):
+        mv = mv_city_rent_percentiles.c
+        statement = select(mv.state, mv.city, mv.properties, mv.floor_plans, mv.p25, mv.median, mv.p75, mv.p90)
+        state_column, city_column = mv.state, mv.city
+    else:
+        base_rent = Pricing_and_floor_plans.base_rent
+        state_column, city_column = func.coalesce(Property.state, ''), Property.city
+        statement = (
+            select(
+                state_column.label('state'), city_column,
+                func.count(distinct(Property.id)).label('properties'), func.count().label('floor_plans'),
+                func.percentile_cont(0.25).within_group(base_rent).label('p25'),
+                func.percentile_cont(0.5).within_group(base_rent).label('median'),
+                func.percentile_cont(0.75).within_group(base_rent).label('p75'),
+                func.percentile_cont(0.9).within_group(base_rent).label('p90'),
+            )
+            .join(Pricing_and_floor_plans)
+            .where(base_rent.is_not(None), city_column.is_not(None))
+            .group_by(state_column, city_column)
+        )
+    if city:
+        statement = statement.where(city_column.ilike(f"%{city}%"))
+    if state:
+        statement = statement.where(state_column == state)
+    result = await session.exec(statement.order_by(state_column, city_column).limit(limit))
+    return [dict(row._mapping) for row in result.all()]
+
+
+async def daily_new_listings(session: AsyncSession, days: int) -> List[Dict[str, Any]]:
+    """Listings first seen on each of the last `days` days (UTC, today included); days without any are omitted."""
+    since = (datetime.utcnow() - timedelta(days=days - 1)).date()
+    if await views_fresh(session, "daily-new-listings"):
+        mv = mv_daily_new_listings.c
+        statement = select(mv.day, mv.new_listings).where(mv.day >= since).order_by(mv.day)
+    else:
+        day = cast(Property.first_seen, Date)
+        statement = (
+            select(day.label('day'), func.count().label('new_listings'))
+            .where(Property.first_seen >= since)
+            .group_by(day)
+            .order_by(day)
+        )
+    result = await session.exec(statement)
+    return [dict(row._mapping) for row in result.all()]
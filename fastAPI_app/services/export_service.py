@@ -0,0 +1,104 @@
+# services/export_service.py
+import csv
+import io
+import json
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from sqlmodel import select
+
+from fastAPI_app.APIconfigs import EXPORT_CONFIG, PROMETHEUS_METRICS
+from fastAPI_app.db.database import async_session_maker
+from fastAPI_app.dbmodels import Property, Pricing_and_floor_plans
+
+logger = logging.getLogger(__name__)
+
+PROPERTY_EXPORT_COLUMNS = (
+    'id', 'property_link', 'title', 'address', 'street', 'city', 'state', 'zip_code', 'property_reviews',
+    'listing_verification', 'lease_option', 'year_built', 'validation_status', 'property_type', 'timestamp',
+)
+FLOOR_PLAN_EXPORT_COLUMNS = (
+    'id', 'apartment_name', 'rent_price_range', 'bedrooms', 'bathrooms', 'sqft', 'unit', 'base_rent',
+    'availability', 'details_link',
+)
+# Flat CSV header: one row per floor plan, property columns repeated
+CSV_COLUMNS = list(PROPERTY_EXPORT_COLUMNS) + [f'floor_plan_{c}' for c in FLOOR_PLAN_EXPORT_COLUMNS]
+
+
+def _export_statement(updated_since: Optional[datetime]):
+    """Properties left-joined to their floor plans, in property order so each property's rows are adjacent."""
+    statement = (
+        select(*[getattr(Property, c) for c in PROPERTY_EXPORT_COLUMNS],
+               *[getattr(Pricing_and_floor_plans, c).label(f'floor_plan_{c}') for c in FLOOR_PLAN_EXPORT_COLUMNS])
+        .join(Pricing_and_floor_plans, isouter=True)
+        .order_by(Property.id, Pricing_and_floor_plans.id)
+    )
+    if updated_since is not None:
+        # `timestamp` moves only when a listing's content changes (unchanged re-scrapes bump last_seen)
+        statement = statement.where(Property.timestamp >= updated_since)
+    return statement
+
+
+async def _partitions(updated_since: Optional[datetime]) -> AsyncIterator[List[Any]]:
+    """
+    Streams the export query through a server-side cursor, EXPORT_CONFIG['YIELD_PER'] rows at a time.
+    The session is opened here rather than injected, because it must outlive the endpoint function
+    and stay open for as long as the response is being streamed.
+    """
+    async with async_session_maker() as session:
+        result = await session.stream(
+            _export_statement(updated_since).execution_options(yield_per=EXPORT_CONFIG['YIELD_PER'])
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def stream_ndjson(updated_since: Optional[datetime] = None) -> AsyncIterator[str]:
+    """One JSON object per property, with its floor plans nested under "floor_plans"."""
+    current: Optional[Dict[str, Any]] = None
+    exported = 0
+    async for partition in _partitions(updated_since):
+        lines = []
+        for row in partition:
+            mapping = row._mapping
+            if current is None or current['id'] != mapping['id']:
+                if current is not None:
+                    lines.append(json.dumps(current, default=_json_default))
+                current = {c: mapping[c] for c in PROPERTY_EXPORT_COLUMNS}
+                current['floor_plans'] = []
+                exported += 1
+            if mapping['floor_plan_id'] is not None:
+                current['floor_plans'].append({c: mapping[f'floor_plan_{c}'] for c in FLOOR_PLAN_EXPORT_COLUMNS})
+        if lines:
+            yield '\n'.join(lines) + '\n'
+    if current is not None:
+        yield json.dumps(current, default=_json_default) + '\n'
+    PROMETHEUS_METRICS['EXPORT_ROWS'].labels(format='ndjson').inc(exported)
+    logger.info(f"NDJSON export streamed {exported} properties.")
+
+
+async def stream_csv(updated_since: Optional[datetime] = None) -> AsyncIterator[str]:
+    """One CSV row per floor plan (a property without floor plans gets one row with them empty)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    exported = 0
+    async for partition in _partitions(updated_since):
+        writer.writerows(
+            [value.isoformat() if isinstance(value, datetime) else value for value in row] for row in partition
+        )
+        exported += len(partition)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()  # header only: nothing matched
+    PROMETHEUS_METRICS['EXPORT_ROWS'].labels(format='csv').inc(exported)
+    logger.info(f"CSV export streamed {exported} rows.")
@@ -1,12 +1,101 @@
 # services/prediction_service.py
+import asyncio
 import logging
+import numpy as np
 import pandas as pd
-from typing import Optional
-from fastAPI_app.db.database import model
+from typing import List, Optional, Sequence, Tuple
+from fastAPI_app.APIconfigs import PREDICTION_BATCH, PROMETHEUS_METRICS
+from fastAPI_app.cache import prediction_cache
+from fastAPI_app.db.database import ModelService, model
+from fastAPI_app.models.prediction_models import RentFeatures
 
 logger = logging.getLogger(__name__)
 
 
+def predict_rows(rows: Sequence[RentFeatures], source: str, service: ModelService = model) -> List[float]:
+    """Scores all rows with one model call: the compiled NumPy model when loaded, else one DataFrame through the pipeline."""
+    active = service.active  # one version for the whole batch, even if a reload swaps it meanwhile
+    if active is None:
+        raise RuntimeError("Prediction model is not loaded.")
+
+    PROMETHEUS_METRICS['PREDICTION_BATCH_ROWS'].labels(source=source).observe(len(rows))
+    compiled = active.compiled
+    if compiled is not None:
+        numeric = np.array(
+            [[getattr(row, feature) for feature in compiled.numeric_features] for row in rows], dtype=np.float64
+        )
+        categorical = {
+            feature: [getattr(row, feature) or 'Unknown' for row in rows] for feature in compiled.categorical_features
+        }
+        return compiled.predict(numeric, categorical).tolist()
+
+    return active.pipeline.predict(_feature_frame(rows)).tolist()
+
+
+def _feature_frame(rows: Sequence[RentFeatures]) -> pd.DataFrame:
+    return pd.DataFrame({
+        'bedrooms': [row.bedrooms for row in rows],
+        'bathrooms': [row.bathrooms for row in rows],
+        'year_built': [row.year_built for row in rows],
+        'property_reviews': [row.property_reviews for row in rows],
+        'sqft': [row.sqft for row in rows],
+        'state': [row.state or 'Unknown' for row in rows],
+        'listing_verification': [row.listing_verification or 'Unknown' for row in rows],
+    })
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-row predictions within a worker: the first request opens a
+    `window_seconds` window, and everything that arrives in it is scored by one predict call
+    (sooner if `max_batch` rows are waiting). Most of the per-call cost is building the DataFrame
+    and running the transformers, not the regression itself, so a batch costs about as much as one row.
+    The compiled NumPy model scores a row in microseconds, far less than the window, so with it
+    loaded requests are scored straight away.
+    """
+
+    def __init__(self, window_seconds: float, max_batch: int, service: ModelService = model):
+        self.service = service
+        self.window_seconds = window_seconds
+        self.max_batch = max(max_batch, 1)
+        self._pending: List[Tuple[RentFeatures, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    async def predict(self, features: RentFeatures) -> float:
+        if self.window_seconds <= 0 or self.service.compiled is not None:
+            return predict_rows([features], source="single", service=self.service)[0]
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((features, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        try:
+            predictions = predict_rows([features for features, _ in batch], source="coalesced", service=self.service)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), prediction in zip(batch, predictions):
+            if not future.done():  # the request may have been cancelled meanwhile
+                future.set_result(prediction)
+
+
+prediction_batcher = PredictionBatcher(PREDICTION_BATCH['WINDOW_MS'] / 1000.0, PREDICTION_BATCH['MAX_BATCH'])
+
+
 async def predict_rent_service(
         bedrooms: int,
         bathrooms: float,
@@ -16,19 +105,34 @@ async def predict_rent_service(
         state: Optional[str],
         listing_verification: Optional[str]
 ) -> float:
-    """Transforms input data and calls the ML model for prediction."""
+    """Transforms input data and calls the ML model for prediction, batched with concurrent requests."""
     if model.model is None:
         raise RuntimeError("Prediction model is not loaded.")
 
-    input_data = pd.DataFrame({
-        'bedrooms': [bedrooms],
-        'bathrooms': [bathrooms],
-        'year_built': [year_built],
-        'property_reviews': [property_reviews],
-        'sqft': [sqft],
-        'state': [state] if state else ['Unknown'],
-        'listing_verification': [listing_verification] if listing_verification else ['Unknown']
-    })
+    features = RentFeatures(
+        bedrooms=bedrooms, bathrooms=bathrooms, property_reviews=property_reviews, sqft=sqft,
+        year_built=year_built, state=state, listing_verification=listing_verification,
+    )
+    if not prediction_cache.enabled:
+        return await prediction_batcher.predict(features)
+
+    version, key = model.version, cache_key(features)
+    prediction = prediction_cache.get(version, key)
+    if prediction is None:
+        prediction = await prediction_batcher.predict(features)
+        prediction_cache.set(version, key, prediction)
+    return prediction
+
+
+def cache_key(features: RentFeatures) -> tuple:
+    """The features exactly as the model sees them, so equal keys always mean equal predictions."""
+    return (
+        int(features.bedrooms), float(features.bathrooms), float(features.property_reviews), int(features.sqft),
+        features.year_built, features.state or 'Unknown', features.listing_verification or 'Unknown',
+    )
+
+
+async def predict_rent_batch_service(rows: Sequence[RentFeatures]) -> List[float]:
+    """Scores a client-supplied batch in one vectorized call."""
+    return predict_rows(rows, source="batch")
 
-    prediction = model.predict(input_data)
-    return prediction[0]
\ No newline at end of file
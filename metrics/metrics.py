@@ -35,6 +35,60 @@ SCRAPE_DURATION = Histogram(
     ["source"]
 )
 
+# Detail page cost, labelled by page profile ("lightweight" with request blocking, "full" without)
+PAGE_LOAD_TIME = Histogram(
+    "page_load_seconds",
+    "Time until a property page is ready for extraction (seconds)",
+    ["profile"]
+)
+
+PAGE_BYTES_TRANSFERRED = Histogram(
+    "page_bytes_transferred",
+    "Bytes transferred (headers + bodies) while loading a property page",
+    ["profile"],
+    buckets=(50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000, 10_000_000, 25_000_000)
+)
+
+# Per-host request rate limiting
+RATE_LIMIT_WAIT = Histogram(
+    "rate_limit_wait_seconds",
+    "Time a navigation waited for its host's token bucket",
+    ["host"],
+    buckets=(0, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30, 60)
+)
+
+RATE_LIMIT_RPS = Gauge(
+    "rate_limit_requests_per_second",
+    "Current adaptive request rate allowed per host",
+    ["host"],
+    multiprocess_mode="livemax"
+)
+
+RATE_LIMIT_PENALTIES = Counter(
+    "rate_limit_penalties_total",
+    "Throttling responses that cut a host's request rate",
+    ["host"]
+)
+
+# Browser context pool (labelled by pool slot)
+CONTEXT_ACTIVE_PAGES = Gauge(
+    "browser_context_active_pages",
+    "Pages currently open in a pooled browser context",
+    ["context"]
+)
+
+CONTEXT_PAGES_SERVED = Gauge(
+    "browser_context_pages_served",
+    "Pages served by the current browser context in a pool slot since it was (re)built",
+    ["context"]
+)
+
+CONTEXT_RECYCLES = Counter(
+    "browser_context_recycles_total",
+    "Browser contexts retired and rebuilt",
+    ["reason"]
+)
+
 # ========================
 # Data Quality Metrics
 # ========================
@@ -67,12 +121,112 @@ DB_INSERT_FAILURES = Counter(
     ["table"]
 )
 
+DB_UNCHANGED_ROWS = Counter(
+    "db_unchanged_rows_total",
+    "Rows left untouched by the write path because their content matched (property rows only get last_seen bumped)",
+    ["table"]
+)
+
+DB_ROWS_INGESTED = Counter(
+    "db_rows_ingested_total",
+    "Total rows merged into the database by bulk ingestion",
+    ["table"]
+)
+
+DB_INGEST_ROWS_PER_SECOND = Gauge(
+    "db_ingest_rows_per_second",
+    "Throughput of the most recent bulk ingestion batch (rows/sec)",
+    ["table"]
+)
+
 RETRIES_ATTEMPTED = Counter(
     "scraper_retries_total",
     "Total retry attempts made during scraping",
     ["source"]
 )
 
+# ========================
+# Producer Metrics
+# ========================
+
+PRODUCER_URLS_SENT = Counter(
+    "producer_urls_sent_total",
+    "Total property URLs enqueued to SQS"
+)
+
+PRODUCER_URLS_FAILED = Counter(
+    "producer_urls_failed_total",
+    "Total property URLs that could not be enqueued to SQS"
+)
+
+FRESHNESS_SKIPS = Counter(
+    "freshness_skipped_urls_total",
+    "URLs not scraped because the listing was stored within the freshness TTL",
+    ["stage"]
+)
+
+PRODUCER_URLS_DEDUPED = Counter(
+    "producer_urls_deduped_total",
+    "Total duplicate property URLs dropped before enqueueing"
+)
+
+# ========================
+# Consumer Pipeline Metrics
+# ========================
+
+CONSUMER_IN_FLIGHT = Gauge(
+    "consumer_in_flight_messages",
+    "Messages currently being scraped by consumer workers",
+    multiprocess_mode="livesum"  # summed across supervisor workers
+)
+
+CONSUMER_PREFETCHED = Gauge(
+    "consumer_prefetched_messages",
+    "Messages received from SQS and waiting for a free worker",
+    multiprocess_mode="livesum"  # summed across supervisor workers
+)
+
+CONSUMER_IDLE_SLOTS = Gauge(
+    "consumer_idle_slots",
+    "Consumer worker slots with nothing to process",
+    multiprocess_mode="livesum"  # summed across supervisor workers
+)
+
+SQS_VISIBILITY_TRACKED = Gauge(
+    "sqs_visibility_tracked_messages",
+    "In-flight SQS messages whose visibility timeout is being extended",
+    multiprocess_mode="livesum"  # summed across supervisor workers
+)
+
+SQS_VISIBILITY_EXTENSIONS = Counter(
+    "sqs_visibility_extensions_total",
+    "Total SQS visibility timeout extensions issued by the heartbeat"
+)
+
+CONSUMER_CONCURRENCY_LIMIT = Gauge(
+    "consumer_concurrency_limit",
+    "Current adaptive limit on concurrently scraped messages",
+    multiprocess_mode="livesum"  # summed across supervisor workers
+)
+
+CONSUMER_CONCURRENCY_ADJUSTMENTS = Counter(
+    "consumer_concurrency_adjustments_total",
+    "Changes to the adaptive concurrency limit",
+    ["reason"]
+)
+
+CONSUMER_SCRAPE_P95 = Gauge(
+    "consumer_scrape_duration_p95_seconds",
+    "p95 scrape duration over the last concurrency controller window",
+    multiprocess_mode="livemax"
+)
+
+CONSUMER_WORKER_RESTARTS = Counter(
+    "consumer_worker_restarts_total",
+    "Consumer worker processes restarted by the supervisor",
+    ["reason"]
+)
+
 # ========================
 # Resource Usage Metrics
 # ========================
@@ -80,10 +234,12 @@ RETRIES_ATTEMPTED = Counter(
 # Gauge → represents current values, not counters
 MEMORY_USAGE = Gauge(
     "scraper_memory_usage_mb",
-    "Current memory usage of the scraper in MB"
+    "Current memory usage of the scraper in MB",
+    multiprocess_mode="livemax"  # host-wide value, same in every worker
 )
 
 CPU_USAGE = Gauge(
     "scraper_cpu_usage_percent",
-    "Current CPU usage percent of the scraper"
+    "Current CPU usage percent of the scraper",
+    multiprocess_mode="livemax"  # host-wide value, same in every worker
 )
@@ -0,0 +1,110 @@
+# ml_pipeline/compiled_model.py
+"""
+Compiles the fitted rent pipeline (StandardScaler + OneHotEncoder + LinearRegression) into a
+coefficient bundle the API evaluates with plain NumPy (fastAPI_app/db/database.py):
+
+    rent = intercept + numeric_features @ weights + sum(category_offsets[feature][category])
+
+The scaler is folded into the weights (w / scale) and intercept (- sum(w * mean / scale)); each
+one-hot column becomes a per-category offset, and unseen categories add nothing, as with
+handle_unknown='ignore'. The bundle records the checksum of the .pkl it was compiled from, so a
+stale bundle is never used with a newer pipeline.
+
+Compile an existing artifact with: python -m ml_pipeline.compiled_model [path/to/pipeline.pkl]
+"""
+import hashlib
+import json
+import logging
+import os
+import sys
+from typing import Any, Dict
+
+import numpy as np
+from sklearn.linear_model import LinearRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def bundle_path_for(model_path: str) -> str:
+    """linear_regression_rent_model_pipeline.pkl -> linear_regression_rent_model_pipeline.coefficients.json"""
+    return os.path.splitext(model_path)[0] + '.coefficients.json'
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compile_linear_pipeline(pipeline: Pipeline) -> Dict[str, Any]:
+    """Folds the fitted pipeline into weights, an intercept and per-category offsets."""
+    preprocessor = pipeline.named_steps['preprocessor']
+    regressor = pipeline.named_steps['regressor']
+    if not isinstance(regressor, LinearRegression) or np.ndim(regressor.coef_) != 1:
+        raise ValueError("Only a single-target LinearRegression can be compiled.")
+
+    coef = np.asarray(regressor.coef_, dtype=float)
+    intercept = float(regressor.intercept_)
+    numeric_features, weights, category_offsets = [], [], {}
+    offset = 0  # position of the current transformer's output columns in coef
+
+    for name, transformer, columns in preprocessor.transformers_:
+        if transformer == 'drop' or name == 'remainder':
+            continue
+        columns = list(columns)
+        if isinstance(transformer, StandardScaler):
+            w = coef[offset:offset + len(columns)]
+            mean = transformer.mean_ if transformer.with_mean else np.zeros(len(columns))
+            scale = transformer.scale_ if transformer.with_std else np.ones(len(columns))
+            numeric_features += columns
+            weights += (w / scale).tolist()
+            intercept -= float(np.sum(w * mean / scale))
+            offset += len(columns)
+        elif isinstance(transformer, OneHotEncoder):
+            if transformer.drop is not None or getattr(transformer, 'infrequent_categories_', None) is not None:
+                raise ValueError("OneHotEncoder with drop or infrequent categories cannot be compiled.")
+            for column, categories in zip(columns, transformer.categories_):
+                category_offsets[column] = {
+                    str(category): float(coef[offset + i]) for i, category in enumerate(categories)
+                }
+                offset += len(categories)
+        else:
+            raise ValueError(f"Cannot compile transformer '{name}' ({type(transformer).__name__}).")
+
+    if offset != len(coef):
+        raise ValueError(f"Compiled {offset} of {len(coef)} model coefficients.")
+    return {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'numeric_features': numeric_features,
+        'weights': weights,
+        'intercept': intercept,
+        'category_offsets': category_offsets,
+    }
+
+
+def export_coefficient_bundle(pipeline: Pipeline, model_path: str) -> str:
+    """Writes the compiled bundle next to the saved pipeline (model_path must already be written)."""
+    bundle = compile_linear_pipeline(pipeline)
+    bundle['artifact_sha256'] = file_sha256(model_path)
+    path = bundle_path_for(model_path)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(bundle, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == '__main__':
+    import joblib
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'fastAPI_app', 'linear_regression_rent_model_pipeline.pkl'
+    )
+    logger.info(f"Coefficient bundle written to {export_coefficient_bundle(joblib.load(model_path), model_path)}")
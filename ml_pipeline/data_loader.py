@@ -4,6 +4,8 @@ import os
 from sqlalchemy import create_engine
 from dotenv import load_dotenv
 
+from database_ops.normalization import coerce_numeric_columns
+
 load_dotenv()
 
 
@@ -30,10 +32,8 @@ def get_raw_data() -> pd.DataFrame:
             property ON property.id = T1.property_id
     """, engine)
 
-    # Pre-cleaning of data types to avoid pipeline errors
-    df['base_rent'] = pd.to_numeric(df['base_rent'], errors='coerce')
-    df['sqft'] = pd.to_numeric(df['sqft'], errors='coerce')
-    df['year_built'] = pd.to_numeric(df['year_built'], errors='coerce')
+    # Pre-cleaning of data types to avoid pipeline errors (same parsing rules as the ingest path)
+    coerce_numeric_columns(df, ['base_rent', 'sqft', 'year_built'])
 
     df.dropna(inplace=True)
 
@@ -1,7 +1,8 @@
 # ml_pipeline/main.py
+# Run from the repo root as a package: python -m ml_pipeline.main
 import logging
-from data_loader import get_raw_data
-from trainer import train_and_save_model
+from ml_pipeline.data_loader import get_raw_data
+from ml_pipeline.trainer import train_and_save_model
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
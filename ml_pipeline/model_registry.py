@@ -0,0 +1,118 @@
+# ml_pipeline/model_registry.py
+"""
+Versioned model registry shared by the trainer (writer) and the API (reader):
+
+    <registry>/versions/<version>/model.pkl                    the fitted pipeline
+    <registry>/versions/<version>/model.coefficients.json      compiled NumPy bundle (compiled_model.py)
+    <registry>/versions/<version>/metadata.json                version, checksum, metrics, ...
+    <registry>/CURRENT                                         name of the version to serve
+
+A version directory is written under a temporary name and renamed into place once complete, and
+CURRENT is replaced atomically last, so a reader never sees a partial version. Versions are never
+modified after publishing; roll back by pointing CURRENT at an older one (set_current).
+"""
+import json
+import logging
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+import joblib
+
+from ml_pipeline.compiled_model import export_coefficient_bundle, file_sha256
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'model_registry')
+MODEL_FILE = 'model.pkl'
+METADATA_FILE = 'metadata.json'
+CURRENT_FILE = 'CURRENT'
+
+
+def registry_dir() -> str:
+    return os.getenv('MODEL_REGISTRY_DIR', DEFAULT_REGISTRY_DIR)
+
+
+def version_dir(registry: str, version: str) -> str:
+    return os.path.join(registry, 'versions', version)
+
+
+def read_current(registry: str) -> Optional[str]:
+    """The version CURRENT points at, or None before anything was published."""
+    try:
+        with open(os.path.join(registry, CURRENT_FILE)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def set_current(registry: str, version: str):
+    """Atomically points CURRENT at an already published, intact version."""
+    if not os.path.exists(os.path.join(version_dir(registry, version), METADATA_FILE)):
+        raise ValueError(f"Model version {version} is not in the registry {registry}.")
+    read_metadata(registry, version)  # checksum
+    tmp_path = os.path.join(registry, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(registry, CURRENT_FILE))
+
+
+def read_metadata(registry: str, version: str) -> Dict[str, Any]:
+    """The version's metadata, after checking its artifact still matches the recorded checksum."""
+    path = version_dir(registry, version)
+    with open(os.path.join(path, METADATA_FILE)) as f:
+        metadata = json.load(f)
+    actual = file_sha256(os.path.join(path, MODEL_FILE))
+    if actual != metadata['artifact_sha256']:
+        raise ValueError(f"Model version {version} is corrupt: checksum {actual} != {metadata['artifact_sha256']}.")
+    return metadata
+
+
+def publish_model(pipeline, metrics: Dict[str, float], registry: Optional[str] = None,
+                  make_current: bool = True) -> str:
+    """Writes the pipeline, its compiled bundle and metadata as a new version; returns the version name."""
+    import sklearn
+
+    registry = registry or registry_dir()
+    os.makedirs(os.path.join(registry, 'versions'), exist_ok=True)
+    created_at = datetime.now(timezone.utc)
+    staging = os.path.join(registry, 'versions', f".staging-{created_at:%Y%m%dT%H%M%S%fZ}-{os.getpid()}")
+    os.makedirs(staging)
+    try:
+        model_path = os.path.join(staging, MODEL_FILE)
+        joblib.dump(pipeline, model_path)
+        export_coefficient_bundle(pipeline, model_path)
+        sha256 = file_sha256(model_path)
+        version = f"{created_at:%Y%m%dT%H%M%SZ}-{sha256[:8]}"
+        metadata = {
+            'version': version,
+            'created_at': created_at.isoformat(),
+            'artifact_sha256': sha256,
+            'sklearn_version': sklearn.__version__,
+            'metrics': metrics,
+        }
+        with open(os.path.join(staging, METADATA_FILE), 'w') as f:
+            json.dump(metadata, f, indent=2)
+        os.rename(staging, version_dir(registry, version))
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if make_current:
+        set_current(registry, version)
+    logger.info(f"Published model version {version} to {registry}{' (now current)' if make_current else ''}.")
+    return version
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    # python -m ml_pipeline.model_registry                 show the current version
+    # python -m ml_pipeline.model_registry <version>       roll forward/back to a published version
+    if len(sys.argv) > 1:
+        set_current(registry_dir(), sys.argv[1])
+    current = read_current(registry_dir())
+    print(json.dumps(read_metadata(registry_dir(), current), indent=2) if current else "No model published yet.")
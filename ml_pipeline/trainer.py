@@ -5,9 +5,11 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LinearRegression
 from sklearn.metrics import mean_squared_error, r2_score
-from preprocessor import get_preprocessor
+from ml_pipeline.preprocessor import get_preprocessor
+from ml_pipeline.compiled_model import export_coefficient_bundle
+from ml_pipeline.model_registry import publish_model
 from sklearn.pipeline import Pipeline
-from ml_configs import ML_CONFIG
+from ml_pipeline.ml_configs import ML_CONFIG
 import os
 
 logger = logging.getLogger(__name__)
@@ -50,4 +52,11 @@ def train_and_save_model(df: pd.DataFrame):
     joblib.dump(model_pipeline, model_path)
     logger.info(f"Model pipeline saved to {model_path}")
 
+    # NumPy fast path for the API; without it the API predicts through the pipeline
+    bundle_path = export_coefficient_bundle(model_pipeline, model_path)
+    logger.info(f"Compiled coefficient bundle saved to {bundle_path}")
+
+    # Running APIs pick the new version up from the registry without a restart
+    publish_model(model_pipeline, metrics={'mse': float(mse), 'r2': float(r2), 'training_rows': len(X_train)})
+
 
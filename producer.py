@@ -3,11 +3,13 @@
 import asyncio
 import logging
 import os
+from contextlib import aclosing
 from playwright.async_api import async_playwright
 import aiobotocore.session
 from dotenv import load_dotenv
 
 from data_extraction.scraper import ApartmentScraper  # Note: The scraper class is still needed
+from data_extraction.sqs_enqueuer import BatchedSQSEnqueuer, freshness_cache_from_env
 from config import SCRAPER_CONFIG
 
 # Configure logging
@@ -23,6 +25,7 @@ logger = logging.getLogger(__name__)
 # Load environment variables
 load_dotenv()
 SQS_QUEUE_NAME = 'real-estate-scrape-jobs'
+PRODUCER_MAX_IN_FLIGHT_BATCHES = int(os.getenv("PRODUCER_MAX_IN_FLIGHT_BATCHES", "5"))
 
 
 async def run_producer():
@@ -44,21 +47,22 @@ async def run_producer():
 
         async with async_playwright() as p:
             async with ApartmentScraper(p) as scraper:
-                # Step 1: Extract all property URLs
-                property_urls = await scraper.scrape_all_pages(SCRAPER_CONFIG['MAIN_URL'])
-
-                # Step 2: Limit properties and send URLs to SQS
-                limited_urls = property_urls[:SCRAPER_CONFIG['PROPERTIES_TO_SCRAPE_LIMIT']]
-                logger.info(f"Found {len(property_urls)} properties. Sending {len(limited_urls)} URLs to SQS.")
-
-                tasks = [sqs_client.send_message(
-                    QueueUrl=queue_url,
-                    MessageBody=url
-                ) for url in limited_urls]
-
-                # Use aio.gather for concurrent message sending
-                await asyncio.gather(*tasks, return_exceptions=True)
-                logger.info("All messages sent to SQS.")
+                # Discover property URLs and stream them into SQS as result pages come in.
+                # Sends are deduplicated and batched, with bounded in-flight batches and retries.
+                # Listings stored within FRESHNESS_TTL_SECONDS are skipped (needs DATABASE_URL).
+                limit = SCRAPER_CONFIG['PROPERTIES_TO_SCRAPE_LIMIT']
+                async with BatchedSQSEnqueuer(sqs_client, queue_url, PRODUCER_MAX_IN_FLIGHT_BATCHES,
+                                              freshness=freshness_cache_from_env(), limit=limit) as enqueuer:
+                    async with aclosing(scraper.discover_property_urls(SCRAPER_CONFIG['MAIN_URL'])) as property_urls:
+                        async for url in property_urls:
+                            await enqueuer.submit(url)
+                            if enqueuer.full:  # counts URLs actually queued, not those skipped as fresh
+                                logger.info(f"Reached the limit of {limit} properties — stopping discovery.")
+                                break
+                logger.info(
+                    f"All messages sent to SQS ({enqueuer.queued} URLs queued of {enqueuer.submitted} unique, "
+                    f"{enqueuer.skipped} skipped as recently scraped)."
+                )
 
     logger.info("Producer process completed.")
 
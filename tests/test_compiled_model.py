@@ -0,0 +1,61 @@
+# tests/test_compiled_model.py
+"""The compiled NumPy model (ml_pipeline/compiled_model.py) must score exactly like the pipeline it was compiled from."""
+import os
+import random
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture(scope="module")
+def prediction_service():
+    # fastAPI_app's config requires these at import; nothing here connects to the database
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv("DATABASE_URL", os.getenv("DATABASE_URL") or "postgresql+asyncpg://localhost/unused")
+        mp.setenv("API_TOKEN", os.getenv("API_TOKEN") or "unused")
+        from fastAPI_app.services import prediction_service
+    return prediction_service
+
+
+@pytest.fixture(scope="module")
+def service(prediction_service):
+    """The committed artifact and its coefficient bundle, in a ModelService of its own."""
+    from fastAPI_app.APIconfigs import MODEL_PATH
+    from fastAPI_app.db.database import ModelService
+
+    service = ModelService()
+    service.load_model(MODEL_PATH)
+    assert service.compiled is not None, f"No coefficient bundle matches {MODEL_PATH}; run python -m ml_pipeline.compiled_model"
+    return service
+
+
+def _rows(count: int, states, verifications):
+    from fastAPI_app.models.prediction_models import RentFeatures
+
+    rng = random.Random(0)
+    return [
+        RentFeatures(bedrooms=rng.randint(0, 4), bathrooms=rng.choice([1, 1.5, 2, 3]), property_reviews=rng.uniform(0, 5),
+                     sqft=rng.randint(400, 2500), year_built=rng.randint(1950, 2024),
+                     state=rng.choice(states), listing_verification=rng.choice(verifications))
+        for _ in range(count)
+    ]
+
+
+@pytest.mark.parametrize("states, verifications", [
+    (['IL'], ['Verified', 'Not Verified', 'N/A', 'Verified Listing']),  # seen in training
+    (['CA', 'TX'], ['Other']),                                           # unseen: no offset
+    ([None], [None]),                                                    # missing: 'Unknown'
+], ids=["known", "unseen", "missing"])
+def test_compiled_matches_pipeline(prediction_service, service, states, verifications):
+    rows = _rows(2000, states, verifications)
+    compiled = np.array(prediction_service.predict_rows(rows, source="batch", service=service))
+    reference = service.model.predict(prediction_service._feature_frame(rows))
+    np.testing.assert_allclose(compiled, reference, rtol=1e-9, atol=1e-6)
+
+
+def test_both_paths_reject_missing_year_built(prediction_service, service):
+    rows = [row.model_copy(update={'year_built': None}) for row in _rows(1, ['IL'], ['Verified'])]
+    with pytest.raises(ValueError):
+        service.model.predict(prediction_service._feature_frame(rows))
+    with pytest.raises(ValueError):
+        prediction_service.predict_rows(rows, source="batch", service=service)
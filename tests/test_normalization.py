@@ -0,0 +1,45 @@
+# tests/test_normalization.py
+"""parse_numeric_series (vectorized) must agree with the scalar parse_numeric_value it replaced."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from database_ops.normalization import parse_numeric_series, parse_numeric_value
+
+# Shapes scraped listings carry, and plain numbers from already-typed columns
+SAMPLES = [
+    '$1,500 - $1,800', '$1,850', '1,200 - 1,400', '$2,100 – $2,400', '650 Sq Ft', '1,050 Sq Ft',
+    '1 Bed', '3 Bed', '1 Bath', '2 Bath', '1.5', '4.7', '1998', '-5', '-2.5', '1e-05',
+    7, 1.5, -5, 1e-05, 2.5e20,
+]
+
+
+def _parse(values, studio_as_zero=False):
+    return parse_numeric_series(pd.Series(values, dtype=object), studio_as_zero=studio_as_zero).tolist()
+
+
+@pytest.mark.parametrize("value", SAMPLES, ids=[repr(value) for value in SAMPLES])
+def test_matches_scalar_parser(value):
+    assert _parse([value]) == [pytest.approx(parse_numeric_value(value), rel=1e-12)]
+
+
+def test_parses_what_the_scalar_parser_rejects():
+    # The scalar parser only strips "Bed"/"Bath"/"Sq Ft", so plurals and prefixed text came back None
+    assert [parse_numeric_value(value) for value in ('1.5 Baths', '2 Beds', 'Built in 1998')] == [None, None, None]
+    assert _parse(['1.5 Baths', '2 Beds', 'Built in 1998']) == [1.5, 2.0, 1998.0]
+
+
+def test_missing_and_text_are_nan():
+    assert np.isnan(_parse([None, np.nan, 'N/A', 'Call for pricing'])).all()
+
+
+def test_studio_as_zero_only_when_asked():
+    assert _parse(['Studio', '2 Bed'], studio_as_zero=True) == [0.0, 2.0]
+    assert np.isnan(_parse(['Studio'])[0])
+
+
+def test_repeated_values_keep_row_order():
+    values = ['1 Bed', None, '2 Bed', '1 Bed', 3]
+    parsed = parse_numeric_series(pd.Series(values, index=[10, 11, 12, 13, 14], dtype=object))
+    assert parsed.index.tolist() == [10, 11, 12, 13, 14]
+    assert parsed.tolist()[:1] + parsed.tolist()[2:] == [1.0, 2.0, 1.0, 3.0] and np.isnan(parsed[11])